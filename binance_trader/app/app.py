@@ -2,13 +2,22 @@ import asyncio
 import datetime as dt
 
 from binance import AsyncClient
+from binance_trader.data.modules.bar_close import BarCloseTrigger
 from binance_trader.strategy.modules.custom_strategy.sma_crossover import SMAStrategyRun
 from binance_trader.strategy.modules.models.models import ContractType
+from binance_trader.user.modules.client_pool import ClientPool
+from binance_trader.user.modules.position_book import PositionBook
 from keys import Keys
 
 
 async def run_parallel(bots):
-    await asyncio.gather(*bots)
+    try:
+        await asyncio.gather(*bots)
+    finally:
+        print(ClientPool.stats())
+        await BarCloseTrigger.stop_all()
+        await PositionBook.stop_all()
+        await ClientPool.close_all()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,525 @@
+import asyncio
+import datetime as dt
+import json
+import multiprocessing as mp
+import random
+import resource
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import unquote
+
+import aiohttp
+import numpy as np
+from aiohttp import WSMsgType, web
+from binance.enums import *
+from binance_trader.data.modules.bar_close import BarCloseTrigger
+from binance_trader.data.modules.clock import AcceleratedClock
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.multiplex_stream import MultiplexStream
+from binance_trader.data.modules.write_queue import WriteQueue
+from binance_trader.strategy.modules.custom_strategy.sma_crossover import SMAStrategyRun
+from binance_trader.strategy.modules.models.models import ContractType
+from binance_trader.strategy.modules.replay import ReplayFeed, SimulatedExchange
+from binance_trader.user.modules.account_snapshot import AccountSnapshot
+from binance_trader.user.modules.client_pool import ClientPool
+from binance_trader.user.modules.order_gateway import OrderGateway
+
+
+def _percentiles(samples: list, scale: float = 1000.0) -> dict:
+    if not samples:
+        return {"n": 0, "p50": None, "p99": None, "max": None}
+    values = np.asarray(samples) * scale
+    return {
+        "n": len(values),
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * resource.getpagesize() / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+class MockBinanceServer:
+    def __init__(
+        self,
+        exchange: SimulatedExchange,
+        clock: AcceleratedClock,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 7,
+    ) -> None:
+        self._exchange = exchange
+        self._clock = clock
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._requests = Counter()
+        self._errors = Counter()
+        self._lags = {"klines": [], "order": []}
+        self._sockets = 0
+        self._pushed = 0
+        self._runner = None
+
+        self._app = web.Application()
+        self._app.add_routes(
+            [
+                web.get("/api/v3/ping", self._ping),
+                web.get("/api/v3/time", self._time),
+                web.get("/api/v3/avgPrice", self._avg_price),
+                web.get("/fapi/v1/ping", self._ping),
+                web.get("/fapi/v1/time", self._time),
+                web.get("/fapi/v1/exchangeInfo", self._exchange_info),
+                web.get("/fapi/v1/continuousKlines", self._klines),
+                web.get("/fapi/v2/account", self._account),
+                web.post("/fapi/v1/order", self._order),
+                web.post("/fapi/v1/batchOrders", self._batch_orders),
+                web.get("/stream", self._stream),
+                web.get("/_stats", self._stats),
+            ]
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {sum(self._requests.values())} requests | {sum(self._errors.values())} errors | {self._sockets} sockets ]"
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self._requests),
+            "errors": dict(self._errors),
+            "klines_lag_ms": _percentiles(self._lags["klines"]),
+            "order_lag_ms": _percentiles(self._lags["order"]),
+            "sockets": self._sockets,
+            "pushed": self._pushed,
+            "exchange": self._exchange.stats,
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _bar_lag(self, interval: str = KLINE_INTERVAL_1MINUTE) -> float:
+        now = int(self._clock.time() * 1000)
+        return self._clock.real((now - Interval.bar_open(now, interval)) / 1000)
+
+    async def _respond(self, name: str, call):
+        self._requests[name] += 1
+        delay = self._latency + self._jitter * self._rng.random()
+        if delay:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self._error_rate:
+            self._errors[name] += 1
+            return web.json_response(
+                {
+                    "code": -1001,
+                    "msg": "Internal error; unable to process your request.",
+                },
+                status=500,
+            )
+        return web.json_response(await call())
+
+    async def _ping(self, request):
+        return await self._respond("ping", self._exchange.ping)
+
+    async def _time(self, request):
+        async def server_time():
+            return {"serverTime": self._exchange.now}
+
+        return await self._respond("time", server_time)
+
+    async def _avg_price(self, request):
+        return await self._respond(
+            "avgPrice", lambda: self._exchange.get_avg_price(request.query["symbol"])
+        )
+
+    async def _exchange_info(self, request):
+        return await self._respond("exchangeInfo", self._exchange.futures_exchange_info)
+
+    async def _klines(self, request):
+        self._lags["klines"].append(self._bar_lag())
+        query = request.query
+        return await self._respond(
+            "continuousKlines",
+            lambda: self._exchange.futures_continous_klines(
+                pair=query["pair"], limit=int(query.get("limit", 500))
+            ),
+        )
+
+    async def _account(self, request):
+        return await self._respond("account", self._exchange.futures_account)
+
+    async def _order(self, request):
+        self._lags["order"].append(self._bar_lag())
+        form = await request.post()
+        return await self._respond(
+            "order",
+            lambda: self._exchange.futures_create_order(
+                symbol=form["symbol"],
+                side=form["side"],
+                type=form["type"],
+                quantity=float(form["quantity"]),
+            ),
+        )
+
+    async def _batch_orders(self, request):
+        self._lags["order"].append(self._bar_lag())
+        form = {**request.query, **(await request.post())}
+        orders = form["batchOrders"]
+        if orders.startswith("%"):
+            orders = unquote(orders)
+        return await self._respond(
+            "batchOrders",
+            lambda: self._exchange.futures_place_batch_order(json.loads(orders)),
+        )
+
+    async def _stats(self, request):
+        return web.json_response(self.stats)
+
+    async def _stream(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets += 1
+        streams = set(filter(None, request.query.get("streams", "").split("/")))
+        pusher = asyncio.ensure_future(self._push(ws, streams))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                if req.get("method") == "SUBSCRIBE":
+                    streams.update(req["params"])
+                elif req.get("method") == "UNSUBSCRIBE":
+                    streams.difference_update(req["params"])
+                await ws.send_json({"result": None, "id": req.get("id")})
+        finally:
+            pusher.cancel()
+            self._sockets -= 1
+        return ws
+
+    async def _push(self, ws, streams: set) -> None:
+        while not ws.closed:
+            await self._clock.sleep(60 - self._clock.time() % 60)
+            now = self._exchange.now
+            for stream in list(streams):
+                event = self._kline_event(stream, now)
+                if event is not None:
+                    await ws.send_str(json.dumps({"stream": stream, "data": event}))
+                    self._pushed += 1
+
+    def _kline_event(self, stream: str, now: int):
+        pair, _, rest = stream.partition("_")
+        contract_type, _, interval = rest.partition("@continuousKline_")
+        if pair.upper() not in self._exchange.symbols or interval != "1m":
+            return None
+        feed = self._exchange.feed(pair)
+        i = feed.closed(now) - 1
+        if i < 0:
+            return None
+        row = feed.kline(i)
+        return {
+            "e": "continuous_kline",
+            "E": now,
+            "ps": pair.upper(),
+            "ct": contract_type.upper(),
+            "k": {
+                "t": row[0],
+                "T": row[6],
+                "i": interval,
+                "o": row[1],
+                "h": row[2],
+                "l": row[3],
+                "c": row[4],
+                "v": row[5],
+                "n": 0,
+                "x": True,
+                "q": "0",
+                "V": "0",
+                "Q": "0",
+            },
+        }
+
+
+def synthetic_feeds(symbols: list, start: int, bars: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    open_time = start + np.arange(bars, dtype=np.int64) * 60_000
+    feeds = {}
+    for symbol in symbols:
+        base = float(rng.uniform(1_000, 50_000))
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+        open = np.concatenate(([base], close[:-1]))
+        feeds[symbol] = ReplayFeed(
+            open_time, open, np.maximum(open, close), np.minimum(open, close), close
+        )
+    return feeds
+
+
+async def _serve(config: dict, conn) -> None:
+    clock = AcceleratedClock(config["speed"], config["start"], config["origin"])
+    feeds = synthetic_feeds(
+        config["symbols"], config["feed_start"], config["bars"], config["seed"]
+    )
+    server = MockBinanceServer(
+        SimulatedExchange(feeds, clock),
+        clock,
+        latency=config["latency"],
+        jitter=config["jitter"],
+        error_rate=config["error_rate"],
+        seed=config["seed"],
+    )
+    conn.send(await server.start(config["host"]))
+    await asyncio.Event().wait()
+
+
+def _run_server(config: dict, conn) -> None:
+    asyncio.run(_serve(config, conn))
+
+
+async def run_bots(bots: list) -> list:
+    try:
+        return await asyncio.gather(*bots, return_exceptions=True)
+    finally:
+        print(ClientPool.stats())
+        await ClientPool.close_all()
+
+
+class LoadTest:
+    def __init__(
+        self,
+        bots: int = 100,
+        symbols: int = None,
+        speed: float = 60.0,
+        duration: float = 30.0,
+        latency: float = 0.002,
+        jitter: float = 0.002,
+        error_rate: float = 0.0,
+        sma_long: int = 52,
+        sma_short: int = 23,
+        quantity: float = 0.01,
+        connection_limit: int = 100,
+        streams: bool = False,
+        trigger: str = "poll",
+        gateway: bool = False,
+        write_queue: str = None,
+        lag_interval: float = 0.05,
+        host: str = "127.0.0.1",
+        seed: int = 7,
+    ) -> None:
+        self._bots = bots
+        self._symbols = [f"S{i:05d}USDT" for i in range(symbols or bots)]
+        self._speed = speed
+        self._duration = duration
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._sma_long = sma_long
+        self._sma_short = sma_short
+        self._quantity = quantity
+        self._connection_limit = connection_limit
+        self._streams = streams
+        self._trigger = trigger
+        self._gateway = gateway
+        self._write_queue = write_queue
+        self._lag_interval = lag_interval
+        self._host = host
+        self._seed = seed
+        self._loop_lag = []
+        self._stream_lag = []
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._bots} bots | {len(self._symbols)} symbols | {self._trigger} | x{self._speed:g} | {self._duration:g}s ]"
+
+    async def run(self) -> dict:
+        clock = AcceleratedClock(self._speed, start=(time.time() // 60) * 60 + 50)
+        warmup = self._sma_long + 2
+        bars = warmup + int(self._duration * self._speed / 60) + 3
+        config = {
+            "speed": self._speed,
+            "start": clock.start,
+            "origin": clock.origin,
+            "symbols": self._symbols,
+            "feed_start": int(clock.start // 60 * 60 - warmup * 60) * 1000,
+            "bars": bars,
+            "seed": self._seed,
+            "latency": self._latency,
+            "jitter": self._jitter,
+            "error_rate": self._error_rate,
+            "host": self._host,
+        }
+
+        parent, child = mp.Pipe()
+        server = mp.Process(target=_run_server, args=(config, child), daemon=True)
+        server.start()
+        loop = asyncio.get_running_loop()
+        url = await loop.run_in_executor(None, parent.recv)
+
+        ClientPool.configure(
+            limit=self._connection_limit,
+            endpoints={
+                "API_TESTNET_URL": f"{url}/api",
+                "FUTURES_TESTNET_URL": f"{url}/fapi",
+            },
+        )
+        log_loc = tempfile.mkdtemp(prefix="load_test_")
+        ws_url = url.replace("http", "ws", 1) + "/"
+        bar_close = (
+            MultiplexStream(base_url=ws_url) if self._trigger == "stream" else None
+        )
+        end_time = dt.datetime.fromtimestamp(clock.start + self._duration * self._speed)
+        bots = [
+            SMAStrategyRun(
+                api_key="load-test",
+                api_secret="load-test",
+                testnet=True,
+                interval=KLINE_INTERVAL_1MINUTE,
+                symbol=self._symbols[i % len(self._symbols)],
+                order_log_loc=log_loc,
+                price_log_loc=log_loc,
+                start_time=clock.now(),
+                end_time=end_time,
+                limit=self._sma_long + 1,
+                start_data_stream="",
+                end_data_stream="",
+                contract_type=ContractType.Perpetual,
+                sma_long=self._sma_long,
+                sma_short=self._sma_short,
+                quantity=self._quantity,
+                use_position_book=False,
+                clock=clock,
+                multiplex=bar_close,
+                use_order_gateway=self._gateway,
+            )
+            for i in range(self._bots)
+        ]
+
+        multiplex = None
+        if self._streams:
+            multiplex = MultiplexStream(base_url=ws_url)
+            for symbol in self._symbols:
+                await multiplex.add_kline(
+                    symbol,
+                    ContractType.Perpetual,
+                    KLINE_INTERVAL_1MINUTE,
+                    lambda data: self._stream_lag.append(
+                        clock.real(clock.time() - (data["k"]["T"] + 1) / 1000)
+                    ),
+                )
+            await multiplex.start()
+
+        Latency.reset()
+        AccountSnapshot.clear("load-test")
+        queue = (
+            WriteQueue.start(policy=self._write_queue) if self._write_queue else None
+        )
+        rss = _rss_mb()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        monitor = asyncio.ensure_future(self._monitor_loop())
+        try:
+            results = await run_bots(bots)
+        finally:
+            monitor.cancel()
+            gateways = OrderGateway.stats_all()
+            await OrderGateway.stop_all()
+            await BarCloseTrigger.stop_all()
+            queue_stats = queue.stats if queue is not None else None
+            WriteQueue.stop()
+            for stream in (multiplex, bar_close):
+                if stream is not None:
+                    await stream.stop()
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        peak = _rss_mb()
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/_stats") as resp:
+                server_stats = await resp.json()
+        server.terminate()
+
+        failed = Counter(
+            type(r).__name__ for r in results if isinstance(r, BaseException)
+        )
+        return {
+            "bots": self._bots,
+            "symbols": len(self._symbols),
+            "wall_s": wall,
+            "bars": int(self._duration * self._speed / 60),
+            "failed_bots": dict(failed),
+            "klines_lag_ms": server_stats["klines_lag_ms"],
+            "order_lag_ms": server_stats["order_lag_ms"],
+            "stream_lag_ms": _percentiles(self._stream_lag),
+            "loop_lag_ms": _percentiles(self._loop_lag),
+            "cpu_pct": 100 * cpu / wall,
+            "cpu_ms_per_bot_bar": 1000
+            * cpu
+            / self._bots
+            / max(self._duration * self._speed / 60, 1),
+            "rss_mb": peak,
+            "rss_kb_per_bot": 1000 * (peak - rss) / self._bots,
+            "requests": server_stats["requests"],
+            "errors": server_stats["errors"],
+            "gateways": gateways,
+            "latency_ms": Latency.totals(),
+            "write_queue": queue_stats,
+        }
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self._lag_interval)
+            self._loop_lag.append(time.perf_counter() - start - self._lag_interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bots", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--symbols", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=60.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--connection-limit", type=int, default=100)
+    parser.add_argument("--streams", action="store_true")
+    parser.add_argument("--trigger", choices=["poll", "stream"], default="poll")
+    parser.add_argument("--gateway", action="store_true")
+    parser.add_argument("--write-queue", choices=WriteQueue.Policies, default=None)
+    args = parser.parse_args()
+
+    for bots in args.bots:
+        test = LoadTest(
+            bots=bots,
+            symbols=args.symbols,
+            speed=args.speed,
+            duration=args.duration,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            connection_limit=args.connection_limit,
+            streams=args.streams,
+            trigger=args.trigger,
+            gateway=args.gateway,
+            write_queue=args.write_queue,
+        )
+        report = asyncio.run(test.run())
+        print(test)
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,341 @@
+import asyncio
+import datetime as dt
+import json
+import multiprocessing as mp
+import os
+import signal
+import time
+import zlib
+from collections import Counter
+
+from binance_trader.data.modules.bar_close import BarCloseTrigger
+from binance_trader.data.modules.candle_archive import CandleArchive
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.multiplex_stream import MultiplexStream
+from binance_trader.data.modules.order_book import OrderBookStream
+from binance_trader.data.modules.write_queue import WriteQueue
+from binance_trader.strategy.modules.custom_strategy.sma_crossover import SMACrossover
+from binance_trader.user.modules.client_pool import ClientPool
+from binance_trader.user.modules.order_gateway import OrderGateway
+from binance_trader.user.modules.order_journal import OrderJournal
+from binance_trader.user.modules.position_book import PositionBook
+from keys import Keys
+
+
+class BotTask:
+    def __init__(
+        self,
+        name: str,
+        strategy,
+        params: dict,
+        max_restarts: int = 10,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self._name = name
+        self._strategy_cls = strategy
+        self._params = params
+        self._max_restarts = max_restarts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._strategy = None
+        self._state = "pending"
+        self._restarts = 0
+        self._last_error = None
+        self._started_at = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._name} | {self._state} | {self._restarts} restarts ]"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def health(self) -> dict:
+        health = {
+            "name": self._name,
+            "symbol": self._params.get("symbol"),
+            "state": self._state,
+            "restarts": self._restarts,
+            "last_error": self._last_error,
+            "uptime": time.time() - self._started_at if self._started_at else 0.0,
+        }
+        if self._strategy is not None and hasattr(self._strategy, "reaction"):
+            health["reaction_ms"] = self._strategy.reaction
+        if self._strategy is not None and self._strategy.order_book is not None:
+            health["slippage"] = self._strategy.slippage
+        return health
+
+    async def run(self) -> None:
+        backoff = self._backoff
+        while True:
+            self._state = "starting"
+            self._strategy = None
+            try:
+                self._strategy = await self._strategy_cls.create(
+                    **self._params, start_time=dt.datetime.now()
+                )
+                self._state = "running"
+                self._started_at = time.time()
+                await self._strategy.run_strategy()
+                self._state = "finished"
+                return
+            except asyncio.CancelledError:
+                self._state = "stopped"
+                raise
+            except Exception as e:
+                self._last_error = f"{type(e).__name__}: {e}"
+                self._restarts += 1
+                print(f"{dt.datetime.now()} {self} failed: {self._last_error}")
+            finally:
+                if self._strategy is not None:
+                    ClientPool.release(self._strategy.async_client)
+
+            if self._max_restarts is not None and self._restarts > self._max_restarts:
+                self._state = "failed"
+                return
+            if self._started_at and time.time() - self._started_at > self._max_backoff:
+                backoff = self._backoff
+            self._state = "restarting"
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self._max_backoff)
+
+
+class Supervisor:
+    Strategies = {"sma_crossover": SMACrossover}
+    Options = ("name", "strategy", "stream", "depth")
+    Required = ("symbol", "quantity", "order_log_loc", "price_log_loc")
+
+    def __init__(self, config: dict, worker: int = 0, workers: int = 1) -> None:
+        self._config = config
+        self._settings = config.get("supervisor", {})
+        self._worker = worker
+        self._workers = workers
+        self._tasks = []
+        self._multiplex = None
+        self._order_books = None
+
+    def __repr__(self) -> str:
+        states = Counter(task.state for task in self._tasks)
+        return f"{self.__class__.__name__} [ worker {self._worker}/{self._workers} | {len(self._tasks)} bots | {dict(states)} ]"
+
+    @classmethod
+    def from_file(cls, path: str, worker: int = 0, workers: int = 1) -> "Supervisor":
+        with open(path) as file:
+            return cls(json.load(file), worker, workers)
+
+    @staticmethod
+    def shard(symbol: str, workers: int) -> int:
+        return zlib.crc32(symbol.upper().encode()) % workers
+
+    @property
+    def tasks(self) -> list:
+        return self._tasks
+
+    @property
+    def health(self) -> dict:
+        return {
+            "time": dt.datetime.now().isoformat(),
+            "worker": self._worker,
+            "pid": os.getpid(),
+            "states": dict(Counter(task.state for task in self._tasks)),
+            "bots": [task.health for task in self._tasks],
+            "clients": ClientPool.stats(),
+            "gateways": OrderGateway.stats_all(),
+            "latency_ms": Latency.totals(),
+            "write_queue": WriteQueue.active().stats if WriteQueue.active() else None,
+            "archive": CandleArchive.stats_all(),
+            "order_books": self._order_books.stats if self._order_books else None,
+        }
+
+    def bots(self) -> list:
+        defaults = self._config.get("defaults", {})
+        bots = []
+        for i, bot in enumerate(self._config["bots"]):
+            spec = {**defaults, **bot}
+            spec.setdefault("name", f"{spec.get('strategy', 'bot')}-{i}")
+            missing = [key for key in self.Required if spec.get(key) is None]
+            if missing:
+                raise ValueError(f"bot {spec['name']} is missing {', '.join(missing)}")
+            if self.shard(spec["symbol"], self._workers) == self._worker:
+                bots.append(spec)
+        return bots
+
+    def params(self, spec: dict, bar_offset: float) -> dict:
+        params = {k: v for k, v in spec.items() if k not in self.Options}
+        params.setdefault("api_key", Keys.API)
+        params.setdefault("api_secret", Keys.SECRET)
+        params["end_time"] = (
+            dt.datetime.fromisoformat(params["end_time"])
+            if params.get("end_time")
+            else dt.datetime.max
+        )
+        if "sma_long" in params:
+            params.setdefault("limit", params["sma_long"] + 1)
+        params["multiplex"] = self._multiplex if spec.get("stream") else None
+        params["order_books"] = self._order_books if spec.get("depth") else None
+        params["bar_offset"] = bar_offset
+        return params
+
+    async def run(self) -> None:
+        settings = self._settings
+        if self._workers > 1:
+            OrderJournal.configure(name=f"order_journal_{self._worker}")
+        ClientPool.configure(
+            limit=settings.get("connection_limit", 20),
+            endpoints=settings.get("endpoints"),
+            max_concurrent_requests=settings.get("rest_concurrency"),
+        )
+        if settings.get("write_queue") is not None:
+            WriteQueue.start(**settings["write_queue"])
+        bots = self.bots()
+        if settings.get("archive") is not None:
+            for price_log_loc in {spec["price_log_loc"] for spec in bots}:
+                CandleArchive.instance(price_log_loc, **settings["archive"])
+        if any(spec.get("stream") for spec in bots):
+            self._multiplex = MultiplexStream(
+                testnet=self._config.get("defaults", {}).get("testnet", True)
+            )
+        if any(spec.get("depth") for spec in bots):
+            testnet = self._config.get("defaults", {}).get("testnet", True)
+            self._order_books = OrderBookStream(
+                MultiplexStream(testnet=testnet),
+                testnet=testnet,
+                **settings.get("order_books", {}),
+            )
+
+        spread = settings.get("bar_spread", 2.0)
+        self._tasks = [
+            BotTask(
+                name=spec["name"],
+                strategy=self.Strategies[spec.get("strategy", "sma_crossover")],
+                params=self.params(spec, spread * i / max(len(bots), 1)),
+                max_restarts=settings.get("max_restarts", 10),
+                backoff=settings.get("backoff", 1.0),
+                max_backoff=settings.get("max_backoff", 60.0),
+            )
+            for i, spec in enumerate(bots)
+        ]
+        print(f"{dt.datetime.now()} {self} starting")
+
+        if self._settings.get("health_path") is not None:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGUSR1, self.dump_latency
+            )
+        reporter = asyncio.ensure_future(self._report_loop())
+        try:
+            await asyncio.gather(*[task.run() for task in self._tasks])
+        finally:
+            reporter.cancel()
+            self.report()
+            if self._settings.get("health_path") is not None:
+                self.dump_latency()
+            await OrderGateway.stop_all()
+            await BarCloseTrigger.stop_all()
+            await PositionBook.stop_all()
+            if self._multiplex is not None:
+                await self._multiplex.stop()
+            if self._order_books is not None:
+                await self._order_books.stop()
+                await self._order_books.multiplex.stop()
+            await ClientPool.close_all()
+            OrderJournal.close_all()
+            await CandleArchive.stop_all()
+            await asyncio.get_running_loop().run_in_executor(None, WriteQueue.stop)
+
+    def report(self) -> None:
+        health = self.health
+        print(f"{dt.datetime.now()} {self}")
+        for bot in health["bots"]:
+            if bot["state"] != "running":
+                print(
+                    f"    {bot['name']} {bot['state']} restarts={bot['restarts']} {bot['last_error']}"
+                )
+
+        path = self._settings.get("health_path")
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            tmp = f"{path}/health_{self._worker}.json.tmp"
+            with open(tmp, "w") as file:
+                json.dump(health, file, default=str)
+            os.replace(tmp, f"{path}/health_{self._worker}.json")
+
+    def dump_latency(self) -> dict:
+        path = self._settings.get("health_path")
+        if path is None:
+            return Latency.dump()
+        os.makedirs(path, exist_ok=True)
+        print(
+            f"{dt.datetime.now()} {self} dumping latency to {path}/latency_{self._worker}.json"
+        )
+        return Latency.dump(f"{path}/latency_{self._worker}.json")
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._settings.get("health_interval", 60))
+            self.report()
+
+
+def _run_worker(path: str, worker: int, workers: int) -> None:
+    asyncio.run(Supervisor.from_file(path, worker, workers).run())
+
+
+def run_workers(path: str, workers: int = None) -> None:
+    with open(path) as file:
+        settings = json.load(file).get("supervisor", {})
+    workers = workers or settings.get("workers", 1)
+    if workers <= 1:
+        _run_worker(path, 0, 1)
+        return
+
+    max_restarts = settings.get("max_worker_restarts", 5)
+    restarts = Counter()
+    procs = {}
+    for worker in range(workers):
+        procs[worker] = mp.Process(target=_run_worker, args=(path, worker, workers))
+        procs[worker].start()
+
+    try:
+        while procs:
+            time.sleep(1)
+            for worker, proc in list(procs.items()):
+                if proc.is_alive():
+                    continue
+                if proc.exitcode == 0 or restarts[worker] >= max_restarts:
+                    print(
+                        f"{dt.datetime.now()} worker {worker} exited with {proc.exitcode}"
+                    )
+                    del procs[worker]
+                    continue
+                restarts[worker] += 1
+                print(
+                    f"{dt.datetime.now()} worker {worker} died with {proc.exitcode}, restart {restarts[worker]}"
+                )
+                procs[worker] = mp.Process(
+                    target=_run_worker, args=(path, worker, workers)
+                )
+                procs[worker].start()
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+            proc.join()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "config",
+        nargs="?",
+        default=os.path.join(os.path.dirname(__file__), "supervisor.json"),
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    run_workers(args.config, args.workers)
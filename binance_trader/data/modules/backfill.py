@@ -0,0 +1,297 @@
+import asyncio
+import datetime as dt
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+
+import aiohttp
+from binance import AsyncClient
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from binance.helpers import date_to_milliseconds
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.intervals import Interval
+
+
+class WeightBudget:
+    def __init__(self, weight_per_minute: int = 2400, headroom: float = 0.8) -> None:
+        self._capacity = weight_per_minute * headroom
+        self._rate = self._capacity / 60
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._used = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._tokens:.0f}/{self._capacity:.0f} | used {self._used} ]"
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    async def acquire(self, weight: int) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    self._used += weight
+                    return
+                await asyncio.sleep((weight - self._tokens) / self._rate)
+
+    def penalize(self, seconds: float) -> None:
+        self._tokens -= seconds * self._rate
+
+
+class BackfillJob:
+    def __init__(
+        self,
+        pair: str,
+        contract_type: str,
+        interval: str,
+        start: int,
+        end: int,
+    ) -> None:
+        self.pair = pair.upper()
+        self.contract_type = contract_type.upper()
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.done_until = start
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.key} | {self.start} -> {self.end} ]"
+
+    @property
+    def key(self) -> str:
+        return f"{self.pair.lower()}_{self.contract_type.lower()}_{self.interval}"
+
+    def windows(self, start: int, limit: int) -> list:
+        step = Interval.to_ms(self.interval) * limit
+        return [
+            (lo, min(lo + step - 1, self.end))
+            for lo in range(start, self.end + 1, step)
+        ]
+
+
+class BackfillManifest:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._jobs = {}
+        if os.path.isfile(path):
+            with open(path) as file:
+                self._jobs = json.load(file)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def done_until(self, job: BackfillJob) -> int:
+        entry = self._jobs.get(job.key)
+        if entry is None:
+            return job.start
+        return max(job.start, entry["done_until"])
+
+    def mark(self, job: BackfillJob, done_until: int) -> None:
+        entry = self._jobs.setdefault(job.key, {"start": job.start, "done_until": 0})
+        entry["start"] = min(entry["start"], job.start)
+        entry["end"] = job.end
+        entry["done_until"] = max(entry["done_until"], done_until)
+        self._save()
+
+    def _save(self) -> None:
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(self._jobs, file, indent=2)
+        os.replace(tmp, self._path)
+
+
+class BackfillEngine:
+    Retryable = (
+        BinanceAPIException,
+        BinanceRequestException,
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        OSError,
+    )
+
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        store: ColumnarStore,
+        manifest: str = None,
+        limit: int = 1500,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        budget: WeightBudget = None,
+    ) -> None:
+        self._client = async_client
+        self._store = store
+        self._manifest = BackfillManifest(
+            manifest or f"{store.db}/backfill_manifest.json"
+        )
+        self._limit = limit
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_retries = max_retries
+        self._budget = budget or WeightBudget()
+        self._requests = 0
+        self._retries = 0
+        self._rows = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._requests} requests | {self._retries} retries | {self._rows} rows ]"
+
+    @property
+    def manifest(self) -> BackfillManifest:
+        return self._manifest
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": self._requests,
+            "retries": self._retries,
+            "rows_written": self._rows,
+            "weight_used": self._budget.used,
+        }
+
+    @staticmethod
+    def request_weight(limit: int) -> int:
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+
+    async def run(self, jobs: list) -> dict:
+        results = await asyncio.gather(
+            *[self.backfill(job) for job in jobs], return_exceptions=True
+        )
+        return {job.key: res for job, res in zip(jobs, results)}
+
+    async def backfill(self, job: BackfillJob, resume: bool = True) -> int:
+        series = self._store.series(job.pair, job.contract_type, job.interval)
+        start = self._manifest.done_until(job) if resume else job.start
+        job.done_until = start
+        windows = iter(job.windows(start, self._limit))
+        tasks = deque()
+        now = int(time.time() * 1000)
+
+        rows_before = len(series)
+        try:
+            while True:
+                for lo, hi in itertools.islice(
+                    windows, self._max_concurrency - len(tasks)
+                ):
+                    tasks.append((hi, asyncio.ensure_future(self._fetch(job, lo, hi))))
+                if not tasks:
+                    break
+                hi, task = tasks.popleft()
+                rows = await task
+                done_until = hi + 1
+                closed = len(rows)
+                for i, row in enumerate(rows):
+                    if row[6] >= now:
+                        done_until = min(done_until, row[0])
+                        closed = i
+                        break
+                series.merge_klines(rows[:closed])
+                series.flush()
+                job.done_until = done_until
+                if resume:
+                    self._manifest.mark(job, done_until)
+                if closed < len(rows):
+                    break
+        finally:
+            for _, task in tasks:
+                task.cancel()
+
+        written = len(series) - rows_before
+        self._rows += written
+        return written
+
+    async def _fetch(self, job: BackfillJob, start: int, end: int) -> list:
+        weight = self.request_weight(self._limit)
+        for attempt in range(self._max_retries + 1):
+            async with self._semaphore:
+                await self._budget.acquire(weight)
+                self._requests += 1
+                try:
+                    return await self._client.futures_continous_klines(
+                        pair=job.pair,
+                        contractType=job.contract_type,
+                        interval=job.interval,
+                        startTime=start,
+                        endTime=end,
+                        limit=self._limit,
+                    )
+                except self.Retryable as e:
+                    rate_limited = isinstance(e, BinanceAPIException) and (
+                        e.status_code in (418, 429)
+                    )
+                    if attempt == self._max_retries or (
+                        isinstance(e, BinanceAPIException)
+                        and e.status_code < 500
+                        and not rate_limited
+                    ):
+                        raise
+                    self._retries += 1
+                    delay = min(2**attempt, 60) + random.random()
+                    if rate_limited:
+                        self._budget.penalize(delay * 4)
+                    print(
+                        f"{dt.datetime.now()} {job.key} [{start}, {end}] retry in {delay:.1f}s: {e}"
+                    )
+            await asyncio.sleep(delay)
+
+
+async def backfill(
+    db: str,
+    testnet: bool,
+    pairs: list,
+    contract_type: str,
+    intervals: list,
+    start: str,
+    end: str = "now UTC",
+):
+    async_client = await AsyncClient.create(testnet=testnet)
+    engine = BackfillEngine(async_client, ColumnarStore(db))
+    jobs = [
+        BackfillJob(
+            pair,
+            contract_type,
+            interval,
+            date_to_milliseconds(start),
+            date_to_milliseconds(end),
+        )
+        for pair in pairs
+        for interval in intervals
+    ]
+    results = await engine.run(jobs)
+    await async_client.close_connection()
+    print(engine, results)
+    return results
+
+
+if __name__ == "__main__":
+    db = "/home/rishabh/projects/binance-trader/binance_trader/data/db/price"
+
+    asyncio.run(
+        backfill(
+            db=db,
+            testnet=True,
+            pairs=["BTCUSDT", "ETHUSDT"],
+            contract_type="PERPETUAL",
+            intervals=["1m", "5m"],
+            start="1 Jun, 2022",
+            end="1 Sep, 2022",
+        )
+    )
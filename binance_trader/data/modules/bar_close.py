@@ -0,0 +1,172 @@
+import asyncio
+import datetime as dt
+
+from binance import AsyncClient
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.clock import Clock
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.data_processing import ProcessStream
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.data.modules.multiplex_stream import MultiplexStream
+
+
+class BarCloseTrigger:
+    _triggers: dict = {}
+
+    def __init__(
+        self,
+        multiplex: MultiplexStream,
+        async_client: AsyncClient,
+        pair: str,
+        contract_type: str,
+        interval: str,
+        window: CandleWindow = None,
+        timeout: float = 2.0,
+        clock: Clock = None,
+        db: str = None,
+        store: ColumnarStore = None,
+        max_fallbacks: int = 3,
+    ) -> None:
+        self._multiplex = multiplex
+        self._client = async_client
+        self._pair = pair
+        self._contract_type = contract_type
+        self._interval = interval
+        self._window = window
+        self._timeout = timeout
+        self._clock = clock or Clock()
+        self._db = db
+        self._store = store
+        self._max_fallbacks = max_fallbacks
+        self._closed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._last = None
+        self._stream_closes = 0
+        self._rest_closes = 0
+        self._fallbacks = 0
+        self._misses = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._pair} | {self._interval} | ws {self._stream_closes} | rest {self._rest_closes} ]"
+
+    @classmethod
+    async def instance(
+        cls,
+        multiplex: MultiplexStream,
+        async_client: AsyncClient,
+        pair: str,
+        contract_type: str,
+        interval: str,
+        **kwargs,
+    ) -> "BarCloseTrigger":
+        key = (pair.upper(), contract_type.upper(), interval)
+        trigger = cls._triggers.get(key)
+        if trigger is None:
+            trigger = cls._triggers[key] = cls(
+                multiplex, async_client, pair, contract_type, interval, **kwargs
+            )
+            await trigger.start()
+        return trigger
+
+    @classmethod
+    async def stop_all(cls) -> None:
+        triggers = list(cls._triggers.values())
+        cls._triggers.clear()
+        for trigger in triggers:
+            await trigger.stop()
+
+    @property
+    def last_open_time(self):
+        return self._last
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "stream_closes": self._stream_closes,
+            "rest_closes": self._rest_closes,
+            "fallbacks": self._fallbacks,
+            "misses": self._misses,
+            "last_open_time": self._last,
+        }
+
+    async def start(self) -> None:
+        await self._multiplex.add_kline(
+            self._pair, self._contract_type, self._interval, self.on_kline
+        )
+        await self._multiplex.start()
+
+    async def stop(self) -> None:
+        await self._multiplex.remove_kline(
+            self._pair, self._contract_type, self._interval
+        )
+
+    def on_kline(self, data: dict) -> None:
+        k = data["k"]
+        if self._db is not None or self._store is not None:
+            ProcessStream(db=self._db, row=data, store=self._store).write_data()
+        if not k["x"]:
+            return
+        if self._window is not None:
+            self._window.update_stream(k)
+        if self._mark(k["t"]):
+            self._stream_closes += 1
+
+    async def wait(self) -> int:
+        now = int(self._clock.time() * 1000)
+        target = Interval.bar_open(now, self._interval)
+        close = Interval.bar_close(now, self._interval)
+        if self._last is not None and self._last >= target:
+            target = close
+            close = Interval.bar_close(close, self._interval)
+
+        deadline = close / 1000 + self._timeout
+        while self._last is None or self._last < target:
+            remaining = deadline - self._clock.time()
+            if remaining <= 0:
+                await self._fallback(target)
+                break
+
+            closed = asyncio.ensure_future(self._closed.wait())
+            timer = asyncio.ensure_future(self._clock.sleep(remaining))
+            await asyncio.wait({closed, timer}, return_when=asyncio.FIRST_COMPLETED)
+            closed.cancel()
+            timer.cancel()
+        return self._last
+
+    def _mark(self, open_time: int) -> bool:
+        if self._last is not None and open_time <= self._last:
+            return False
+        self._last = open_time
+        self._closed.set()
+        self._closed = asyncio.Event()
+        return True
+
+    async def _fallback(self, target: int) -> None:
+        async with self._lock:
+            if self._last is not None and self._last >= target:
+                return
+            self._fallbacks += 1
+            for attempt in range(self._max_fallbacks):
+                try:
+                    rows = await self._client.futures_continous_klines(
+                        pair=self._pair,
+                        contractType=self._contract_type,
+                        interval=self._interval,
+                        limit=3,
+                    )
+                except Exception as e:
+                    print(f"{dt.datetime.now()} {self} REST fallback failed: {e}")
+                    rows = []
+
+                now = self._clock.time()
+                for row in rows:
+                    if row[6] >= now * 1000:
+                        continue
+                    if self._window is not None:
+                        self._window.update_kline(row, now=now)
+                    if self._mark(row[0]):
+                        self._rest_closes += 1
+                if self._last is not None and self._last >= target:
+                    return
+                await self._clock.sleep(0.5 * (attempt + 1))
+            self._misses += 1
@@ -1,5 +1,5 @@
 from binance import Client
-import pandas as pd
+from binance_trader.data.modules.exchange_info import ExchangeInfoCache
 
 
 class BaseDataStreamURL:
@@ -12,6 +12,7 @@ class BaseDataStreamURL:
     ) -> None:
 
         self._client = Client(testnet=testnet)
+        self._testnet = testnet
 
         self._pair = self._validate_pair(pair)
         self._interval = self._validate_interval(interval)
@@ -41,12 +42,14 @@ class BaseDataStreamURL:
         return f"{self._pair}_{self._contract_type}@continuousKline_{self._interval}"
 
     def _validate_pair(self, pair: str) -> str:
-        valid_pairs = pd.DataFrame(self.binance_client.get_all_tickers())[
-            "symbol"
-        ].to_list()
+        valid_pairs = (
+            ExchangeInfoCache.instance(self._testnet)
+            .load_sync(self.binance_client)
+            .symbols
+        )
         if pair not in valid_pairs:
             raise ValueError(
-                f"{pair} is not a valid ticker. Select from {valid_pairs}."
+                f"{pair} is not a valid ticker. Select from {sorted(valid_pairs)}."
             )
         return pair.lower()
 
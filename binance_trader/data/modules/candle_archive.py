@@ -0,0 +1,514 @@
+import asyncio
+import csv
+import datetime as dt
+import fcntl
+import json
+import os
+import time
+
+import numpy as np
+from binance_trader.data.modules.columnar_store import CandleColumns
+from binance_trader.data.modules.write_queue import WriteQueue
+
+
+class CandleArchive:
+    DayMs = 86_400_000
+    Columns = CandleColumns.All
+    Catalog = "catalog.json"
+    _archives: dict = {}
+
+    def __init__(
+        self, db: str, grace: float = 3600.0, compact_interval: float = 300.0
+    ) -> None:
+        self._db = db
+        self._grace = int(grace * 1000)
+        self._compact_interval = compact_interval
+        self._days = {}
+        self._series = set()
+        self._future = None
+        self._last_pass = None
+
+        self._passes = 0
+        self._compacted = 0
+        self._sealed = 0
+        self._pass_time = 0.0
+        self._catalog = self._read_catalog()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.db} | {len(self._catalog)} partitions | {self._compacted} compacted ]"
+
+    @classmethod
+    def instance(cls, db: str, **kwargs) -> "CandleArchive":
+        archive = cls._archives.get(db)
+        if archive is None:
+            archive = cls._archives[db] = cls(db, **kwargs)
+        return archive
+
+    @classmethod
+    async def stop_all(cls) -> None:
+        for archive in list(cls._archives.values()):
+            await archive.wait()
+        cls._archives.clear()
+
+    @classmethod
+    def stats_all(cls) -> dict:
+        return {db: archive.stats for db, archive in cls._archives.items()}
+
+    @staticmethod
+    def key(symbol: str, contract_type: str, interval: str) -> str:
+        return f"{symbol.lower()}/{contract_type.lower()}/{interval}"
+
+    @staticmethod
+    def row(kline: list) -> tuple:
+        return (
+            kline[0],
+            kline[6],
+            kline[8],
+            kline[1],
+            kline[2],
+            kline[3],
+            kline[4],
+            kline[5],
+            kline[7],
+            kline[9],
+            kline[10],
+        )
+
+    @property
+    def db(self) -> str:
+        return self._db
+
+    @property
+    def catalog(self) -> dict:
+        return self._catalog
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "partitions": len(self._catalog),
+            "compacted": sum(1 for p in self._catalog.values() if p["format"] == "npz"),
+            "bytes": sum(p["bytes"] for p in self._catalog.values()),
+            "passes": self._passes,
+            "sealed": self._sealed,
+            "blocks_written": self._compacted,
+            "avg_pass_ms": self._pass_time / self._passes * 1000
+            if self._passes
+            else 0.0,
+        }
+
+    def day(self, open_time: int) -> str:
+        index = int(open_time) // self.DayMs
+        day = self._days.get(index)
+        if day is None:
+            day = self._days[index] = dt.datetime.fromtimestamp(
+                index * 86_400, tz=dt.timezone.utc
+            ).strftime("%Y-%m-%d")
+        return day
+
+    def file_name(
+        self, symbol: str, contract_type: str, interval: str, open_time: int
+    ) -> str:
+        return f"{self.key(symbol, contract_type, interval)}/{self.day(open_time)}.csv"
+
+    def append(
+        self, symbol: str, contract_type: str, interval: str, row: tuple
+    ) -> bool:
+        key = self.key(symbol, contract_type, interval)
+        self._series.add(key)
+        return WriteQueue.write(
+            self.db, f"{key}/{self.day(row[0])}.csv", row, fieldnames=self.Columns
+        )
+
+    def partitions(
+        self, symbol: str = None, contract_type: str = None, interval: str = None
+    ) -> list:
+        return [
+            entry
+            for entry in self._catalog.values()
+            if (symbol is None or entry["symbol"] == symbol.lower())
+            and (
+                contract_type is None or entry["contract_type"] == contract_type.lower()
+            )
+            and (interval is None or entry["interval"] == interval)
+        ]
+
+    def range(
+        self,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        start: int = None,
+        end: int = None,
+    ) -> dict:
+        key = self.key(symbol, contract_type, interval)
+        path = f"{self.db}/{key}"
+        if not os.path.isdir(path):
+            return self._empty()
+
+        first = None if start is None else self.day(start)
+        last = None if end is None else self.day(end)
+        days = {}
+        for name in os.listdir(path):
+            day = name.split(".", 1)[0]
+            if (first is None or day >= first) and (last is None or day <= last):
+                days.setdefault(day, []).append(name)
+
+        parts = []
+        for day in sorted(days):
+            entry = self._catalog.get(f"{key}/{day}")
+            if entry is not None and entry["format"] == "npz" and len(days[day]) == 1:
+                if (start is not None and entry["end"] < start) or (
+                    end is not None and entry["start"] > end
+                ):
+                    continue
+            parts.append(self._read_day(path, day, days[day]))
+
+        rows = self._merge(parts)
+        open_time = rows["open_time"]
+        lo = 0 if start is None else int(np.searchsorted(open_time, start, "left"))
+        hi = (
+            len(open_time)
+            if end is None
+            else int(np.searchsorted(open_time, end, "right"))
+        )
+        return {name: col[lo:hi] for name, col in rows.items()}
+
+    def compact_if_due(self, now: int = None) -> None:
+        future = self._future
+        if future is not None and future.done():
+            self._future = None
+            if future.exception() is not None:
+                print(
+                    f"{dt.datetime.now()} {self} compaction failed: {future.exception()}"
+                )
+            else:
+                self.seal(future.result())
+        if self._future is not None:
+            return
+        if (
+            self._last_pass is not None
+            and time.monotonic() - self._last_pass < self._compact_interval
+        ):
+            return
+        self._last_pass = time.monotonic()
+        now = int(time.time() * 1000) if now is None else now
+        self._future = asyncio.get_running_loop().run_in_executor(
+            None, self.compact, now
+        )
+
+    async def wait(self) -> None:
+        if self._future is not None:
+            try:
+                self.seal(await self._future)
+            except Exception as e:
+                print(f"{dt.datetime.now()} {self} compaction failed: {e}")
+            self._future = None
+
+    def seal(self, file_names: list) -> None:
+        for file_name in file_names:
+            WriteQueue.seal(self.db, file_name)
+            self._sealed += 1
+
+    def compact(self, now: int = None) -> list:
+        now = int(time.time() * 1000) if now is None else now
+        start = time.perf_counter()
+        os.makedirs(self.db, exist_ok=True)
+        with open(f"{self.db}/catalog.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            catalog = self._read_catalog()
+            partitions = self._scan()
+            due = []
+            for (key, day), files in partitions.items():
+                path = f"{self.db}/{key}"
+                sealed = [name for name in files if name.endswith(".sealed")]
+                if sealed:
+                    catalog[f"{key}/{day}"] = self._compact_day(
+                        path, key, day, files, sealed
+                    )
+                    files = [name for name in files if name not in sealed]
+                    if f"{day}.npz" not in files:
+                        files.append(f"{day}.npz")
+                if f"{day}.csv" in files:
+                    day_end = (self._day_index(day) + 1) * self.DayMs
+                    if key in self._series and day_end + self._grace <= now:
+                        due.append(f"{key}/{day}.csv")
+                    if f"{day}.npz" not in files:
+                        catalog[f"{key}/{day}"] = self._entry(
+                            key, day, "csv", path, files
+                        )
+                        continue
+                entry = catalog.get(f"{key}/{day}")
+                if entry is None or entry["format"] != "npz":
+                    catalog[f"{key}/{day}"] = self._entry(key, day, "npz", path, files)
+                else:
+                    entry["bytes"] = self._size(path, files)
+            for name in set(catalog) - {f"{key}/{day}" for key, day in partitions}:
+                del catalog[name]
+            self._write_catalog(catalog)
+            self._catalog = catalog
+
+        self._passes += 1
+        self._pass_time += time.perf_counter() - start
+        return due
+
+    def _compact_day(
+        self, path: str, key: str, day: str, files: list, sealed: list
+    ) -> dict:
+        names = [f"{day}.npz"] if f"{day}.npz" in files else []
+        rows = self._read_day(path, day, names + sorted(sealed))
+        tmp = f"{path}/{day}.npz.tmp"
+        with open(tmp, "wb") as file:
+            np.savez_compressed(file, **rows)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, f"{path}/{day}.npz")
+        for name in sealed:
+            os.remove(f"{path}/{name}")
+        self._compacted += 1
+        return self._entry(key, day, "npz", path, [f"{day}.npz"])
+
+    def _entry(self, key: str, day: str, format: str, path: str, files: list) -> dict:
+        symbol, contract_type, interval = key.split("/")
+        index = self._day_index(day)
+        entry = {
+            "symbol": symbol,
+            "contract_type": contract_type,
+            "interval": interval,
+            "day": day,
+            "format": format,
+            "start": index * self.DayMs,
+            "end": (index + 1) * self.DayMs - 1,
+            "rows": None,
+            "bytes": self._size(path, files),
+        }
+        if format == "npz":
+            with np.load(f"{path}/{day}.npz") as data:
+                open_time, close_time = data["open_time"], data["close_time"]
+            entry["rows"] = len(open_time)
+            if len(open_time):
+                entry["start"] = int(open_time[0])
+                entry["end"] = int(close_time[-1])
+        return entry
+
+    def _scan(self) -> dict:
+        partitions = {}
+        for symbol in self._dirs(self.db):
+            for contract_type in self._dirs(f"{self.db}/{symbol}"):
+                for interval in self._dirs(f"{self.db}/{symbol}/{contract_type}"):
+                    key = f"{symbol}/{contract_type}/{interval}"
+                    for name in os.listdir(f"{self.db}/{key}"):
+                        if name.endswith(".tmp"):
+                            continue
+                        day = name.split(".", 1)[0]
+                        partitions.setdefault((key, day), []).append(name)
+        return partitions
+
+    def _read_day(self, path: str, day: str, names: list) -> dict:
+        parts = []
+        for name in sorted(
+            names,
+            key=lambda name: (not name.endswith(".npz"), name.endswith(".csv"), name),
+        ):
+            if name.endswith(".npz"):
+                with np.load(f"{path}/{name}") as data:
+                    parts.append({column: data[column] for column in self.Columns})
+            elif name.endswith(".tmp"):
+                continue
+            else:
+                parts.append(self._read_csv(f"{path}/{name}"))
+        return self._merge(parts)
+
+    def _read_csv(self, path: str) -> dict:
+        width = len(self.Columns)
+        rows = []
+        with open(path, newline="") as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                if len(row) != width:
+                    continue
+                try:
+                    rows.append([float(value) for value in row])
+                except ValueError:
+                    continue
+        values = np.array(rows, dtype=np.float64).reshape(-1, width)
+        return {
+            name: values[:, i].astype(
+                np.int64 if name in CandleColumns.Int else np.float64
+            )
+            for i, name in enumerate(self.Columns)
+        }
+
+    def _merge(self, parts: list) -> dict:
+        parts = [part for part in parts if len(part["open_time"])]
+        if not parts:
+            return self._empty()
+        rows = {
+            name: np.concatenate([part[name] for part in parts])
+            for name in self.Columns
+        }
+        open_time = rows["open_time"]
+        _, first = np.unique(open_time[::-1], return_index=True)
+        keep = len(open_time) - 1 - first
+        return {name: col[keep] for name, col in rows.items()}
+
+    def _empty(self) -> dict:
+        return {
+            name: np.empty(
+                0, dtype=np.int64 if name in CandleColumns.Int else np.float64
+            )
+            for name in self.Columns
+        }
+
+    def _read_catalog(self) -> dict:
+        try:
+            with open(f"{self.db}/{self.Catalog}") as file:
+                return json.load(file)["partitions"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write_catalog(self, catalog: dict) -> None:
+        tmp = f"{self.db}/{self.Catalog}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(
+                {"time": time.time(), "partitions": catalog},
+                file,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp, f"{self.db}/{self.Catalog}")
+
+    def _day_index(self, day: str) -> int:
+        return (
+            int(
+                dt.datetime.strptime(day, "%Y-%m-%d")
+                .replace(tzinfo=dt.timezone.utc)
+                .timestamp()
+            )
+            // 86_400
+        )
+
+    @staticmethod
+    def _dirs(path: str) -> list:
+        return [entry.name for entry in os.scandir(path) if entry.is_dir()]
+
+    @staticmethod
+    def _size(path: str, files: list) -> int:
+        return sum(
+            os.path.getsize(f"{path}/{name}")
+            for name in files
+            if os.path.isfile(f"{path}/{name}")
+        )
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import shutil
+    import tempfile
+
+    from binance_trader.data.modules.candle_writer import CandleWriter
+
+    symbols, days, limit = 4, 3, 13
+    start = 1662336000000
+
+    def usage(path: str) -> tuple:
+        files = size = 0
+        for root, _, names in os.walk(path):
+            files += len(names)
+            size += sum(os.path.getsize(f"{root}/{name}") for name in names)
+        return files, size
+
+    def klines(symbol: int, minute: int) -> list:
+        return [
+            [
+                start + i * 60_000,
+                str(20000.0 + symbol + i % 97),
+                str(20010.0 + symbol + i % 97),
+                str(19990.0 + symbol + i % 97),
+                str(20005.0 + symbol + i % 97),
+                "12.345",
+                start + i * 60_000 + 59_999,
+                "246900.0",
+                321,
+                "6.1",
+                "122000.0",
+                "0",
+            ]
+            for i in range(max(minute - limit + 1, 0), minute + 1)
+        ]
+
+    legacy = tempfile.mkdtemp(prefix="legacy_")
+    writer = CandleWriter.instance(legacy)
+    begin = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for minute in range(days * 1440):
+            for s in range(symbols):
+                curr_date = dt.datetime.fromtimestamp(
+                    (start + minute * 60_000) / 1000
+                ).strftime("%Y_%M_%d_%H_%M")
+                for kline in klines(s, minute):
+                    writer.write(
+                        f"{curr_date}_S{s}USDT_PERPETUAL_1m.csv",
+                        dict(
+                            zip(
+                                (
+                                    "sys_time",
+                                    "open_time",
+                                    "open",
+                                    "high",
+                                    "low",
+                                    "close",
+                                    "close_time",
+                                ),
+                                kline[:7],
+                            )
+                        ),
+                    )
+        writer.close()
+    legacy_took = time.perf_counter() - begin
+
+    db = tempfile.mkdtemp(prefix="archive_")
+    archive = CandleArchive.instance(db, grace=0)
+    begin = time.perf_counter()
+    for minute in range(days * 1440):
+        for s in range(symbols):
+            for kline in klines(s, minute):
+                archive.append(f"S{s}USDT", "PERPETUAL", "1m", CandleArchive.row(kline))
+    CandleWriter.instance(db).flush()
+    archive_took = time.perf_counter() - begin
+    active = usage(db)
+
+    now = start + days * CandleArchive.DayMs
+    begin = time.perf_counter()
+    archive.seal(archive.compact(now))
+    archive.compact(now)
+    compact_took = time.perf_counter() - begin
+
+    print(
+        f"legacy:    {usage(legacy)[0]:>6} files {usage(legacy)[1] / 1e6:7.2f} MB  write {legacy_took:.2f}s"
+    )
+    print(
+        f"active:    {active[0]:>6} files {active[1] / 1e6:7.2f} MB  write {archive_took:.2f}s"
+    )
+    print(
+        f"compacted: {usage(db)[0]:>6} files {usage(db)[1] / 1e6:7.2f} MB  compact {compact_took:.2f}s"
+    )
+
+    begin = time.perf_counter()
+    for _ in range(100):
+        rows = archive.range(
+            "S1USDT",
+            "PERPETUAL",
+            "1m",
+            start + 1440 * 60_000 + 600_000,
+            start + 1440 * 60_000 + 4_200_000,
+        )
+    print(
+        f"range(1h): {(time.perf_counter() - begin) / 100 * 1000:.2f} ms, {len(rows['open_time'])} rows"
+    )
+    print(archive, archive.stats)
+
+    CandleWriter.close_all()
+    shutil.rmtree(legacy)
+    shutil.rmtree(db)
@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+
+
+class CandleWindow:
+    _windows: dict = {}
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._open_time = [0] * capacity
+        self._open = [0.0] * capacity
+        self._high = [0.0] * capacity
+        self._low = [0.0] * capacity
+        self._close = [0.0] * capacity
+        self._volume = [0.0] * capacity
+        self._head = 0
+        self._size = 0
+        self._last_open_time = None
+        self._listeners = []
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._size}/{self._capacity} | last {self._last_open_time} ]"
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def instance(
+        cls,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        capacity: int,
+        scope: str = None,
+    ) -> "CandleWindow":
+        key = (symbol.upper(), contract_type.upper(), interval, scope)
+        window = cls._windows.get(key)
+        if window is None:
+            window = cls._windows[key] = cls(capacity)
+        elif window.capacity < capacity:
+            window.resize(capacity)
+        return window
+
+    @classmethod
+    def drop(cls, scope: str) -> None:
+        for key in [key for key in cls._windows if key[3] == scope]:
+            del cls._windows[key]
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def last_open_time(self):
+        return self._last_open_time
+
+    @property
+    def last_close(self):
+        return self._close[self._head - 1] if self._size else None
+
+    def attach(self, listener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def bars(self):
+        return zip(
+            *(
+                self._tail(col, self._size)
+                for col in (
+                    self._open_time,
+                    self._open,
+                    self._high,
+                    self._low,
+                    self._close,
+                    self._volume,
+                )
+            )
+        )
+
+    def closes(self, n: int = None) -> np.ndarray:
+        return np.fromiter(self._tail(self._close, n or self._size), dtype=np.float64)
+
+    def update(
+        self,
+        open_time: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> bool:
+        if self._last_open_time is not None and open_time <= self._last_open_time:
+            return False
+
+        close = float(close)
+        head = self._head
+        self._open_time[head] = open_time
+        self._open[head] = float(open)
+        self._high[head] = float(high)
+        self._low[head] = float(low)
+        self._close[head] = close
+        self._volume[head] = float(volume)
+
+        self._head = (head + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+        self._last_open_time = open_time
+
+        for listener in self._listeners:
+            listener.update(
+                open_time,
+                self._open[head],
+                self._high[head],
+                self._low[head],
+                close,
+                self._volume[head],
+            )
+        return True
+
+    def update_kline(self, row: list, now: float = None) -> bool:
+        now_ms = (time.time() if now is None else now) * 1000
+        if row[6] >= now_ms:
+            return False
+        return self.update(row[0], row[1], row[2], row[3], row[4], row[5])
+
+    def update_stream(self, k: dict) -> bool:
+        if not k["x"]:
+            return False
+        return self.update(k["t"], k["o"], k["h"], k["l"], k["c"], k["v"])
+
+    def resize(self, capacity: int) -> None:
+        columns = [
+            list(self._tail(col, self._size))
+            for col in (
+                self._open_time,
+                self._open,
+                self._high,
+                self._low,
+                self._close,
+                self._volume,
+            )
+        ]
+        listeners = self._listeners
+        self.__init__(capacity)
+        self._listeners = listeners
+        self._size = len(columns[0])
+        for name, values in zip(
+            ("_open_time", "_open", "_high", "_low", "_close", "_volume"), columns
+        ):
+            getattr(self, name)[: self._size] = values
+        self._head = self._size % capacity
+        self._last_open_time = columns[0][-1] if columns[0] else None
+
+    def clear(self) -> None:
+        listeners = self._listeners
+        self.__init__(self._capacity)
+        self._listeners = listeners
+        for listener in listeners:
+            listener.reset()
+
+    def _tail(self, col: list, n: int):
+        n = min(n, self._size)
+        for i in range(self._head - n, self._head):
+            yield col[i]
@@ -0,0 +1,183 @@
+import asyncio
+import atexit
+import csv
+import os.path
+import time
+from collections import OrderedDict
+
+
+class CandleWriter:
+    _writers: dict = {}
+
+    def __init__(
+        self,
+        db: str,
+        max_rows: int = 500,
+        max_delay: float = 1.0,
+        max_open_files: int = 256,
+    ) -> None:
+        self._db = db
+        self._max_rows = max_rows
+        self._max_delay = max_delay
+        self._max_open_files = max_open_files
+
+        self._files = OrderedDict()
+        self._buffers = {}
+        self._fieldnames = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+        self._started = time.monotonic()
+        self._rows_written = 0
+        self._flushes = 0
+        self._flush_time = 0.0
+        self._max_flush_latency = 0.0
+        self._last_flush_latency = 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.db} | {len(self._files)} open | {self._pending} pending ]"
+
+    @classmethod
+    def instance(cls, db: str, **kwargs) -> "CandleWriter":
+        writer = cls._writers.get(db)
+        if writer is None:
+            writer = cls._writers[db] = cls(db, **kwargs)
+        return writer
+
+    @classmethod
+    def close_all(cls) -> None:
+        for writer in list(cls._writers.values()):
+            writer.close()
+        cls._writers.clear()
+
+    @property
+    def db(self) -> str:
+        return self._db
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "rows_written": self._rows_written,
+            "rows_pending": self._pending,
+            "rows_per_sec": self._rows_written / elapsed,
+            "flushes": self._flushes,
+            "avg_flush_ms": (self._flush_time / self._flushes * 1000)
+            if self._flushes
+            else 0.0,
+            "last_flush_ms": self._last_flush_latency * 1000,
+            "max_flush_ms": self._max_flush_latency * 1000,
+            "open_files": len(self._files),
+        }
+
+    def write(self, file_name: str, row, fieldnames: tuple = None) -> None:
+        rows = self._buffers.get(file_name)
+        if rows is None:
+            rows = self._buffers[file_name] = []
+            if file_name not in self._fieldnames:
+                self._fieldnames[file_name] = fieldnames or tuple(row.keys())
+        rows.append(row.values() if isinstance(row, dict) else row)
+        self._pending += 1
+        if self._pending >= self._max_rows or self._flush_due():
+            self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._start_flusher()
+
+    def flush(self) -> None:
+        if not self._pending:
+            self._last_flush = time.monotonic()
+            return
+
+        start = time.perf_counter()
+        for file_name in list(self._buffers):
+            rows = self._buffers[file_name]
+            if rows:
+                file, writer = self._handle(file_name)
+                writer.writerows(rows)
+                file.flush()
+                self._rows_written += len(rows)
+                self._pending -= len(rows)
+            del self._buffers[file_name]
+
+        latency = time.perf_counter() - start
+        self._flushes += 1
+        self._flush_time += latency
+        self._last_flush_latency = latency
+        self._max_flush_latency = max(self._max_flush_latency, latency)
+        self._last_flush = time.monotonic()
+
+    def flush_if_due(self) -> None:
+        if self._flush_due():
+            self.flush()
+
+    def seal(self, file_name: str) -> str:
+        self.flush()
+        handle = self._files.pop(file_name, None)
+        if handle is not None:
+            handle[0].close()
+        path = f"{self.db}/{file_name}"
+        if not os.path.isfile(path):
+            return None
+        sealed = f"{path}.{time.time_ns()}.sealed"
+        os.replace(path, sealed)
+        return sealed
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        self.flush()
+        for file, _ in self._files.values():
+            file.close()
+        self._files.clear()
+
+    async def run(self, interval: float = None) -> None:
+        interval = self._max_delay if interval is None else interval
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.flush_if_due()
+        finally:
+            self.flush()
+
+    def _start_flusher(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flusher = loop.create_task(self.run())
+
+    def _flush_due(self) -> bool:
+        return (
+            self._pending > 0 and time.monotonic() - self._last_flush >= self._max_delay
+        )
+
+    def _handle(self, file_name: str):
+        handle = self._files.get(file_name)
+        if handle is not None:
+            self._files.move_to_end(file_name)
+            return handle
+
+        while len(self._files) >= self._max_open_files:
+            _, (file, _) = self._files.popitem(last=False)
+            file.close()
+
+        path = f"{self.db}/{file_name}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_exists = os.path.isfile(path) and os.path.getsize(path) > 0
+        file = open(path, "a", newline="")
+        writer = csv.writer(file, delimiter=",", lineterminator="\n")
+        if not file_exists:
+            print(f"Creating file @ {path}....")
+            writer.writerow(self._fieldnames[file_name])
+
+        handle = self._files[file_name] = (file, writer)
+        return handle
+
+
+atexit.register(CandleWriter.close_all)
@@ -0,0 +1,239 @@
+import asyncio
+import datetime as dt
+import json
+import os
+import time
+
+import numpy as np
+from binance_trader.data.modules.backfill import BackfillEngine, BackfillJob
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.columnar_store import ColumnarSeries, ColumnarStore
+from binance_trader.data.modules.intervals import Interval
+
+
+class StreamWatermark:
+    def __init__(self, series: ColumnarSeries, interval: str) -> None:
+        self._series = series
+        self._step = Interval.to_ms(interval)
+        self._path = f"{series.path}/empty_ranges.json"
+        self._empty = set()
+        if os.path.isfile(self._path):
+            with open(self._path) as file:
+                self._empty = {tuple(r) for r in json.load(file)}
+        self.refresh()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ last {self._last} | {len(self._gaps)} gaps | {len(self._empty)} empty ]"
+
+    @property
+    def last(self):
+        return self._last
+
+    @property
+    def gaps(self) -> list:
+        return list(self._gaps)
+
+    @property
+    def empty(self) -> list:
+        return sorted(self._empty)
+
+    def refresh(self) -> None:
+        self._last = self._series.last_open_time
+        self._gaps = self._scan()
+
+    def missing(self, now: int = None) -> list:
+        now = int(time.time() * 1000) if now is None else now
+        ranges = list(self._gaps)
+        if self._last is not None and self._last + self._step < now:
+            ranges.append((self._last + self._step, now))
+        return ranges
+
+    def observe(self, open_time: int):
+        if self._last is not None and open_time <= self._last:
+            return None
+
+        gap = None
+        if self._last is not None and open_time > self._last + self._step:
+            gap = (self._last + self._step, open_time - self._step)
+            self._gaps.append(gap)
+        self._last = open_time
+        return gap
+
+    def verify(self, ranges: list) -> list:
+        empty = [
+            gap
+            for gap in self._gaps
+            if any(start <= gap[0] and gap[1] <= end for start, end in ranges)
+        ]
+        if empty:
+            self._empty.update(empty)
+            self._gaps = [gap for gap in self._gaps if gap not in self._empty]
+            tmp = f"{self._path}.tmp"
+            with open(tmp, "w") as file:
+                json.dump(sorted(self._empty), file)
+            os.replace(tmp, self._path)
+        return empty
+
+    def _scan(self) -> list:
+        open_time = self._series.column("open_time")
+        if len(open_time) < 2:
+            return []
+        holes = np.nonzero(np.diff(open_time) > self._step)[0]
+        gaps = (
+            (int(open_time[i]) + self._step, int(open_time[i + 1]) - self._step)
+            for i in holes
+        )
+        return [gap for gap in gaps if gap not in self._empty]
+
+
+class CatchUp:
+    def __init__(
+        self,
+        engine: BackfillEngine,
+        store: ColumnarStore,
+        pair: str,
+        contract_type: str,
+        interval: str,
+        warmup: int = 0,
+    ) -> None:
+        self._engine = engine
+        self._pair = pair
+        self._contract_type = contract_type
+        self._interval = interval
+        self._step = Interval.to_ms(interval)
+        self._warmup = warmup
+        self._series = store.series(pair, contract_type, interval)
+        self._watermark = StreamWatermark(self._series, interval)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._series.path} | {self._watermark} ]"
+
+    @property
+    def series(self) -> ColumnarSeries:
+        return self._series
+
+    @property
+    def watermark(self) -> StreamWatermark:
+        return self._watermark
+
+    async def run(self, now: int = None) -> list:
+        now = int(time.time() * 1000) if now is None else now
+        ranges = self._watermark.missing(now)
+        if self._watermark.last is None and self._warmup:
+            ranges = [(now - (self._warmup + 1) * self._step, now)]
+        await self.fill(ranges)
+        return ranges
+
+    async def fill(self, ranges: list) -> int:
+        if not ranges:
+            return 0
+        jobs = [
+            BackfillJob(self._pair, self._contract_type, self._interval, start, end)
+            for start, end in ranges
+        ]
+        written = await asyncio.gather(
+            *[self._engine.backfill(job, resume=False) for job in jobs]
+        )
+        self._watermark.refresh()
+        self._watermark.verify(
+            [
+                (job.start, job.done_until - 1)
+                for job in jobs
+                if job.done_until > job.start
+            ]
+        )
+        return sum(written)
+
+    def feed(self, window: CandleWindow, ranges: list = ()) -> int:
+        last = window.last_open_time
+        if last is not None and any(start <= last for start, _ in ranges):
+            window.clear()
+            last = None
+
+        if last is None:
+            lo = max(len(self._series) - window.capacity, 0)
+        else:
+            lo = self._series.index_of(last + 1)
+        rows = self._series.range()
+        fed = 0
+        for i in range(lo, len(self._series)):
+            fed += window.update(
+                int(rows["open_time"][i]),
+                rows["open"][i],
+                rows["high"][i],
+                rows["low"][i],
+                rows["close"][i],
+                rows["volume"][i],
+            )
+        return fed
+
+
+class LiveHandoff:
+    def __init__(self, catch_up: CatchUp, window: CandleWindow = None) -> None:
+        self._catch_up = catch_up
+        self._window = window
+        self._buffer = []
+        self._live = False
+        self._filling = 0
+        self._duplicates = 0
+        self._gaps = 0
+
+    def __repr__(self) -> str:
+        state = "live" if self._live else f"buffering {len(self._buffer)}"
+        return f"{self.__class__.__name__} [ {state} | {self._duplicates} dup | {self._gaps} gaps ]"
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "live": self._live,
+            "buffered": len(self._buffer),
+            "filling": self._filling,
+            "duplicates": self._duplicates,
+            "gaps": self._gaps,
+        }
+
+    async def start(self) -> None:
+        ranges = await self._catch_up.run()
+        if self._window is not None:
+            self._catch_up.feed(self._window, ranges)
+        buffered, self._buffer = self._buffer, []
+        for k in buffered:
+            await self._apply(k)
+        self._live = True
+
+    async def __call__(self, data: dict) -> None:
+        k = data["k"]
+        if not k["x"]:
+            return
+        if not self._live:
+            self._buffer.append(k)
+            return
+        await self._apply(k)
+
+    async def _apply(self, k: dict) -> None:
+        watermark = self._catch_up.watermark
+        if watermark.last is not None and k["t"] <= watermark.last:
+            self._duplicates += 1
+            return
+
+        gap = watermark.observe(k["t"])
+        self._catch_up.series.append_stream(k)
+        if gap is None:
+            if self._window is not None and not self._filling:
+                self._window.update_stream(k)
+            return
+
+        self._gaps += 1
+        self._filling += 1
+        print(f"{dt.datetime.now()} {self._catch_up} gap {gap}, filling over REST")
+        asyncio.ensure_future(self._fill(gap))
+
+    async def _fill(self, gap: tuple) -> None:
+        try:
+            await self._catch_up.fill([gap])
+        except Exception as e:
+            print(f"{dt.datetime.now()} {self._catch_up} gap {gap} fill failed: {e}")
+        finally:
+            self._filling -= 1
+        if self._window is not None and not self._filling:
+            self._catch_up.feed(self._window, [gap])
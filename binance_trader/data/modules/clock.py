@@ -0,0 +1,106 @@
+import asyncio
+import datetime as dt
+import heapq
+import itertools
+import time
+
+
+class Clock:
+    simulated = False
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.now()} ]"
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> dt.datetime:
+        return dt.datetime.now()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    simulated = True
+
+    def __init__(self, start: float, idle_yields: int = 50) -> None:
+        self._now = start
+        self._idle_yields = idle_yields
+        self._sleepers = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._advances = 0
+
+    @property
+    def advances(self) -> int:
+        return self._advances
+
+    def time(self) -> float:
+        return self._now
+
+    def now(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(self._now)
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._sleepers, (self._now + max(seconds, 0), next(self._seq), future)
+        )
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+        await future
+
+    async def run(self, until: float = None) -> None:
+        while True:
+            for _ in range(self._idle_yields):
+                await asyncio.sleep(0)
+            if not self._sleepers:
+                self._wakeup = asyncio.get_running_loop().create_future()
+                await self._wakeup
+                continue
+
+            deadline, _, future = heapq.heappop(self._sleepers)
+            if until is not None and deadline > until:
+                heapq.heappush(self._sleepers, (deadline, next(self._seq), future))
+                return
+            self._now = max(self._now, deadline)
+            self._advances += 1
+            if not future.done():
+                future.set_result(None)
+
+
+class AcceleratedClock(Clock):
+    simulated = True
+
+    def __init__(self, speed: float, start: float = None, origin: float = None) -> None:
+        self._speed = speed
+        self._origin = time.time() if origin is None else origin
+        self._start = self._origin if start is None else start
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ x{self._speed:g} | {self.now()} ]"
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    @property
+    def start(self) -> float:
+        return self._start
+
+    @property
+    def origin(self) -> float:
+        return self._origin
+
+    def time(self) -> float:
+        return self._start + (time.time() - self._origin) * self._speed
+
+    def now(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(self.time())
+
+    def real(self, seconds: float) -> float:
+        return seconds / self._speed
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(seconds, 0) / self._speed)
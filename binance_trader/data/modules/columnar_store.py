@@ -0,0 +1,249 @@
+import os
+
+import numpy as np
+
+
+class CandleColumns:
+    Int = ("open_time", "close_time", "num_trades")
+    Float = (
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "quote_volume",
+        "taker_buy_base_volume",
+        "taker_buy_quote_volume",
+    )
+    All = Int + Float
+
+
+class ColumnarSeries:
+    def __init__(self, path: str, capacity: int = 4096) -> None:
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+
+        self._count = np.memmap(
+            self._file("rows"),
+            dtype=np.int64,
+            mode="r+" if os.path.isfile(self._file("rows")) else "w+",
+            shape=(1,),
+        )
+        self._capacity = max(capacity, int(self._count[0]))
+        if os.path.isfile(self._file("open_time")):
+            self._capacity = max(
+                self._capacity, os.path.getsize(self._file("open_time")) // 8
+            )
+        self._cols = {}
+        self._map(self._capacity)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.path} | {len(self)} rows ]"
+
+    def __len__(self) -> int:
+        return int(self._count[0])
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def last_open_time(self):
+        n = len(self)
+        return int(self._cols["open_time"][n - 1]) if n else None
+
+    def column(self, name: str) -> np.ndarray:
+        return self._cols[name][: len(self)]
+
+    def last(self, n: int, name: str = "close") -> np.ndarray:
+        rows = len(self)
+        return self._cols[name][max(rows - n, 0) : rows]
+
+    def index_of(self, open_time: int) -> int:
+        return int(np.searchsorted(self.column("open_time"), open_time, side="left"))
+
+    def range(self, start: int = None, end: int = None) -> dict:
+        open_time = self.column("open_time")
+        lo = 0 if start is None else int(np.searchsorted(open_time, start, "left"))
+        hi = len(self) if end is None else int(np.searchsorted(open_time, end, "right"))
+        return {name: self._cols[name][lo:hi] for name in CandleColumns.All}
+
+    def append(self, values: dict, insert: bool = False) -> bool:
+        open_time = int(values["open_time"])
+        n = len(self)
+        idx = n
+        if n and open_time <= self._cols["open_time"][n - 1]:
+            idx = self.index_of(open_time)
+            if self._cols["open_time"][idx] == open_time:
+                self._set_row(idx, values)
+                return True
+            if not insert:
+                return False
+
+        if n >= self._capacity:
+            self._map(self._capacity * 2)
+        if idx < n:
+            for col in self._cols.values():
+                col[idx + 1 : n + 1] = col[idx:n]
+        self._set_row(idx, values)
+        self._count[0] = n + 1
+        return True
+
+    def merge(self, values: dict) -> int:
+        open_time = np.asarray(values["open_time"], dtype=np.int64)
+        if not len(open_time):
+            return 0
+        n = len(self)
+        lo = self.index_of(int(open_time.min())) if n else 0
+        columns = {
+            name: np.concatenate(
+                (
+                    self._cols[name][lo:n],
+                    np.asarray(values.get(name, np.zeros(len(open_time)))),
+                )
+            )
+            for name in CandleColumns.All
+        }
+        merged = columns["open_time"]
+        order = np.argsort(merged, kind="stable")
+        merged = merged[order]
+        keep = np.r_[merged[1:] != merged[:-1], True]
+        rows = order[keep]
+
+        total = lo + len(rows)
+        capacity = self._capacity
+        while total > capacity:
+            capacity *= 2
+        if capacity != self._capacity:
+            self._map(capacity)
+        for name, col in columns.items():
+            self._cols[name][lo:total] = col[rows]
+        self._count[0] = total
+        return total - n
+
+    def merge_klines(self, rows: list) -> int:
+        if not rows:
+            return 0
+        cols = list(zip(*rows))
+        return self.merge(
+            {
+                "open_time": np.array(cols[0], dtype=np.int64),
+                "open": np.array(cols[1], dtype=np.float64),
+                "high": np.array(cols[2], dtype=np.float64),
+                "low": np.array(cols[3], dtype=np.float64),
+                "close": np.array(cols[4], dtype=np.float64),
+                "volume": np.array(cols[5], dtype=np.float64),
+                "close_time": np.array(cols[6], dtype=np.int64),
+                "quote_volume": np.array(cols[7], dtype=np.float64),
+                "num_trades": np.array(cols[8], dtype=np.int64),
+                "taker_buy_base_volume": np.array(cols[9], dtype=np.float64),
+                "taker_buy_quote_volume": np.array(cols[10], dtype=np.float64),
+            }
+        )
+
+    def append_kline(self, row: list, insert: bool = False) -> bool:
+        return self.append(
+            {
+                "open_time": row[0],
+                "open": row[1],
+                "high": row[2],
+                "low": row[3],
+                "close": row[4],
+                "volume": row[5],
+                "close_time": row[6],
+                "quote_volume": row[7],
+                "num_trades": row[8],
+                "taker_buy_base_volume": row[9],
+                "taker_buy_quote_volume": row[10],
+            },
+            insert=insert,
+        )
+
+    def append_stream(self, k: dict) -> bool:
+        return self.append(
+            {
+                "open_time": k["t"],
+                "close_time": k["T"],
+                "open": k["o"],
+                "high": k["h"],
+                "low": k["l"],
+                "close": k["c"],
+                "volume": k["v"],
+                "num_trades": k["n"],
+                "quote_volume": k["q"],
+                "taker_buy_base_volume": k["V"],
+                "taker_buy_quote_volume": k["Q"],
+            }
+        )
+
+    def flush(self) -> None:
+        for col in self._cols.values():
+            col.flush()
+        self._count.flush()
+
+    def _set_row(self, idx: int, values: dict) -> None:
+        for name, col in self._cols.items():
+            col[idx] = values.get(name, 0)
+
+    def _map(self, capacity: int) -> None:
+        for col in self._cols.values():
+            col.flush()
+        for name in CandleColumns.All:
+            dtype = np.int64 if name in CandleColumns.Int else np.float64
+            file = self._file(name)
+            size = capacity * np.dtype(dtype).itemsize
+            with open(file, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            self._cols[name] = np.memmap(
+                file, dtype=dtype, mode="r+", shape=(capacity,)
+            )
+        self._capacity = capacity
+
+    def _file(self, name: str) -> str:
+        return f"{self._path}/{name}.bin"
+
+
+class ColumnarStore:
+    def __init__(self, db: str, capacity: int = 4096) -> None:
+        self._db = db
+        self._capacity = capacity
+        self._series = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.db} | {len(self._series)} series ]"
+
+    @property
+    def db(self) -> str:
+        return self._db
+
+    def series(self, symbol: str, contract_type: str, interval: str) -> ColumnarSeries:
+        key = f"{symbol.lower()}_{contract_type.lower()}_{interval}"
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ColumnarSeries(
+                f"{self.db}/{key}", capacity=self._capacity
+            )
+        return series
+
+    def flush(self) -> None:
+        for series in self._series.values():
+            series.flush()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    store = ColumnarStore(tempfile.mkdtemp())
+    series = store.series("BTCUSDT", "PERPETUAL", "1m")
+    start = 1662321540000
+    for i in range(500_000):
+        t = start + i * 60_000
+        series.append_kline([t, 1.0, 2.0, 0.5, 1.0 + i, 10, t + 59_999, 0, 1, 0, 0, 0])
+
+    begin = time.perf_counter()
+    for _ in range(10_000):
+        closes = series.last(52)
+    took = (time.perf_counter() - begin) / 10_000
+    print(series, f"last(52) in {took * 1e6:.2f} us", closes[-1])
@@ -1,13 +1,135 @@
-import datetime as dt
-from typing import Any
 import csv
+import datetime as dt
 import os.path
+import time
+from operator import itemgetter
+
+import numpy as np
+from binance_trader.data.modules.candle_archive import CandleArchive
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.write_queue import WriteQueue
+
+
+class KlineSchema:
+    Fields = (
+        "sys_time",
+        "event_time",
+        "symbol",
+        "contract_type",
+        "k_start_time",
+        "k_close_time",
+        "interval",
+        "open",
+        "high",
+        "low",
+        "close",
+        "base_asset_vol",
+        "num_trades",
+        "quote_asset_vol",
+        "taker_buy_base_asset_vol",
+        "taker_buy_quote_asset_vol",
+        "is_closed",
+    )
+    Dtypes = (
+        np.int64,
+        np.int64,
+        object,
+        object,
+        np.int64,
+        np.int64,
+        object,
+        np.float64,
+        np.float64,
+        np.float64,
+        np.float64,
+        np.float64,
+        np.int64,
+        np.float64,
+        np.float64,
+        np.float64,
+        np.bool_,
+    )
+    TimeFields = ("sys_time", "event_time", "k_start_time", "k_close_time")
+
+    _kline = itemgetter("t", "T", "i", "o", "h", "l", "c", "v", "n", "q", "V", "Q", "x")
+    _event = itemgetter("E", "ps", "ct")
+
+    @classmethod
+    def row(cls, msg: dict, sys_time: int = None) -> tuple:
+        if sys_time is None:
+            sys_time = time.time_ns() // 1_000_000
+        return (sys_time,) + cls._event(msg) + cls._kline(msg["k"])
+
+    @classmethod
+    def decode(cls, messages: list, sys_time: int = None) -> dict:
+        if sys_time is None:
+            sys_time = time.time_ns() // 1_000_000
+        event, kline = cls._event, cls._kline
+        rows = [(sys_time,) + event(msg) + kline(msg["k"]) for msg in messages]
+        if not rows:
+            return {
+                name: np.empty(0, dtype=dtype)
+                for name, dtype in zip(cls.Fields, cls.Dtypes)
+            }
+        return {
+            name: np.array(col, dtype=dtype)
+            for name, dtype, col in zip(cls.Fields, cls.Dtypes, zip(*rows))
+        }
+
+    @classmethod
+    def readable(cls, row: dict) -> dict:
+        row = dict(row)
+        row["sys_time"] = dt.datetime.fromtimestamp(int(row["sys_time"]) / 1000.0)
+        for name in ("k_start_time", "k_close_time"):
+            row[name] = dt.datetime.strftime(
+                dt.datetime.fromtimestamp(int(row[name]) / 1000.0),
+                "%Y-%m-%d %H:%M:%S",
+            )
+        return row
+
+    @classmethod
+    def is_readable(cls, path: str) -> bool:
+        try:
+            with open(path, newline="") as file:
+                reader = csv.reader(file)
+                next(reader, None)
+                row = next(reader, None)
+        except FileNotFoundError:
+            return False
+        return bool(row) and not row[0].isdigit()
+
+    @classmethod
+    def rotate(cls, path: str) -> str:
+        if not cls.is_readable(path):
+            return None
+        legacy = f"{path}.{time.time_ns()}.legacy"
+        os.replace(path, legacy)
+        print(f"{dt.datetime.now()} {path} uses readable times, moved to {legacy}")
+        return legacy
+
+    @classmethod
+    def export(cls, src: str, dst: str) -> int:
+        rows = 0
+        with open(src, newline="") as fin, open(dst, "w", newline="") as fout:
+            reader = csv.DictReader(fin)
+            writer = csv.DictWriter(
+                fout, fieldnames=reader.fieldnames, lineterminator="\n"
+            )
+            writer.writeheader()
+            for row in reader:
+                writer.writerow(cls.readable(row))
+                rows += 1
+        return rows
 
 
 class ProcessStream:
-    def __init__(self, db: str, row: str) -> None:
+    _checked: set = set()
+
+    def __init__(self, db: str, row: str, store: ColumnarStore = None) -> None:
         self._db = db
         self._row = row
+        self._store = store
 
     def get_conn_url(self) -> str:
         return self._conn_url
@@ -19,152 +141,155 @@ class ProcessStream:
         return self._write_data()
 
     def _write_data(self):
-        pair = self._row["ps"].lower()
+        symbol = self._row["ps"]
+        pair = symbol.lower()
         contract = self._row["ct"].lower()
         interval = self._row["k"]["i"]
+        if self._store is not None:
+            with Latency.span(symbol, "storage"):
+                return self._store_writer(pair, contract, interval)
+
         stream = f"{pair}_{contract}_{interval}"
-        row, is_closed = self._process_data_dict()
+        with Latency.span(symbol, "parse"):
+            row, is_closed = self._process_data_dict()
 
         file_name = f"{stream}.csv"
-        return self._file_writer(row=row, file_name=file_name)
+        with Latency.span(symbol, "storage"):
+            return self._file_writer(row=row, file_name=file_name)
 
     def _file_writer(self, row, file_name):
         try:
-            file_exists = os.path.isfile(f"{self._db}/{file_name}")
-            with open(f"{self._db}/{file_name}", "a") as file:
-                writer = csv.DictWriter(
-                    file,
-                    delimiter=",",
-                    lineterminator="\n",
-                    fieldnames=list(row.keys()),
-                )
-
-                if not file_exists:
-                    print(f"Creating file @ {self._db}/{file_name}....")
-                    writer.writeheader()
-
-                print(f"{dt.datetime.now()} Writing to File: {file_name}")
-                writer.writerow(row)
+            key = (self._db, file_name)
+            if key not in ProcessStream._checked:
+                KlineSchema.rotate(f"{self._db}/{file_name}")
+                ProcessStream._checked.add(key)
+            WriteQueue.write(self._db, file_name, row, fieldnames=KlineSchema.Fields)
         except Exception as e:
             print(e)
 
-    def _process_data_dict(self) -> tuple[dict[Any, Any], bool]:
-        headers = [
-            "sys_time",
-            "event_time",
-            "symbol",
-            "contract_type",
-            "k_start_time",
-            "k_close_time",
-            "interval",
-            "open",
-            "high",
-            "low",
-            "close",
-            "base_asset_vol",
-            "num_trades",
-            "quote_asset_vol",
-            "taker_buy_base_asset_vol",
-            "taker_buy_quote_asset_vol",
-            "is_closed",
-        ]
-
-        row = [
-            dt.datetime.now(),
-            self._row["E"],
-            self._row["ps"],
-            self._row["ct"],
-            dt.datetime.strftime(
-                dt.datetime.fromtimestamp(self._row["k"]["t"] / 1000.0),
-                "%Y-%m-%d %H:%M:%S",
-            ),
-            dt.datetime.strftime(
-                dt.datetime.fromtimestamp(self._row["k"]["T"] / 1000.0),
-                "%Y-%m-%d %H:%M:%S",
-            ),
-            self._row["k"]["i"],
-            self._row["k"]["o"],
-            self._row["k"]["h"],
-            self._row["k"]["l"],
-            self._row["k"]["c"],
-            self._row["k"]["v"],
-            self._row["k"]["n"],
-            self._row["k"]["q"],
-            self._row["k"]["V"],
-            self._row["k"]["Q"],
-            self._row["k"]["x"],
-        ]
-        is_closed = self._row["k"]["x"]
+    def _store_writer(self, pair, contract, interval):
+        try:
+            self._store.series(pair, contract, interval).append_stream(self._row["k"])
+        except Exception as e:
+            print(e)
 
-        return (
-            dict(zip(headers, row)),
-            is_closed,
-        )
+    def _process_data_dict(self) -> tuple[tuple, bool]:
+        row = KlineSchema.row(self._row)
+        return (row, row[-1])
 
 
 class ProcessCandle:
     def __init__(
-        self, db: str, row: list, symbol: str, contract_type: str, interval: str
+        self,
+        db: str,
+        row: list,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        store: ColumnarStore = None,
     ) -> None:
         self._db = db
         self._row = row
-        self.file_name = f"{symbol}_{contract_type}_{interval}.csv"
+        self._store = store
+        self._symbol = symbol
+        self._contract_type = contract_type
+        self._interval = interval
 
     @property
     def write_data(self):
+        if self._store is not None:
+            return self._store_writer()
         row = self._process_candle()
         return self._file_writer(row=row)
 
+    def _store_writer(self):
+        try:
+            self._store.series(
+                self._symbol, self._contract_type, self._interval
+            ).append_kline(self._row)
+        except Exception as e:
+            print(e)
+
     def _file_writer(self, row):
         try:
-            curr_date = dt.datetime.strftime(dt.datetime.now(), "%Y_%M_%d_%H_%M")
-            file_exists = os.path.isfile(f"{self._db}/{curr_date}_{self.file_name}")
-            with open(f"{self._db}/{curr_date}_{self.file_name}", "a") as file:
-                writer = csv.DictWriter(
-                    file,
-                    delimiter=",",
-                    lineterminator="\n",
-                    fieldnames=list(row.keys()),
-                )
-
-                if not file_exists:
-                    print(
-                        f"Creating file @ {self._db}/{curr_date}_{self.file_name}...."
-                    )
-                    writer.writeheader()
-
-                print(
-                    f"{dt.datetime.now()} Writing to File: {curr_date}_{self.file_name}"
-                )
-                writer.writerow(row)
+            CandleArchive.instance(self._db).append(
+                self._symbol, self._contract_type, self._interval, row
+            )
         except Exception as e:
             print(e)
 
     def _process_candle(self):
-        headers = [
-            "sys_time",
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "close_time",
-        ]
+        return CandleArchive.row(self._row)
+
 
-        row = [
+if __name__ == "__main__":
+    msg = {
+        "e": "continuous_kline",
+        "E": 1662321543061,
+        "ps": "BTCUSDT",
+        "ct": "PERPETUAL",
+        "k": {
+            "t": 1662321540000,
+            "T": 1662321599999,
+            "i": "1m",
+            "f": 1,
+            "L": 2,
+            "o": "20150.00",
+            "h": "20241.40",
+            "l": "19950.20",
+            "c": "20241.40",
+            "v": "1000.1",
+            "n": 123,
+            "x": False,
+            "q": "123456.7",
+            "V": "400.1",
+            "Q": "3456.8",
+            "B": "0",
+        },
+    }
+    n = 200_000
+
+    def process_data_dict(row: dict) -> tuple:
+        k = row["k"]
+        values = [
             dt.datetime.now(),
+            row["E"],
+            row["ps"],
+            row["ct"],
             dt.datetime.strftime(
-                dt.datetime.fromtimestamp(self._row[0] / 1000.0),
-                "%Y-%m-%d %H:%M:%S",
+                dt.datetime.fromtimestamp(k["t"] / 1000.0), "%Y-%m-%d %H:%M:%S"
             ),
-            self._row[1],
-            self._row[2],
-            self._row[3],
-            self._row[4],
             dt.datetime.strftime(
-                dt.datetime.fromtimestamp(self._row[6] / 1000.0),
-                "%Y-%m-%d %H:%M:%S",
+                dt.datetime.fromtimestamp(k["T"] / 1000.0), "%Y-%m-%d %H:%M:%S"
             ),
+            k["i"],
+            k["o"],
+            k["h"],
+            k["l"],
+            k["c"],
+            k["v"],
+            k["n"],
+            k["q"],
+            k["V"],
+            k["Q"],
+            k["x"],
         ]
+        return dict(zip(list(KlineSchema.Fields), values)), k["x"]
+
+    start = time.perf_counter()
+    for _ in range(n):
+        process_data_dict(msg)
+    took = time.perf_counter() - start
+    print(f"old:    {n / took:,.0f} msg/s")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        KlineSchema.row(msg)
+    took = time.perf_counter() - start
+    print(f"row:    {n / took:,.0f} msg/s")
 
-        return dict(zip(headers, row))
+    batch = [msg] * n
+    start = time.perf_counter()
+    KlineSchema.decode(batch)
+    took = time.perf_counter() - start
+    print(f"decode: {n / took:,.0f} msg/s")
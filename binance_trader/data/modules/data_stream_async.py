@@ -2,7 +2,16 @@ import asyncio
 from binance import AsyncClient
 from binance.enums import *
 import datetime as dt
+from binance_trader.data.modules.backfill import BackfillEngine
+from binance_trader.data.modules.candle_archive import CandleArchive
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.catch_up import CatchUp
+from binance_trader.data.modules.clock import Clock
+from binance_trader.data.modules.columnar_store import ColumnarStore
 from binance_trader.data.modules.data_processing import ProcessCandle
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.write_queue import WriteQueue
+from binance_trader.user.modules.client_pool import ClientPool
 
 
 class ContractType:
@@ -23,6 +32,10 @@ class DataStreamAsync:
         limit: int,
         start: str,
         end: str,
+        store: ColumnarStore = None,
+        window: CandleWindow = None,
+        async_client: AsyncClient = None,
+        clock: Clock = None,
     ):
         self = DataStreamAsync()
         self._db = db
@@ -32,13 +45,29 @@ class DataStreamAsync:
         self._limit = limit
         self._start = start
         self._end = end
-        self._async_client = await AsyncClient.create(testnet=testnet)
+        self._store = store
+        self._window = window
+        self._catch_up = None
+        self._clock = clock or Clock()
+        self._async_client = async_client or await ClientPool.get(testnet=testnet)
         return self
 
     @property
     def db(self):
         return self._db
 
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def window(self):
+        return self._window
+
+    @property
+    def clock(self):
+        return self._clock
+
     @property
     def async_client(self):
         return self._async_client
@@ -70,26 +99,54 @@ class DataStreamAsync:
         return self._end
 
     async def stream_contract(self, time_to_sleep):
-        await asyncio.sleep(time_to_sleep)
-        data = await self.async_client.futures_continous_klines(
-            pair=self.pair,
-            contractType=self.contract_type,
-            interval=self.interval,
-            limit=self.limit,
-            startTime=self.start,
-            endTime=self.end,
-        )
+        await self.clock.sleep(time_to_sleep)
+        if self.store is not None:
+            return await self._catch_up_contract()
+
+        with Latency.span(self.pair, "fetch"):
+            data = await self.async_client.futures_continous_klines(
+                pair=self.pair,
+                contractType=self.contract_type,
+                interval=self.interval,
+                limit=self.limit,
+                startTime=self.start,
+                endTime=self.end,
+            )
 
         for row in data:
+            if self.window is not None:
+                self.window.update_kline(row, now=self.clock.time())
             ProcessCandle(
                 db=self.db,
                 row=row,
                 symbol=self.pair,
                 contract_type=self.contract_type,
                 interval=self.interval,
+                store=self.store,
             ).write_data
+        if self.store is None:
+            WriteQueue.flush_if_due(self.db)
+            CandleArchive.instance(self.db).compact_if_due(
+                int(self.clock.time() * 1000)
+            )
         return data
 
+    async def _catch_up_contract(self):
+        if self._catch_up is None:
+            self._catch_up = CatchUp(
+                engine=BackfillEngine(self.async_client, self.store, limit=self.limit),
+                store=self.store,
+                pair=self.pair,
+                contract_type=self.contract_type,
+                interval=self.interval,
+                warmup=self.limit,
+            )
+
+        ranges = await self._catch_up.run(int(self.clock.time() * 1000))
+        if self.window is not None:
+            self._catch_up.feed(self.window, ranges)
+        return ranges
+
     async def stream_live(self):
         ...
 
@@ -116,13 +173,16 @@ async def stream_candles(
     )
 
     print(stream_obj.start, stream_obj.end)
-    data = await stream_obj.stream_contract()
-    await stream_obj.async_client.close_connection()
+    data = await stream_obj.stream_contract(0)
+    ClientPool.release(stream_obj.async_client)
     return data
 
 
 async def run_parallely(jobs):
-    await asyncio.gather(*jobs)
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await ClientPool.close_all()
 
 
 if __name__ == "__main__":
@@ -2,11 +2,14 @@ import asyncio
 import datetime as dt
 import multiprocessing
 import os
-import time
 
 from binance import AsyncClient, BinanceSocketManager
 from binance.enums import *
+from binance.helpers import date_to_milliseconds
+from binance_trader.data.modules.backfill import BackfillEngine, BackfillJob
+from binance_trader.data.modules.columnar_store import ColumnarStore
 from binance_trader.data.modules.data_processing import ProcessStream
+from binance_trader.data.modules.write_queue import WriteQueue
 
 
 class BaseDataStream:
@@ -19,6 +22,7 @@ class BaseDataStream:
         interval=AsyncClient.KLINE_INTERVAL_1MINUTE,
         futures_type: FuturesType = FuturesType.USD_M,
         contract_type: ContractType = ContractType.PERPETUAL,
+        store: ColumnarStore = None,
     ) -> None:
         client = await AsyncClient.create()
         bm = BinanceSocketManager(client)
@@ -31,7 +35,11 @@ class BaseDataStream:
         while dt.datetime.now() < stream_end:
             async with data_stream as stream:
                 res = await stream.recv()
-                ProcessStream(db=db, row=res).write_data()
+                ProcessStream(db=db, row=res, store=store).write_data()
+        if store is None:
+            WriteQueue.flush(db)
+        else:
+            store.flush()
         await client.close_connection()
 
     @classmethod
@@ -44,21 +52,22 @@ class BaseDataStream:
         end_str: str,
         limit: int,
         interval=AsyncClient.KLINE_INTERVAL_1MINUTE,
+        contract_type: ContractType = ContractType.PERPETUAL,
     ) -> None:
         client = await AsyncClient.create()
-        data_stream = client.futures_historical_klines(
-            symbol=symbol,
-            start_str=start_str,
-            end_str=end_str,
-            limit=limit,
+        engine = BackfillEngine(client, ColumnarStore(db), limit=limit)
+        job = BackfillJob(
+            pair=symbol,
+            contract_type=contract_type.value,
             interval=interval,
+            start=date_to_milliseconds(start_str),
+            end=min(
+                date_to_milliseconds(end_str or "now UTC"),
+                int(stream_end.timestamp() * 1000),
+            ),
         )
-        while dt.datetime.now() < stream_end:
-            while True:
-                time.sleep(60)
-                res = await data_stream
-                print(res)
-        # ProcessStream(db=db, row=res).write_data()
+        await engine.backfill(job)
+        print(engine)
         await client.close_connection()
 
 
@@ -91,10 +100,12 @@ class SocketStream(DataStream):
         interval: str = AsyncClient.KLINE_INTERVAL_1MINUTE,
         futures_type: FuturesType = FuturesType.USD_M,
         contract_type: ContractType = ContractType.PERPETUAL,
+        store: ColumnarStore = None,
     ) -> None:
         super().__init__(db, stream_end, symbol, interval)
         self.futures_type = futures_type
         self.contract_type = contract_type
+        self.store = store
 
     def loop_task(self):
         return BaseDataStream.futures_socket(
@@ -104,6 +115,7 @@ class SocketStream(DataStream):
             interval=self.interval,
             futures_type=self.futures_type,
             contract_type=self.contract_type,
+            store=self.store,
         )
 
     async def start(self):
@@ -152,6 +164,7 @@ class DataJob:
         interval: str = AsyncClient.KLINE_INTERVAL_1MINUTE,
         futures_type: FuturesType = FuturesType.USD_M,
         contract_type: ContractType = ContractType.PERPETUAL,
+        store: ColumnarStore = None,
     ):
         return SocketStream(
             db=db,
@@ -160,6 +173,7 @@ class DataJob:
             interval=interval,
             futures_type=futures_type,
             contract_type=contract_type,
+            store=store,
         )
 
     @staticmethod
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import math
+import os
+import time
+from decimal import Decimal
+
+from binance import AsyncClient, Client
+
+
+class SymbolFilters:
+    __slots__ = (
+        "symbol",
+        "tick_size",
+        "step_size",
+        "min_qty",
+        "max_qty",
+        "market_step_size",
+        "market_min_qty",
+        "market_max_qty",
+        "min_notional",
+        "_qty_digits",
+        "_price_digits",
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        tick_size: float,
+        step_size: float,
+        min_qty: float = 0.0,
+        max_qty: float = math.inf,
+        market_step_size: float = None,
+        market_min_qty: float = None,
+        market_max_qty: float = None,
+        min_notional: float = 0.0,
+    ) -> None:
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.market_step_size = market_step_size or step_size
+        self.market_min_qty = market_min_qty if market_min_qty is not None else min_qty
+        self.market_max_qty = market_max_qty if market_max_qty is not None else max_qty
+        self.min_notional = min_notional
+        self._qty_digits = self._digits(self.market_step_size)
+        self._price_digits = self._digits(tick_size)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.symbol} | tick {self.tick_size} | step {self.step_size} | notional {self.min_notional} ]"
+
+    @classmethod
+    def from_info(cls, info: dict) -> "SymbolFilters":
+        filters = {f["filterType"]: f for f in info["filters"]}
+        price = filters.get("PRICE_FILTER", {})
+        lot = filters.get("LOT_SIZE", {})
+        market_lot = filters.get("MARKET_LOT_SIZE", {})
+        notional = filters.get("MIN_NOTIONAL") or filters.get("NOTIONAL") or {}
+        return cls(
+            symbol=info["symbol"],
+            tick_size=float(price.get("tickSize", 0)),
+            step_size=float(lot.get("stepSize", 0)),
+            min_qty=float(lot.get("minQty", 0)),
+            max_qty=float(lot.get("maxQty", math.inf)),
+            market_step_size=float(market_lot.get("stepSize", 0)) or None,
+            market_min_qty=float(market_lot["minQty"])
+            if "minQty" in market_lot
+            else None,
+            market_max_qty=float(market_lot["maxQty"])
+            if "maxQty" in market_lot
+            else None,
+            min_notional=float(
+                notional.get("notional", notional.get("minNotional", 0))
+            ),
+        )
+
+    @staticmethod
+    def _digits(step: float) -> int:
+        if not step:
+            return 8
+        return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+    def round_qty(self, qty: float) -> float:
+        step = self.market_step_size
+        if not step:
+            return qty
+        return round(math.floor(qty / step + 1e-9) * step, self._qty_digits)
+
+    def round_price(self, price: float) -> float:
+        if not self.tick_size:
+            return price
+        return round(
+            math.floor(price / self.tick_size + 1e-9) * self.tick_size,
+            self._price_digits,
+        )
+
+    def min_qty_at(self, price: float) -> float:
+        if not price:
+            return self.market_min_qty
+        return max(self.market_min_qty, self.min_notional / price)
+
+    def validate_qty(self, qty: float, price: float) -> float:
+        final_qty = self.round_qty(qty)
+        min_qty = self.min_qty_at(price)
+        if final_qty < min_qty:
+            raise ValueError(f"{final_qty} is less than than {min_qty=}")
+        if final_qty > self.market_max_qty:
+            raise ValueError(f"{final_qty} is more than {self.market_max_qty=}")
+        return final_qty
+
+
+class ExchangeInfoCache:
+    _caches: dict = {}
+
+    def __init__(self, ttl: float = 3600, path: str = None) -> None:
+        self._ttl = ttl
+        self._path = path
+        self._fetched = 0.0
+        self._symbols = {}
+        self._filters = {}
+        self._lock = asyncio.Lock()
+        if path is not None and os.path.isfile(path):
+            self._read()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {len(self._symbols)} symbols | age {self.age:.0f}s ]"
+
+    @classmethod
+    def instance(
+        cls, testnet: bool = True, ttl: float = 3600, path: str = None
+    ) -> "ExchangeInfoCache":
+        cache = cls._caches.get(testnet)
+        if cache is None:
+            cache = cls._caches[testnet] = cls(ttl=ttl, path=path)
+        return cache
+
+    @property
+    def age(self) -> float:
+        return time.time() - self._fetched
+
+    @property
+    def is_stale(self) -> bool:
+        return not self._symbols or self.age > self._ttl
+
+    @property
+    def symbols(self) -> set:
+        return set(self._symbols)
+
+    def symbol_info(self, symbol: str) -> dict:
+        return self._symbols[symbol.upper()]
+
+    def filters(self, symbol: str) -> SymbolFilters:
+        return self._filters[symbol.upper()]
+
+    async def load(self, async_client: AsyncClient, force: bool = False):
+        if not force and not self.is_stale:
+            return self
+        fetched = self._fetched
+        async with self._lock:
+            if force and self._fetched != fetched:
+                return self
+            if force or self.is_stale:
+                self._update(await async_client.futures_exchange_info())
+        return self
+
+    def load_sync(self, client: Client, force: bool = False):
+        if force or self.is_stale:
+            self._update(client.futures_exchange_info())
+        return self
+
+    def _update(self, exchange_info: dict) -> None:
+        self._symbols = {info["symbol"]: info for info in exchange_info["symbols"]}
+        self._filters = {
+            symbol: SymbolFilters.from_info(info)
+            for symbol, info in self._symbols.items()
+        }
+        self._fetched = time.time()
+        if self._path is not None:
+            self._write()
+
+    def _read(self) -> None:
+        with open(self._path) as file:
+            cached = json.load(file)
+        self._symbols = cached["symbols"]
+        self._filters = {
+            symbol: SymbolFilters.from_info(info)
+            for symbol, info in self._symbols.items()
+        }
+        self._fetched = cached["fetched"]
+
+    def _write(self) -> None:
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"fetched": self._fetched, "symbols": self._symbols}, file)
+        os.replace(tmp, self._path)
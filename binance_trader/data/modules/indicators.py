@@ -0,0 +1,321 @@
+import math
+from collections import deque
+
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.intervals import Interval
+
+
+class Indicator:
+    name = None
+
+    def __init__(self, *params) -> None:
+        self._params = params
+        self._value = None
+        self._count = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {', '.join(map(str, self._params))} | {self._value} ]"
+
+    @property
+    def spec(self) -> tuple:
+        return (self.name,) + self._params
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        self.__init__(*self._params)
+
+
+class SMA(Indicator):
+    name = "sma"
+
+    def __init__(self, length: int) -> None:
+        super().__init__(length)
+        self._length = length
+        self._values = deque(maxlen=length)
+        self._sum = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        if len(self._values) == self._length:
+            self._sum -= self._values[0]
+        self._values.append(close)
+        self._sum += close
+        self._count += 1
+        if self._count % self._length == 0:
+            self._sum = math.fsum(self._values)
+        if len(self._values) == self._length:
+            self._value = self._sum / self._length
+
+
+class EMA(Indicator):
+    name = "ema"
+
+    def __init__(self, length: int) -> None:
+        super().__init__(length)
+        self._length = length
+        self._alpha = 2.0 / (length + 1)
+        self._seed = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        self._count += 1
+        if self._value is not None:
+            self._value += self._alpha * (close - self._value)
+            return
+        self._seed += close
+        if self._count == self._length:
+            self._value = self._seed / self._length
+
+
+class RSI(Indicator):
+    name = "rsi"
+
+    def __init__(self, length: int = 14) -> None:
+        super().__init__(length)
+        self._length = length
+        self._prev = None
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return
+
+        change = close - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._count += 1
+        if self._count <= self._length:
+            self._gain += gain / self._length
+            self._loss += loss / self._length
+            if self._count < self._length:
+                return
+        else:
+            self._gain += (gain - self._gain) / self._length
+            self._loss += (loss - self._loss) / self._length
+
+        if self._loss == 0:
+            self._value = 100.0 if self._gain else 50.0
+        else:
+            self._value = 100.0 - 100.0 / (1.0 + self._gain / self._loss)
+
+
+class ATR(Indicator):
+    name = "atr"
+
+    def __init__(self, length: int = 14) -> None:
+        super().__init__(length)
+        self._length = length
+        self._prev = None
+        self._seed = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        prev, self._prev = self._prev, close
+        true_range = high - low
+        if prev is not None:
+            true_range = max(true_range, abs(high - prev), abs(low - prev))
+
+        self._count += 1
+        if self._value is not None:
+            self._value += (true_range - self._value) / self._length
+            return
+        self._seed += true_range
+        if self._count == self._length:
+            self._value = self._seed / self._length
+
+
+class Bollinger(Indicator):
+    name = "bollinger"
+
+    def __init__(self, length: int = 20, k: float = 2.0) -> None:
+        super().__init__(length, k)
+        self._length = length
+        self._k = k
+        self._values = deque(maxlen=length)
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        if len(self._values) == self._length:
+            old = self._values[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._values.append(close)
+        self._sum += close
+        self._sumsq += close * close
+        self._count += 1
+        if self._count % self._length == 0:
+            self._sum = math.fsum(self._values)
+            self._sumsq = math.fsum(v * v for v in self._values)
+        if len(self._values) < self._length:
+            return
+
+        mean = self._sum / self._length
+        std = math.sqrt(max(self._sumsq / self._length - mean * mean, 0.0))
+        self._value = (mean, mean + self._k * std, mean - self._k * std)
+
+
+class VWAP(Indicator):
+    name = "vwap"
+
+    def __init__(self, anchor: str = "1d") -> None:
+        super().__init__(anchor)
+        self._anchor_ms = Interval.to_ms(anchor)
+        self._session = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        session = open_time // self._anchor_ms
+        if session != self._session:
+            self._session = session
+            self._pv = 0.0
+            self._volume = 0.0
+
+        self._count += 1
+        self._pv += (high + low + close) / 3.0 * volume
+        self._volume += volume
+        if self._volume:
+            self._value = self._pv / self._volume
+
+
+class IndicatorEngine:
+    _engines: dict = {}
+    Indicators = {cls.name: cls for cls in (SMA, EMA, RSI, ATR, Bollinger, VWAP)}
+
+    def __init__(self, window: CandleWindow = None) -> None:
+        self._window = window
+        self._indicators = {}
+        self._refs = {}
+        self._last_open_time = None
+        self._bars = 0
+        self._updates = 0
+        if window is not None:
+            window.attach(self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {len(self._indicators)} indicators | {self._bars} bars | last {self._last_open_time} ]"
+
+    @classmethod
+    def instance(
+        cls,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        window: CandleWindow = None,
+        scope: str = None,
+    ) -> "IndicatorEngine":
+        key = (symbol.upper(), contract_type.upper(), interval, scope)
+        engine = cls._engines.get(key)
+        if engine is None:
+            engine = cls._engines[key] = cls(window)
+        return engine
+
+    @classmethod
+    def drop(cls, scope: str) -> None:
+        for key in [key for key in cls._engines if key[3] == scope]:
+            del cls._engines[key]
+
+    @property
+    def window(self) -> CandleWindow:
+        return self._window
+
+    @property
+    def specs(self) -> list:
+        return list(self._indicators)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "indicators": len(self._indicators),
+            "subscribers": sum(self._refs.values()),
+            "bars": self._bars,
+            "updates": self._updates,
+        }
+
+    def add(self, name: str, *params) -> Indicator:
+        spec = (name.lower(),) + params
+        indicator = self._indicators.get(spec)
+        if indicator is None:
+            indicator = self._indicators[spec] = self.Indicators[spec[0]](*params)
+            self._refs[spec] = 0
+            if self._window is not None:
+                for bar in self._window.bars():
+                    indicator.update(*bar)
+        self._refs[spec] += 1
+        return indicator
+
+    def remove(self, name: str, *params) -> None:
+        spec = (name.lower(),) + params
+        if spec not in self._refs:
+            return
+        self._refs[spec] -= 1
+        if self._refs[spec] <= 0:
+            del self._refs[spec]
+            del self._indicators[spec]
+
+    def get(self, name: str, *params) -> Indicator:
+        return self._indicators[(name.lower(),) + params]
+
+    def value(self, name: str, *params):
+        return self.get(name, *params).value
+
+    def update(self, open_time, open, high, low, close, volume) -> bool:
+        if self._last_open_time is not None and open_time <= self._last_open_time:
+            return False
+
+        open, high, low = float(open), float(high), float(low)
+        close, volume = float(close), float(volume)
+        for indicator in self._indicators.values():
+            indicator.update(open_time, open, high, low, close, volume)
+        self._last_open_time = open_time
+        self._bars += 1
+        self._updates += len(self._indicators)
+        return True
+
+    def update_kline(self, row: list) -> bool:
+        return self.update(row[0], row[1], row[2], row[3], row[4], row[5])
+
+    def update_stream(self, k: dict) -> bool:
+        if not k["x"]:
+            return False
+        return self.update(k["t"], k["o"], k["h"], k["l"], k["c"], k["v"])
+
+    def reset(self) -> None:
+        for indicator in self._indicators.values():
+            indicator.reset()
+        self._last_open_time = None
+
+
+if __name__ == "__main__":
+    import time
+
+    import numpy as np
+
+    bars = 100_000
+    rng = np.random.default_rng(7)
+    close = 20_000 * np.exp(np.cumsum(rng.normal(0, 0.0008, bars)))
+
+    engine = IndicatorEngine()
+    for _ in range(3):
+        engine.add("sma", 20)
+        engine.add("ema", 20)
+        engine.add("rsi", 14)
+        engine.add("atr", 14)
+        engine.add("bollinger", 20, 2.0)
+        engine.add("vwap", "1d")
+
+    start = time.perf_counter()
+    for i, c in enumerate(close.tolist()):
+        engine.update(i * 60_000, c, c * 1.001, c * 0.999, c, 1.0)
+    took = time.perf_counter() - start
+    print(engine, engine.stats, f"{took / bars * 1e6:.1f} us/bar")
+    print({spec: engine.value(*spec) for spec in engine.specs})
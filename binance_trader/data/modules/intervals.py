@@ -0,0 +1,51 @@
+import datetime as dt
+
+
+class Interval:
+    Ms = {
+        "1m": 60_000,
+        "3m": 180_000,
+        "5m": 300_000,
+        "15m": 900_000,
+        "30m": 1_800_000,
+        "1h": 3_600_000,
+        "2h": 7_200_000,
+        "4h": 14_400_000,
+        "6h": 21_600_000,
+        "8h": 28_800_000,
+        "12h": 43_200_000,
+        "1d": 86_400_000,
+        "3d": 259_200_000,
+        "1w": 604_800_000,
+        "1M": 2_678_400_000,
+    }
+    WeekOffset = 345_600_000
+
+    @classmethod
+    def to_ms(cls, interval: str) -> int:
+        if interval not in cls.Ms:
+            raise ValueError(
+                f"{interval} is not a valid interval. Select from {list(cls.Ms)}."
+            )
+        return cls.Ms[interval]
+
+    @classmethod
+    def bar_open(cls, ms: int, interval: str) -> int:
+        if interval == "1M":
+            day = dt.datetime.fromtimestamp(ms / 1000, tz=dt.timezone.utc)
+            start = dt.datetime(day.year, day.month, 1, tzinfo=dt.timezone.utc)
+            return int(start.timestamp() * 1000)
+        step = cls.to_ms(interval)
+        offset = cls.WeekOffset if interval == "1w" else 0
+        return (ms - offset) // step * step + offset
+
+    @classmethod
+    def bar_close(cls, ms: int, interval: str) -> int:
+        if interval == "1M":
+            day = dt.datetime.fromtimestamp(
+                cls.bar_open(ms, interval) / 1000, tz=dt.timezone.utc
+            )
+            year, month = divmod(day.month, 12)
+            start = dt.datetime(day.year + year, month + 1, 1, tzinfo=dt.timezone.utc)
+            return int(start.timestamp() * 1000)
+        return cls.bar_open(ms, interval) + cls.to_ms(interval)
@@ -0,0 +1,221 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+class Histogram:
+    SubBits = 7
+    SubCount = 1 << SubBits
+    HalfCount = SubCount >> 1
+    MaxExponent = 40
+
+    def __init__(self) -> None:
+        self._counts = [0] * (self.SubCount + self.MaxExponent * self.HalfCount)
+        self._count = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._count} | p50 {self.percentile(50)} | p99 {self.percentile(99)} | max {self._max} ]"
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < cls.SubCount:
+            return value
+        exponent = min(value.bit_length() - cls.SubBits, cls.MaxExponent)
+        return (
+            cls.SubCount
+            + (exponent - 1) * cls.HalfCount
+            + min((value >> exponent) - cls.HalfCount, cls.HalfCount - 1)
+        )
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        if index < cls.SubCount:
+            return index
+        exponent, sub = divmod(index - cls.SubCount, cls.HalfCount)
+        exponent += 1
+        return ((sub + cls.HalfCount) << exponent) + (1 << exponent) // 2
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count else 0.0
+
+    @property
+    def min(self) -> int:
+        return self._min
+
+    @property
+    def max(self) -> int:
+        return self._max
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        if value < self.SubCount:
+            self._counts[value] += 1
+        else:
+            self._counts[self._index(value)] += 1
+        self._count += 1
+        self._total += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def percentile(self, q: float) -> int:
+        if not self._count:
+            return None
+        counts = np.cumsum(self._counts)
+        index = int(np.searchsorted(counts, max(q / 100 * self._count, 1)))
+        return min(self._value(index), self._max)
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        self._counts = [a + b for a, b in zip(self._counts, other._counts)]
+        self._count += other._count
+        self._total += other._total
+        if other._min is not None:
+            self._min = other._min if self._min is None else min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        return self
+
+    def summary(self, scale: float = 1000.0) -> dict:
+        if not self._count:
+            return {"n": 0}
+        return {
+            "n": self._count,
+            "mean": self.mean / scale,
+            "p50": self.percentile(50) / scale,
+            "p90": self.percentile(90) / scale,
+            "p99": self.percentile(99) / scale,
+            "p999": self.percentile(99.9) / scale,
+            "max": self._max / scale,
+        }
+
+
+class Span:
+    __slots__ = ("_symbol", "_stage", "_start")
+
+    def __init__(self, symbol: str, stage: str) -> None:
+        self._symbol = symbol
+        self._stage = stage
+        self._start = 0
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        Latency.since(self._symbol, self._stage, self._start)
+
+
+class Latency:
+    Stages = (
+        "fetch",
+        "receive",
+        "decode",
+        "parse",
+        "storage",
+        "signal",
+        "position",
+        "qty",
+        "order_ack",
+        "bar_to_order",
+    )
+    enabled = True
+    _histograms: dict = {}
+
+    @classmethod
+    def histogram(cls, symbol: str, stage: str) -> Histogram:
+        histogram = cls._histograms.get((symbol, stage))
+        if histogram is None:
+            histogram = cls._histograms[(symbol, stage)] = Histogram()
+        return histogram
+
+    @classmethod
+    def record(cls, symbol: str, stage: str, micros: int) -> None:
+        if cls.enabled:
+            cls.histogram(symbol, stage).record(int(micros))
+
+    @classmethod
+    def since(cls, symbol: str, stage: str, start_ns: int) -> None:
+        if cls.enabled:
+            elapsed = time.perf_counter_ns() - start_ns
+            cls.histogram(symbol, stage).record(elapsed // 1000)
+
+    @classmethod
+    def span(cls, symbol: str, stage: str) -> Span:
+        return Span(symbol, stage)
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._histograms.clear()
+
+    @classmethod
+    def summary(cls, symbol: str = None) -> dict:
+        merged = {}
+        for (sym, stage), histogram in cls._histograms.items():
+            if symbol is not None and sym.upper() != symbol.upper():
+                continue
+            merged.setdefault((sym.upper(), stage), Histogram()).merge(histogram)
+        summary = {}
+        for (sym, stage), histogram in sorted(merged.items()):
+            summary.setdefault(sym, {})[stage] = histogram.summary()
+        return summary
+
+    @classmethod
+    def totals(cls) -> dict:
+        totals = {}
+        for (_, stage), histogram in cls._histograms.items():
+            totals.setdefault(stage, Histogram()).merge(histogram)
+        order = {stage: i for i, stage in enumerate(cls.Stages)}
+        return {
+            stage: totals[stage].summary()
+            for stage in sorted(totals, key=lambda stage: order.get(stage, len(order)))
+        }
+
+    @classmethod
+    def dump(cls, path: str = None) -> dict:
+        report = {"time": time.time(), "totals": cls.totals(), "symbols": cls.summary()}
+        if path is not None:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as file:
+                json.dump(report, file, indent=1)
+            os.replace(tmp, path)
+        return report
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    samples = rng.lognormal(np.log(800), 0.6, 200_000).astype(np.int64)
+
+    histogram = Histogram()
+    for value in samples.tolist():
+        histogram.record(value)
+    for q in (50, 90, 99, 99.9):
+        exact = np.percentile(samples, q)
+        print(
+            f"p{q}: {histogram.percentile(q)} vs {exact:.0f} ({histogram.percentile(q) / exact - 1:+.2%})"
+        )
+
+    n = 200_000
+    start = time.perf_counter()
+    for _ in range(n):
+        with Latency.span("BTCUSDT", "signal"):
+            pass
+    took = time.perf_counter() - start
+    print(f"span overhead:  {took / n * 1e9:.0f} ns")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        Latency.since("BTCUSDT", "parse", time.perf_counter_ns())
+    took = time.perf_counter() - start
+    print(f"since overhead: {took / n * 1e9:.0f} ns")
+    print(Latency.dump()["totals"])
@@ -0,0 +1,289 @@
+import asyncio
+import datetime as dt
+import inspect
+import json
+import random
+import time
+
+import websockets
+from binance import BinanceSocketManager
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.data_processing import ProcessStream
+from binance_trader.data.modules.latency import Latency
+
+
+class StreamConnection:
+    BatchDelay = 0.05
+    SendInterval = 0.25
+
+    def __init__(self, base_url: str, dispatch, max_streams: int) -> None:
+        self._base_url = base_url
+        self._dispatch = dispatch
+        self._max_streams = max_streams
+        self._streams = set()
+        self._live = set()
+        self._ws = None
+        self._request_id = 0
+        self._has_streams = asyncio.Event()
+        self._task = None
+        self._syncer = None
+        self._last_send = 0.0
+        self._messages = 0
+        self._errors = 0
+        self._frames = 0
+        self._reconnects = 0
+
+    def __repr__(self) -> str:
+        state = "connected" if self._ws is not None else "idle"
+        return f"{self.__class__.__name__} [ {len(self._streams)} streams | {state} | {self._messages} msgs ]"
+
+    @property
+    def streams(self) -> set:
+        return self._streams
+
+    @property
+    def has_capacity(self) -> bool:
+        return len(self._streams) < self._max_streams
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "streams": len(self._streams),
+            "connected": self._ws is not None,
+            "messages": self._messages,
+            "errors": self._errors,
+            "control_frames": self._frames,
+            "reconnects": self._reconnects,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._syncer is not None:
+            self._syncer.cancel()
+            self._syncer = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def add(self, streams: list) -> None:
+        self._streams.update(streams)
+        self._has_streams.set()
+        self._schedule_sync()
+
+    async def remove(self, streams: list) -> None:
+        self._streams.difference_update(streams)
+        if not self._streams:
+            self._has_streams.clear()
+        self._schedule_sync()
+
+    def _schedule_sync(self) -> None:
+        if self._ws is not None and (self._syncer is None or self._syncer.done()):
+            self._syncer = asyncio.ensure_future(self._sync())
+
+    async def _sync(self) -> None:
+        await asyncio.sleep(self.BatchDelay)
+        try:
+            while self._ws is not None:
+                subscribe = sorted(self._streams - self._live)
+                unsubscribe = sorted(self._live - self._streams)
+                if not subscribe and not unsubscribe:
+                    return
+                if subscribe:
+                    await self._send("SUBSCRIBE", subscribe)
+                    self._live.update(subscribe)
+                if unsubscribe:
+                    await self._send("UNSUBSCRIBE", unsubscribe)
+                    self._live.difference_update(unsubscribe)
+        except (OSError, websockets.WebSocketException) as e:
+            print(f"{dt.datetime.now()} {self} subscription sync failed: {e}")
+
+    async def _send(self, method: str, params: list) -> None:
+        wait = self._last_send + self.SendInterval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self._ws is None:
+            return
+        self._request_id += 1
+        self._frames += 1
+        self._last_send = time.monotonic()
+        await self._ws.send(
+            json.dumps({"method": method, "params": params, "id": self._request_id})
+        )
+
+    async def _handle(self, raw) -> None:
+        received = time.perf_counter_ns()
+        msg = json.loads(raw)
+        if "stream" not in msg:
+            return
+        self._messages += 1
+        data = msg["data"]
+        symbol = data.get("ps") or data.get("s") or msg["stream"]
+        Latency.since(symbol, "decode", received)
+        if "E" in data:
+            Latency.record(symbol, "receive", time.time_ns() // 1000 - data["E"] * 1000)
+        await self._dispatch(msg["stream"], data)
+
+    async def _run(self) -> None:
+        backoff = 1
+        while True:
+            await self._has_streams.wait()
+            streams = sorted(self._streams)
+            url = f"{self._base_url}stream?streams={'/'.join(streams)}"
+            try:
+                async with websockets.connect(url, max_queue=None) as ws:
+                    self._ws = ws
+                    self._live = set(streams)
+                    self._schedule_sync()
+                    backoff = 1
+                    async for raw in ws:
+                        try:
+                            await self._handle(raw)
+                        except Exception as e:
+                            self._errors += 1
+                            print(f"{dt.datetime.now()} {self} message dropped: {e!r}")
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                print(f"{dt.datetime.now()} {self} disconnected: {e}")
+            except Exception as e:
+                print(f"{dt.datetime.now()} {self} failed: {e!r}")
+            finally:
+                self._ws = None
+                self._live = set()
+
+            self._reconnects += 1
+            await asyncio.sleep(backoff + random.random())
+            backoff = min(backoff * 2, 60)
+
+
+class MultiplexStream:
+    def __init__(
+        self,
+        db: str = None,
+        testnet: bool = True,
+        store: ColumnarStore = None,
+        max_streams_per_connection: int = 200,
+        base_url: str = None,
+    ) -> None:
+        self._db = db
+        self._store = store
+        self._base_url = base_url or (
+            BinanceSocketManager.FSTREAM_TESTNET_URL
+            if testnet
+            else BinanceSocketManager.FSTREAM_URL.format("com")
+        )
+        self._max_streams = max_streams_per_connection
+        self._handlers = {}
+        self._aliases = {}
+        self._connections = []
+        self._owner = {}
+        self._running = False
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {len(self._handlers)} streams | {len(self._connections)} connections ]"
+
+    @staticmethod
+    def kline_stream(pair: str, contract_type: str, interval: str) -> str:
+        return f"{pair.lower()}_{contract_type.lower()}@continuousKline_{interval}"
+
+    @property
+    def streams(self) -> list:
+        return list(self._handlers)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "streams": len(self._handlers),
+            "connections": [conn.stats for conn in self._connections],
+        }
+
+    async def start(self) -> None:
+        self._running = True
+        for conn in self._connections:
+            conn.start()
+
+    async def stop(self) -> None:
+        self._running = False
+        for conn in self._connections:
+            await conn.stop()
+
+    async def subscribe(self, stream: str, handler=None) -> None:
+        self._handlers[stream] = handler or self._write_handler
+        self._aliases[stream.lower()] = stream
+        if stream in self._owner:
+            return
+
+        conn = next((c for c in self._connections if c.has_capacity), None)
+        if conn is None:
+            conn = StreamConnection(self._base_url, self._dispatch, self._max_streams)
+            self._connections.append(conn)
+            if self._running:
+                conn.start()
+        self._owner[stream] = conn
+        await conn.add([stream])
+
+    async def unsubscribe(self, stream: str) -> None:
+        self._handlers.pop(stream, None)
+        self._aliases.pop(stream.lower(), None)
+        conn = self._owner.pop(stream, None)
+        if conn is not None:
+            await conn.remove([stream])
+
+    async def add_kline(
+        self, pair: str, contract_type: str, interval: str, handler=None
+    ) -> str:
+        stream = self.kline_stream(pair, contract_type, interval)
+        await self.subscribe(stream, handler)
+        return stream
+
+    async def remove_kline(self, pair: str, contract_type: str, interval: str) -> None:
+        await self.unsubscribe(self.kline_stream(pair, contract_type, interval))
+
+    async def _dispatch(self, stream: str, data: dict) -> None:
+        handler = self._handlers.get(stream)
+        if handler is None:
+            handler = self._handlers.get(self._aliases.get(stream.lower()))
+        if handler is None:
+            return
+        try:
+            res = handler(data)
+            if inspect.isawaitable(res):
+                await res
+        except Exception as e:
+            print(f"{dt.datetime.now()} {stream} handler failed: {e}")
+
+    def _write_handler(self, data: dict) -> None:
+        ProcessStream(db=self._db, row=data, store=self._store).write_data()
+
+
+async def run_multiplexed(
+    db: str, stream_end: dt.datetime, pairs: list, contract_type: str, interval: str
+):
+    collector = MultiplexStream(db=db)
+    for pair in pairs:
+        await collector.add_kline(pair, contract_type, interval)
+
+    await collector.start()
+    while dt.datetime.now() < stream_end:
+        await asyncio.sleep(1)
+    await collector.stop()
+
+
+if __name__ == "__main__":
+    db = "/home/rishabh/projects/binance-trader/binance_trader/data/db"
+    stream_end = dt.datetime(2022, 9, 3, 16, 59, 0, 0)
+
+    asyncio.run(
+        run_multiplexed(
+            db=db,
+            stream_end=stream_end,
+            pairs=["BTCUSDT", "ETHUSDT", "XRPUSDT"],
+            contract_type="PERPETUAL",
+            interval="1m",
+        )
+    )
@@ -0,0 +1,510 @@
+import asyncio
+import datetime as dt
+import time
+from collections import deque
+
+import numpy as np
+from binance import AsyncClient
+from binance_trader.data.modules.multiplex_stream import MultiplexStream
+from binance_trader.user.modules.client_pool import ClientPool
+
+
+class BookSide:
+    def __init__(
+        self, bids: bool, max_levels: int = 5000, max_pending: int = 256
+    ) -> None:
+        self._sign = -1.0 if bids else 1.0
+        self._max_levels = max_levels
+        self._max_pending = max_pending
+        self._keys = np.empty(0, dtype=np.float64)
+        self._qtys = np.empty(0, dtype=np.float64)
+        self._pending = {}
+        self._merges = 0
+
+    def __repr__(self) -> str:
+        side = "bids" if self._sign < 0 else "asks"
+        return f"{self.__class__.__name__} [ {side} | {len(self)} levels | best {self.best} ]"
+
+    def __len__(self) -> int:
+        if self._pending:
+            self.merge()
+        return len(self._keys)
+
+    @property
+    def best(self) -> tuple:
+        if self._pending:
+            self.merge()
+        if not len(self._keys):
+            return None
+        return (self._sign * float(self._keys[0]), float(self._qtys[0]))
+
+    @property
+    def prices(self) -> np.ndarray:
+        if self._pending:
+            self.merge()
+        return self._sign * self._keys
+
+    @property
+    def qtys(self) -> np.ndarray:
+        if self._pending:
+            self.merge()
+        return self._qtys
+
+    @property
+    def merges(self) -> int:
+        return self._merges
+
+    def load(self, levels: list) -> None:
+        values = np.array(levels, dtype=np.float64).reshape(-1, 2)
+        keys, qtys = self._sign * values[:, 0], values[:, 1]
+        order = np.argsort(keys, kind="stable")
+        keys, qtys = keys[order], qtys[order]
+        live = qtys > 0
+        self._keys = keys[live][: self._max_levels]
+        self._qtys = qtys[live][: self._max_levels]
+        self._pending = {}
+
+    def update(self, levels: list) -> None:
+        pending = self._pending
+        for price, qty in levels:
+            pending[float(price)] = float(qty)
+        if len(pending) >= self._max_pending:
+            self.merge()
+
+    def merge(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self._merges += 1
+        keys = self._sign * np.fromiter(
+            pending.keys(), dtype=np.float64, count=len(pending)
+        )
+        qtys = np.fromiter(pending.values(), dtype=np.float64, count=len(pending))
+
+        idx = self._keys.searchsorted(keys)
+        hit = (
+            self._keys.take(idx, mode="clip") == keys
+            if len(self._keys)
+            else np.zeros(len(keys), dtype=bool)
+        )
+        self._qtys[idx[hit]] = qtys[hit]
+
+        new = ~hit & (qtys > 0)
+        if new.any() or (qtys[hit] == 0).any():
+            keys = np.concatenate((self._keys, keys[new]))
+            qtys = np.concatenate((self._qtys, qtys[new]))
+            order = np.argsort(keys, kind="stable")
+            keys, qtys = keys[order], qtys[order]
+            live = qtys > 0
+            self._keys = keys[live][: self._max_levels]
+            self._qtys = qtys[live][: self._max_levels]
+
+    def clear(self) -> None:
+        self._keys = np.empty(0, dtype=np.float64)
+        self._qtys = np.empty(0, dtype=np.float64)
+        self._pending = {}
+
+    def vwap(self, size: float, levels: int = 64) -> float:
+        if self._pending:
+            self.merge()
+        while True:
+            qtys = self._qtys[:levels]
+            filled = np.cumsum(qtys)
+            i = int(np.searchsorted(filled, size))
+            if i < len(qtys):
+                break
+            if levels >= len(self._qtys):
+                return None
+            levels *= 4
+        prices = self._sign * self._keys[: i + 1]
+        before = float(filled[i - 1]) if i else 0.0
+        cost = float(np.dot(prices[:i], qtys[:i])) + (size - before) * float(prices[i])
+        return cost / size
+
+    def depth_to_notional(self, notional: float, levels: int = 64) -> tuple:
+        if self._pending:
+            self.merge()
+        while True:
+            prices = self._sign * self._keys[:levels]
+            qtys = self._qtys[:levels]
+            cum = np.cumsum(prices * qtys)
+            i = int(np.searchsorted(cum, notional))
+            if i < len(qtys):
+                break
+            if levels >= len(self._qtys):
+                return (float(np.sum(qtys)), float(prices[-1]) if len(prices) else None)
+            levels *= 4
+        before = float(cum[i - 1]) if i else 0.0
+        qty = float(np.sum(qtys[:i])) + (notional - before) / float(prices[i])
+        return (qty, float(prices[i]))
+
+    def notional_within(self, bps: float) -> float:
+        if self._pending:
+            self.merge()
+        if not len(self._keys):
+            return 0.0
+        limit = self._keys[0] + abs(self._keys[0]) * bps / 10_000
+        i = int(np.searchsorted(self._keys, limit, side="right"))
+        return float(np.dot(np.abs(self._keys[:i]), self._qtys[:i]))
+
+
+class OrderBook:
+    RateWindow = 10.0
+
+    def __init__(self, symbol: str, max_levels: int = 5000, buffer: int = 2000) -> None:
+        self._symbol = symbol.upper()
+        self._bids = BookSide(True, max_levels)
+        self._asks = BookSide(False, max_levels)
+        self._buffer = deque(maxlen=buffer)
+        self._last_update_id = None
+        self._synced = False
+        self._first = False
+        self._event_time = None
+
+        self._updates = 0
+        self._applied = 0
+        self._stale = 0
+        self._gaps = 0
+        self._snapshots = 0
+        self._rate = None
+        self._rate_count = 0
+        self._rate_start = time.monotonic()
+
+    def __repr__(self) -> str:
+        state = "synced" if self._synced else "syncing"
+        return f"{self.__class__.__name__} [ {self._symbol} | {state} | {self.best_bid} / {self.best_ask} | {len(self._bids)}x{len(self._asks)} ]"
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def synced(self) -> bool:
+        return self._synced
+
+    @property
+    def last_update_id(self) -> int:
+        return self._last_update_id
+
+    @property
+    def bids(self) -> BookSide:
+        return self._bids
+
+    @property
+    def asks(self) -> BookSide:
+        return self._asks
+
+    @property
+    def best_bid(self) -> float:
+        best = self._bids.best
+        return best[0] if best else None
+
+    @property
+    def best_ask(self) -> float:
+        best = self._asks.best
+        return best[0] if best else None
+
+    @property
+    def mid(self) -> float:
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    @property
+    def spread_bps(self) -> float:
+        mid = self.mid
+        if mid is None:
+            return None
+        return (self.best_ask - self.best_bid) / mid * 10_000
+
+    @property
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._rate_start
+        return {
+            "synced": self._synced,
+            "updates": self._updates,
+            "applied": self._applied,
+            "stale": self._stale,
+            "gaps": self._gaps,
+            "snapshots": self._snapshots,
+            "resyncs": max(self._snapshots - 1, 0),
+            "updates_per_sec": self._rate
+            if self._rate is not None and elapsed < self.RateWindow
+            else self._rate_count / max(elapsed, 1e-9),
+            "levels": (len(self._bids), len(self._asks)),
+            "lag_ms": time.time() * 1000 - self._event_time
+            if self._event_time
+            else None,
+        }
+
+    def side(self, side: str) -> BookSide:
+        return self._asks if side.upper() == "BUY" else self._bids
+
+    def vwap(self, side: str, size: float) -> float:
+        return self.side(side).vwap(size)
+
+    def impact_bps(self, side: str, size: float) -> float:
+        price, mid = self.vwap(side, size), self.mid
+        if price is None or mid is None:
+            return None
+        return abs(price - mid) / mid * 10_000
+
+    def depth_to_notional(self, side: str, notional: float) -> tuple:
+        return self.side(side).depth_to_notional(notional)
+
+    def notional_within(self, side: str, bps: float) -> float:
+        return self.side(side).notional_within(bps)
+
+    def on_depth(self, msg: dict) -> bool:
+        self._updates += 1
+        self._rate_count += 1
+        self._event_time = msg.get("E", self._event_time)
+        now = time.monotonic()
+        if now - self._rate_start >= self.RateWindow:
+            self._rate = self._rate_count / (now - self._rate_start)
+            self._rate_count = 0
+            self._rate_start = now
+
+        if not self._synced:
+            self._buffer.append(msg)
+            return False
+        return self._apply_event(msg)
+
+    def apply_snapshot(self, resp: dict) -> bool:
+        self._bids.load(resp["bids"])
+        self._asks.load(resp["asks"])
+        self._last_update_id = int(resp["lastUpdateId"])
+        self._synced = True
+        self._first = True
+        self._snapshots += 1
+
+        buffered = list(self._buffer)
+        self._buffer.clear()
+        for msg in buffered:
+            if self._synced:
+                self._apply_event(msg)
+            else:
+                self._buffer.append(msg)
+        return self._synced
+
+    def reset(self) -> None:
+        self._synced = False
+        self._buffer.clear()
+        self._bids.clear()
+        self._asks.clear()
+
+    def _apply_event(self, msg: dict) -> bool:
+        if msg["u"] < self._last_update_id:
+            self._stale += 1
+            return False
+        if self._first:
+            if msg["U"] > self._last_update_id:
+                return self._desync(msg)
+        elif msg["pu"] != self._last_update_id:
+            return self._desync(msg)
+
+        self._bids.update(msg["b"])
+        self._asks.update(msg["a"])
+        self._last_update_id = msg["u"]
+        self._first = False
+        self._applied += 1
+        return True
+
+    def _desync(self, msg: dict) -> bool:
+        self._gaps += 1
+        self._synced = False
+        self._buffer.clear()
+        self._buffer.append(msg)
+        return False
+
+
+class OrderBookStream:
+    def __init__(
+        self,
+        multiplex: MultiplexStream,
+        async_client: AsyncClient = None,
+        testnet: bool = True,
+        speed: str = "100ms",
+        limit: int = 1000,
+        max_snapshots: int = 4,
+        max_levels: int = 5000,
+    ) -> None:
+        self._multiplex = multiplex
+        self._client = async_client
+        self._testnet = testnet
+        self._speed = speed
+        self._limit = limit
+        self._max_levels = max_levels
+        self._semaphore = asyncio.Semaphore(max_snapshots)
+        self._books = {}
+        self._pending = {}
+        self._failures = 0
+
+    def __repr__(self) -> str:
+        synced = sum(1 for book in self._books.values() if book.synced)
+        return f"{self.__class__.__name__} [ {synced}/{len(self._books)} synced | {self._speed} ]"
+
+    def stream(self, symbol: str) -> str:
+        return (
+            f"{symbol.lower()}@depth@{self._speed}"
+            if self._speed
+            else f"{symbol.lower()}@depth"
+        )
+
+    @property
+    def multiplex(self) -> MultiplexStream:
+        return self._multiplex
+
+    @property
+    def books(self) -> dict:
+        return self._books
+
+    @property
+    def stats(self) -> dict:
+        books = {symbol: book.stats for symbol, book in self._books.items()}
+        return {
+            "books": len(books),
+            "synced": sum(1 for s in books.values() if s["synced"]),
+            "updates_per_sec": sum(s["updates_per_sec"] for s in books.values()),
+            "resyncs": sum(s["resyncs"] for s in books.values()),
+            "gaps": sum(s["gaps"] for s in books.values()),
+            "snapshot_failures": self._failures,
+            "symbols": books,
+        }
+
+    def book(self, symbol: str) -> OrderBook:
+        return self._books.get(symbol.upper())
+
+    async def add(self, symbol: str) -> OrderBook:
+        book = self._books.get(symbol.upper())
+        if book is not None:
+            return book
+        book = self._books[symbol.upper()] = OrderBook(
+            symbol, max_levels=self._max_levels
+        )
+        await self._multiplex.subscribe(self.stream(symbol), self._handler(book))
+        await self._multiplex.start()
+        return book
+
+    async def remove(self, symbol: str) -> None:
+        book = self._books.pop(symbol.upper(), None)
+        if book is None:
+            return
+        await self._multiplex.unsubscribe(self.stream(symbol))
+        task = self._pending.pop(book.symbol, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self) -> None:
+        for symbol in list(self._books):
+            await self.remove(symbol)
+        if self._client is not None:
+            ClientPool.release(self._client)
+            self._client = None
+
+    def _handler(self, book: OrderBook):
+        def on_depth(data: dict) -> None:
+            book.on_depth(data)
+            if not book.synced and book.symbol not in self._pending:
+                self._pending[book.symbol] = asyncio.ensure_future(self._snapshot(book))
+
+        return on_depth
+
+    async def _snapshot(self, book: OrderBook) -> None:
+        try:
+            if self._client is None:
+                self._client = await ClientPool.get(testnet=self._testnet)
+            for attempt in range(3):
+                async with self._semaphore:
+                    try:
+                        resp = await self._client.futures_order_book(
+                            symbol=book.symbol, limit=self._limit
+                        )
+                    except Exception as e:
+                        self._failures += 1
+                        print(f"{dt.datetime.now()} {book} snapshot failed: {e}")
+                        resp = None
+                if resp is not None and book.apply_snapshot(resp):
+                    return
+                await asyncio.sleep(0.5 * (attempt + 1))
+        finally:
+            self._pending.pop(book.symbol, None)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    symbols, events, depth = 50, 2_000, 1000
+
+    def snapshot(mid: float, update_id: int) -> dict:
+        ticks = np.arange(1, depth + 1) * 0.1
+        return {
+            "lastUpdateId": update_id,
+            "bids": [
+                [f"{mid - t:.1f}", f"{q:.3f}"]
+                for t, q in zip(ticks, rng.random(depth) * 5)
+            ],
+            "asks": [
+                [f"{mid + t:.1f}", f"{q:.3f}"]
+                for t, q in zip(ticks, rng.random(depth) * 5)
+            ],
+        }
+
+    def diff(mid: float, u: int, n: int = 20) -> dict:
+        side = lambda sign: [
+            [f"{mid + sign * t * 0.1:.1f}", f"{q:.3f}" if q > 1 else "0"]
+            for t, q in zip(
+                rng.choice(np.arange(1, 200), n, replace=False), rng.random(n) * 5
+            )
+        ]
+        return {
+            "e": "depthUpdate",
+            "E": int(time.time() * 1000),
+            "U": u - 9,
+            "u": u,
+            "pu": u - 10,
+            "b": side(-1),
+            "a": side(1),
+        }
+
+    books = {f"S{i:02d}USDT": OrderBook(f"S{i:02d}USDT") for i in range(symbols)}
+    feed = []
+    for symbol, book in books.items():
+        book.on_depth(diff(20_000.0, 1_000))
+        book.apply_snapshot(snapshot(20_000.0, 995))
+        feed.extend((book, diff(20_000.0, 1_010 + 10 * j)) for j in range(events))
+    rng.shuffle(feed)
+    feed.sort(key=lambda item: item[1]["u"])
+
+    start = time.perf_counter()
+    for book, msg in feed:
+        book.on_depth(msg)
+    took = time.perf_counter() - start
+    print(
+        f"{len(feed)} updates over {symbols} books: {took / len(feed) * 1e6:.1f} us/update, {len(feed) / took:,.0f} updates/s"
+    )
+
+    book = books["S07USDT"]
+    n = 20_000
+    start = time.perf_counter()
+    for _ in range(n):
+        book.best_bid, book.best_ask
+    print(f"best bid/ask: {(time.perf_counter() - start) / n * 1e6:.2f} us")
+    start = time.perf_counter()
+    for _ in range(n):
+        book.vwap("BUY", 25.0)
+    print(
+        f"vwap(25):     {(time.perf_counter() - start) / n * 1e6:.2f} us -> {book.vwap('BUY', 25.0):.2f}, impact {book.impact_bps('BUY', 25.0):.2f} bps"
+    )
+    start = time.perf_counter()
+    for _ in range(n):
+        book.depth_to_notional("SELL", 1_000_000.0)
+    print(
+        f"depth(1M):    {(time.perf_counter() - start) / n * 1e6:.2f} us -> {book.depth_to_notional('SELL', 1_000_000.0)}"
+    )
+
+    gap = diff(20_000.0, book.last_update_id + 50)
+    book.on_depth(gap)
+    print(book, {k: v for k, v in book.stats.items() if k != "lag_ms"})
+    book.apply_snapshot(snapshot(20_000.0, book.last_update_id + 45))
+    print(book, {k: v for k, v in book.stats.items() if k != "lag_ms"})
@@ -0,0 +1,361 @@
+import numpy as np
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.intervals import Interval
+
+
+class Resampler:
+    def __init__(self, interval: str, source: str = "1m") -> None:
+        step, source_step = Interval.to_ms(interval), Interval.to_ms(source)
+        if interval == source or (interval != "1M" and step % source_step):
+            raise ValueError(f"Cannot resample {source} bars into {interval}")
+        self._interval = interval
+        self._source = source
+        self._source_step = source_step
+        self._listeners = []
+        self._last = None
+        self._emitted = 0
+        self._partial = 0
+        self._clear()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._source} -> {self._interval} | {self._emitted} bars | {self._partial} partial ]"
+
+    @property
+    def interval(self) -> str:
+        return self._interval
+
+    @property
+    def last(self) -> tuple:
+        return self._last
+
+    @property
+    def current(self) -> tuple:
+        if self._open_time is None:
+            return None
+        return (
+            self._open_time,
+            self._open,
+            self._high,
+            self._low,
+            self._close,
+            self._volume,
+        )
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "emitted": self._emitted,
+            "partial": self._partial,
+            "last_open_time": self._last and self._last[0],
+        }
+
+    def attach(self, listener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def update(self, open_time, open, high, low, close, volume) -> tuple:
+        if self._source_open is not None and open_time <= self._source_open:
+            return None
+
+        bar = None
+        if self._close_time is None or open_time >= self._close_time:
+            if self._open_time is not None:
+                bar = self._emit(complete=False)
+            self._open_time = Interval.bar_open(open_time, self._interval)
+            self._close_time = Interval.bar_close(open_time, self._interval)
+            self._complete = open_time == self._open_time
+            self._open, self._high, self._low = float(open), float(high), float(low)
+            self._close, self._volume = float(close), float(volume)
+        else:
+            high, low = float(high), float(low)
+            if high > self._high:
+                self._high = high
+            if low < self._low:
+                self._low = low
+            self._close = float(close)
+            self._volume += float(volume)
+            self._complete = (
+                self._complete and open_time == self._source_open + self._source_step
+            )
+        self._source_open = open_time
+
+        if open_time + self._source_step >= self._close_time:
+            return self._emit(complete=self._complete)
+        return bar
+
+    def flush(self) -> tuple:
+        if self._open_time is None:
+            return None
+        return self._emit(complete=False)
+
+    def reset(self) -> None:
+        self._clear()
+        self._last = None
+        for listener in self._listeners:
+            listener.reset()
+
+    def _emit(self, complete: bool) -> tuple:
+        bar = (
+            self._open_time,
+            self._open,
+            self._high,
+            self._low,
+            self._close,
+            self._volume,
+        )
+        source_open = self._source_open
+        self._clear()
+        self._source_open = source_open
+        if not complete:
+            self._partial += 1
+            return None
+        self._last = bar
+        self._emitted += 1
+        for listener in self._listeners:
+            listener.update(*bar)
+        return bar
+
+    def _clear(self) -> None:
+        self._open_time = None
+        self._close_time = None
+        self._source_open = None
+        self._complete = False
+        self._open = self._high = self._low = self._close = self._volume = 0.0
+
+    @staticmethod
+    def buckets(open_time: np.ndarray, interval: str) -> tuple:
+        if interval == "1M":
+            month = open_time.astype("datetime64[ms]").astype("datetime64[M]")
+            start = month.astype("datetime64[ms]").astype(np.int64)
+            end = (month + 1).astype("datetime64[ms]").astype(np.int64)
+            return start, end
+        step = Interval.to_ms(interval)
+        offset = Interval.WeekOffset if interval == "1w" else 0
+        start = (open_time - offset) // step * step + offset
+        return start, start + step
+
+    @classmethod
+    def resample(
+        cls, rows: dict, interval: str, source: str = "1m", partial: bool = False
+    ) -> dict:
+        open_time = np.asarray(rows["open_time"], dtype=np.int64)
+        if not len(open_time):
+            return {
+                name: np.empty(
+                    0,
+                    dtype=np.int64
+                    if name in ("open_time", "close_time", "count")
+                    else np.float64,
+                )
+                for name in (
+                    "open_time",
+                    "close_time",
+                    "open",
+                    "high",
+                    "low",
+                    "close",
+                    "volume",
+                    "count",
+                )
+            }
+
+        start, end = cls.buckets(open_time, interval)
+        first = np.flatnonzero(np.r_[True, start[1:] != start[:-1]])
+        last = np.r_[first[1:] - 1, len(open_time) - 1]
+        source_step = Interval.to_ms(source)
+        complete = (
+            (open_time[first] == start[first])
+            & (open_time[last] + source_step == end[first])
+            & (open_time[last] - open_time[first] == (last - first) * source_step)
+        )
+        volume = rows.get("volume")
+        bars = {
+            "open_time": start[first],
+            "close_time": end[first] - 1,
+            "open": np.asarray(rows["open"], dtype=np.float64)[first],
+            "high": np.maximum.reduceat(
+                np.asarray(rows["high"], dtype=np.float64), first
+            ),
+            "low": np.minimum.reduceat(
+                np.asarray(rows["low"], dtype=np.float64), first
+            ),
+            "close": np.asarray(rows["close"], dtype=np.float64)[last],
+            "volume": np.zeros(len(first))
+            if volume is None
+            else np.add.reduceat(np.asarray(volume, dtype=np.float64), first),
+            "count": last - first + 1,
+        }
+        if partial:
+            return bars
+        return {name: col[complete] for name, col in bars.items()}
+
+
+class ResampleEngine:
+    _engines: dict = {}
+
+    def __init__(
+        self,
+        symbol: str,
+        contract_type: str,
+        window: CandleWindow = None,
+        source: str = "1m",
+        scope: str = None,
+    ) -> None:
+        self._symbol = symbol
+        self._contract_type = contract_type
+        self._source = source
+        self._scope = scope
+        self._window = window
+        self._resamplers = {}
+        self._bars = 0
+        if window is not None:
+            window.attach(self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._symbol} | {self._source} -> {sorted(self._resamplers, key=Interval.to_ms)} | {self._bars} bars ]"
+
+    @classmethod
+    def instance(
+        cls,
+        symbol: str,
+        contract_type: str,
+        window: CandleWindow = None,
+        source: str = "1m",
+        scope: str = None,
+    ) -> "ResampleEngine":
+        key = (symbol.upper(), contract_type.upper(), source, scope)
+        engine = cls._engines.get(key)
+        if engine is None:
+            engine = cls._engines[key] = cls(
+                symbol, contract_type, window, source, scope
+            )
+        return engine
+
+    @classmethod
+    def drop(cls, scope: str) -> None:
+        for key in [key for key in cls._engines if key[3] == scope]:
+            del cls._engines[key]
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def intervals(self) -> list:
+        return sorted(self._resamplers, key=Interval.to_ms)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "bars": self._bars,
+            "intervals": {
+                interval: r.stats for interval, r in self._resamplers.items()
+            },
+        }
+
+    def resampler(self, interval: str) -> Resampler:
+        resampler = self._resamplers.get(interval)
+        if resampler is None:
+            resampler = self._resamplers[interval] = Resampler(interval, self._source)
+        return resampler
+
+    def add(self, interval: str, capacity: int, history: dict = None) -> CandleWindow:
+        window = CandleWindow.instance(
+            self._symbol, self._contract_type, interval, capacity, self._scope
+        )
+        resampler = self.resampler(interval)
+        if history is not None:
+            bars = Resampler.resample(history, interval, self._source)
+            tail = np.asarray(history["open_time"]) > (
+                bars["close_time"][-1] if len(bars["close_time"]) else -1
+            )
+            for bar in zip(
+                bars["open_time"].tolist(),
+                bars["open"].tolist(),
+                bars["high"].tolist(),
+                bars["low"].tolist(),
+                bars["close"].tolist(),
+                bars["volume"].tolist(),
+            ):
+                window.update(*bar)
+            for bar in zip(
+                *(
+                    np.asarray(history[name])[tail].tolist()
+                    for name in ("open_time", "open", "high", "low", "close", "volume")
+                )
+            ):
+                resampler.update(*bar)
+        resampler.attach(window)
+        return window
+
+    def update(self, open_time, open, high, low, close, volume) -> None:
+        self._bars += 1
+        for resampler in self._resamplers.values():
+            resampler.update(open_time, open, high, low, close, volume)
+
+    def update_kline(self, row: list) -> None:
+        self.update(row[0], row[1], row[2], row[3], row[4], row[5])
+
+    def update_stream(self, k: dict) -> None:
+        if k["x"]:
+            self.update(k["t"], k["o"], k["h"], k["l"], k["c"], k["v"])
+
+    def reset(self) -> None:
+        for resampler in self._resamplers.values():
+            resampler.reset()
+
+
+if __name__ == "__main__":
+    import time
+
+    bars = 200_000
+    rng = np.random.default_rng(7)
+    close = 20_000 * np.exp(np.cumsum(rng.normal(0, 0.0008, bars)))
+    start = 1662336000000 + 7 * 60_000
+    rows = {
+        "open_time": start + np.arange(bars, dtype=np.int64) * 60_000,
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.random(bars),
+    }
+    rows["open_time"][50_000:] += 60_000 * 3
+
+    intervals = ("3m", "5m", "15m", "1h", "4h", "1d")
+    engine = ResampleEngine("BTCUSDT", "PERPETUAL")
+    windows = {interval: engine.add(interval, bars // 3) for interval in intervals}
+
+    feed = list(
+        zip(
+            *(
+                rows[name].tolist()
+                for name in ("open_time", "open", "high", "low", "close", "volume")
+            )
+        )
+    )
+    begin = time.perf_counter()
+    for bar in feed:
+        engine.update(*bar)
+    took = time.perf_counter() - begin
+    print(
+        engine, f"{took / bars * 1e6:.2f} us per 1m bar for {len(intervals)} timeframes"
+    )
+
+    begin = time.perf_counter()
+    batch = {interval: Resampler.resample(rows, interval) for interval in intervals}
+    took = time.perf_counter() - begin
+    print(f"batch: {took * 1000:.1f} ms for {bars} bars x {len(intervals)} timeframes")
+
+    for interval in intervals:
+        incremental = np.array(list(windows[interval].bars()))
+        b = batch[interval]
+        same = len(incremental) == len(b["open_time"]) and all(
+            np.allclose(incremental[:, i], b[name])
+            for i, name in enumerate(
+                ("open_time", "open", "high", "low", "close", "volume")
+            )
+        )
+        print(
+            f"{interval:>4}: {len(incremental)} bars, matches batch {same}, {engine.resampler(interval)}"
+        )
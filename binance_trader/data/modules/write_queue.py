@@ -0,0 +1,317 @@
+import asyncio
+import atexit
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import deque
+
+from binance_trader.data.modules.candle_writer import CandleWriter
+
+
+class WriteQueue:
+    Policies = ("block", "drop_oldest", "spill")
+    _active = None
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        policy: str = "spill",
+        spill_path: str = None,
+        flush_interval: float = 1.0,
+    ) -> None:
+        if policy not in self.Policies:
+            raise ValueError(
+                f"Unknown write queue policy {policy}, expected one of {self.Policies}"
+            )
+        self._maxsize = maxsize
+        self._policy = policy
+        self._spill_path = spill_path or os.path.join(
+            tempfile.gettempdir(), f"write_queue_{os.getpid()}.spill"
+        )
+        self._flush_interval = flush_interval
+
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._spill_file = None
+        self._spill_reader = None
+        self._spill_pending = 0
+        self._writers = {}
+        self._busy = False
+        self._stopping = False
+        self._thread = None
+
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._blocked = 0
+        self._blocked_time = 0.0
+        self._errors = 0
+        self._max_depth = 0
+        self._write_time = 0.0
+        self._batches = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._policy} | {len(self._items)}/{self._maxsize} queued | {self._written} written ]"
+
+    @classmethod
+    def start(cls, **kwargs) -> "WriteQueue":
+        if cls._active is None:
+            cls._active = cls(**kwargs)
+            cls._active._thread = threading.Thread(
+                target=cls._active._run, name="write-queue", daemon=True
+            )
+            cls._active._thread.start()
+        return cls._active
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0) -> None:
+        queue, cls._active = cls._active, None
+        if queue is not None:
+            queue.shutdown(timeout)
+
+    @classmethod
+    def active(cls) -> "WriteQueue":
+        return cls._active
+
+    @classmethod
+    def write(
+        cls, db: str, file_name: str, row, fieldnames: tuple = None, flush: bool = False
+    ) -> bool:
+        queue = cls._active
+        if queue is None:
+            writer = CandleWriter.instance(db)
+            writer.write(file_name, row, fieldnames=fieldnames)
+            if flush:
+                writer.flush()
+            return True
+        return queue.put(("write", db, file_name, row, fieldnames))
+
+    @classmethod
+    def flush_if_due(cls, db: str) -> None:
+        if cls._active is None:
+            CandleWriter.instance(db).flush_if_due()
+
+    @classmethod
+    def flush(cls, db: str) -> None:
+        queue = cls._active
+        if queue is None:
+            CandleWriter.instance(db).flush()
+        else:
+            queue.put(("flush", db, None, None, None), force=True)
+
+    @classmethod
+    def close(cls, db: str) -> None:
+        queue = cls._active
+        if queue is None:
+            CandleWriter.instance(db).close()
+        else:
+            queue.put(("close", db, None, None, None), force=True)
+
+    @classmethod
+    def seal(cls, db: str, file_name: str) -> None:
+        queue = cls._active
+        if queue is None:
+            CandleWriter.instance(db).seal(file_name)
+        else:
+            queue.put(("seal", db, file_name, None, None), force=True)
+
+    @property
+    def depth(self) -> int:
+        return len(self._items) + self._spill_pending
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "policy": self._policy,
+            "depth": len(self._items),
+            "max_depth": self._max_depth,
+            "spill_pending": self._spill_pending,
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "dropped": self._dropped,
+            "spilled": self._spilled,
+            "blocked": self._blocked,
+            "blocked_s": self._blocked_time,
+            "errors": self._errors,
+            "avg_batch_ms": self._write_time / self._batches * 1000
+            if self._batches
+            else 0.0,
+        }
+
+    def put(self, item: tuple, force: bool = False) -> bool:
+        with self._cond:
+            self._enqueued += 1
+            if self._spill_pending or (not force and len(self._items) >= self._maxsize):
+                if (
+                    self._spill_pending
+                    or self._policy == "spill"
+                    or (self._policy == "block" and self._on_loop())
+                ):
+                    self._spill(item)
+                    self._cond.notify()
+                    return True
+                if self._policy == "drop_oldest":
+                    self._items.popleft()
+                    self._dropped += 1
+                else:
+                    self._blocked += 1
+                    start = time.perf_counter()
+                    while len(self._items) >= self._maxsize and not self._stopping:
+                        self._cond.wait(0.1)
+                    self._blocked_time += time.perf_counter() - start
+
+            self._items.append(item)
+            self._max_depth = max(self._max_depth, len(self._items))
+            self._cond.notify()
+        return True
+
+    def drain(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._items or self._spill_pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+        return True
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self.drain(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @staticmethod
+    def _on_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _spill(self, item: tuple) -> None:
+        with self._spill_lock:
+            if self._spill_file is None:
+                self._spill_file = open(self._spill_path, "ab")
+                self._spill_reader = open(self._spill_path, "rb")
+            pickle.dump(item, self._spill_file)
+            self._spill_pending += 1
+            self._spilled += 1
+
+    def _take_spill(self, limit: int) -> list:
+        with self._spill_lock:
+            if self._spill_file is None:
+                return []
+            self._spill_file.flush()
+            items = []
+            while len(items) < limit:
+                try:
+                    items.append(pickle.load(self._spill_reader))
+                except EOFError:
+                    break
+            if len(items) < limit or len(items) == self._spill_pending:
+                self._spill_file.close()
+                self._spill_reader.close()
+                self._spill_file = self._spill_reader = None
+                os.remove(self._spill_path)
+            return items
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._items and not self._spill_pending and not self._stopping:
+                    self._cond.wait(self._flush_interval)
+                batch = list(self._items)
+                self._items.clear()
+                self._busy = bool(batch) or self._spill_pending > 0
+                stopping = self._stopping and not batch and not self._spill_pending
+                self._cond.notify_all()
+
+            if not batch and self._spill_pending:
+                batch = self._take_spill(self._maxsize)
+                with self._cond:
+                    self._spill_pending -= len(batch)
+
+            start = time.perf_counter()
+            for item in batch:
+                self._apply(item)
+            for writer in self._writers.values():
+                writer.flush_if_due()
+            if batch:
+                self._write_time += time.perf_counter() - start
+                self._batches += 1
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+            if stopping:
+                break
+
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def _apply(self, item: tuple) -> None:
+        op, db, file_name, row, fieldnames = item
+        try:
+            writer = self._writers.get(db)
+            if writer is None:
+                writer = self._writers[db] = CandleWriter.instance(db)
+            if op == "write":
+                writer.write(file_name, row, fieldnames=fieldnames)
+                self._written += 1
+            elif op == "seal":
+                writer.seal(file_name)
+            elif op == "flush":
+                writer.flush()
+            elif op == "close":
+                writer.close()
+                del self._writers[db]
+        except Exception as e:
+            self._errors += 1
+            print(f"{self} write to {db}/{file_name} failed: {e}")
+
+
+atexit.register(WriteQueue.stop)
+
+
+if __name__ == "__main__":
+    import asyncio
+    import shutil
+
+    class SlowWriter(CandleWriter):
+        def flush(self) -> None:
+            if self._pending:
+                time.sleep(0.05)
+            super().flush()
+
+    async def run(policy: str, rows: int = 20_000, maxsize: int = 1_000) -> None:
+        db = tempfile.mkdtemp(prefix="write_queue_")
+        CandleWriter._writers[db] = SlowWriter(db, max_rows=200)
+        queue = WriteQueue.start(maxsize=maxsize, policy=policy)
+
+        lag = 0.0
+        for i in range(rows):
+            start = time.perf_counter()
+            WriteQueue.write(
+                db, "bench.csv", (i, i * 2.0, "x"), fieldnames=("i", "v", "s")
+            )
+            lag = max(lag, time.perf_counter() - start)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        stats = queue.stats
+        WriteQueue.stop()
+        with open(f"{db}/bench.csv") as file:
+            lines = sum(1 for _ in file) - 1
+        print(f"{policy:>12}: max put {lag * 1000:.2f}ms, {lines} rows on disk", stats)
+        CandleWriter._writers.pop(db, None)
+        shutil.rmtree(db)
+
+    for policy in WriteQueue.Policies:
+        asyncio.run(run(policy))
@@ -1,14 +1,21 @@
 import asyncio
-import csv
 import datetime as dt
 import decimal
-import os
+import random
+import uuid
+from collections import deque
+
+import aiohttp
+import numpy as np
 
-import pandas as pd
 from binance import AsyncClient
 from binance.enums import *
-from binance.exceptions import BinanceAPIException
-from binance.helpers import round_step_size
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from binance_trader.data.modules.clock import Clock
+from binance_trader.data.modules.exchange_info import ExchangeInfoCache
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.order_book import OrderBook
 from binance_trader.strategy.modules.models.models import (
     FutureOrder,
     OrderFillType,
@@ -16,10 +23,23 @@ from binance_trader.strategy.modules.models.models import (
     OrderStatus,
     Side,
 )
+from binance_trader.user.modules.client_pool import ClientPool
+from binance_trader.user.modules.order_journal import OrderJournal
 from keys import Keys
 
 
 class BaseStrategy:
+    Retryable = (
+        BinanceAPIException,
+        BinanceRequestException,
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        OSError,
+    )
+    MaxRetries = 5
+    RetryDelay = 0.5
+    DuplicateOrder = -4116
+
     @classmethod
     async def create(
         cls,
@@ -35,6 +55,9 @@ class BaseStrategy:
         limit: int,
         start_data_stream: str,
         end_data_stream: str,
+        async_client: AsyncClient = None,
+        clock: Clock = None,
+        exchange_info: ExchangeInfoCache = None,
     ):
         self = BaseStrategy()
         self._interval = interval
@@ -43,9 +66,11 @@ class BaseStrategy:
         self._api_key = api_key
         self._api_secret = (api_secret,)
         self._testnet = testnet
-        self.async_client = await AsyncClient().create(
+        self._clock = clock or Clock()
+        self.async_client = async_client or await ClientPool.get(
             api_key=api_key, api_secret=api_secret, testnet=testnet
         )
+        self._exchange_info = exchange_info or ExchangeInfoCache.instance(testnet)
         self._symbol_info, self._filters = await self.symbol_info()
         self._order_log_location = order_log_loc
         self._start_time = start_time
@@ -54,6 +79,9 @@ class BaseStrategy:
         self._start_data_stream = start_data_stream
         self._end_data_stream = end_data_stream
         self._contract_type = contract_type
+        self._order_gateway = None
+        self._order_book = None
+        self._slippage = deque(maxlen=1000)
         return self
 
     @property
@@ -72,6 +100,10 @@ class BaseStrategy:
     def testnet(self):
         return self._testnet
 
+    @property
+    def clock(self):
+        return self._clock
+
     @property
     def symbol_info(self):
         return self._symbol_info
@@ -104,63 +136,138 @@ class BaseStrategy:
     def limit(self):
         return self._limit
 
-    async def symbol_info(self):
-        symbol_info = await self.async_client.get_symbol_info(symbol=self.symbol)
-        filters = pd.DataFrame(symbol_info["filters"]).set_index(
-            "filterType", drop=True
-        )
-        return (symbol_info, filters)
+    @property
+    def journal(self):
+        return OrderJournal.instance(self.order_log_location)
 
-    async def _min_qty(self):
-        min_notional_val = float(self.filters.loc["MIN_NOTIONAL"]["minNotional"])
-        avg_price_dict = await self.async_client.get_avg_price(symbol=self.symbol)
-        avg_price = float(avg_price_dict["price"])
-        return (min_notional_val / avg_price, avg_price)
+    @property
+    def order_gateway(self):
+        return self._order_gateway
 
-    async def _process_qty(self, qty):
-        min_qty, avg_price = await self._min_qty()
-        round_to_digits = float(self.filters.loc["PRICE_FILTER"]["tickSize"])
-        final_qty = round_step_size(qty, round_to_digits)
+    @property
+    def order_book(self) -> OrderBook:
+        return self._order_book
+
+    @property
+    def slippage(self) -> dict:
+        if not self._slippage:
+            return {"n": 0, "expected_bps": None, "realized_bps": None}
+        expected, realized = np.array(self._slippage).T
+        return {
+            "n": len(realized),
+            "expected_bps": float(np.mean(expected)),
+            "realized_bps": float(np.mean(realized)),
+            "p99_realized_bps": float(np.percentile(realized, 99)),
+        }
+
+    @property
+    def last_price(self):
+        return None
 
-        if final_qty < min_qty:
-            raise ValueError(f"{final_qty} is less than than {min_qty=}")
-        return final_qty
+    async def symbol_info(self):
+        cache = await self._exchange_info.load(self.async_client)
+        return (cache.symbol_info(self.symbol), cache.filters(self.symbol))
+
+    async def _process_qty(self, qty):
+        self._symbol_info, self._filters = await self._retry(
+            "exchange_info", self.symbol_info
+        )
+        price = self.last_price
+        if price is None:
+            avg_price_dict = await self._retry(
+                "avg_price", self.async_client.get_avg_price, symbol=self.symbol
+            )
+            price = float(avg_price_dict["price"])
+        return self.filters.validate_qty(qty, price)
 
     async def create_new_order(self, side: Side, type: FutureOrder, quantity: decimal):
-        qty = await self._process_qty(quantity)
+        with Latency.span(self.symbol, "qty"):
+            qty = await self._process_qty(quantity)
+
+        book, mid, expected = self.order_book, None, None
+        if book is not None and book.synced and type == FutureOrder.Market:
+            mid, expected = book.mid, book.vwap(side, float(qty))
+
+        params = {"newClientOrderId": uuid.uuid4().hex}
+        if type == FutureOrder.Market:
+            params["newOrderRespType"] = ORDER_RESP_TYPE_RESULT
 
         try:
-            order_result = await self.async_client.futures_create_order(
-                symbol=self.symbol, side=side, type=type, quantity=qty
-            )
-            self._file_writer(order_result, "order_log.csv")
+            with Latency.span(self.symbol, "order_ack"):
+                order_result = await self._retry(
+                    "order", self._submit_order, side, type, qty, params
+                )
 
         except BinanceAPIException as e:
             print(e)
-            await self.async_client.close_connection()
             return None
 
+        if expected is not None and mid and float(order_result.get("avgPrice", 0) or 0):
+            sign = 1 if side == Side.Buy else -1
+            self._slippage.append(
+                (
+                    sign * (expected - mid) / mid * 10_000,
+                    sign * (float(order_result["avgPrice"]) - mid) / mid * 10_000,
+                )
+            )
+
+        now = int(self.clock.time() * 1000)
+        Latency.record(
+            self.symbol,
+            "bar_to_order",
+            (now - Interval.bar_open(now, self.interval)) * 1000,
+        )
         return qty
 
-    def _file_writer(self, row, file_name):
+    async def _submit_order(
+        self, side: Side, type: FutureOrder, quantity, params: dict
+    ):
         try:
-            file_exists = os.path.isfile(f"{self.order_log_location}/{file_name}")
-            with open(f"{self.order_log_location}/{file_name}", "a") as file:
-                writer = csv.DictWriter(
-                    file,
-                    delimiter=",",
-                    lineterminator="\n",
-                    fieldnames=list(row.keys()),
+            if self.order_gateway is not None:
+                return await self.order_gateway.submit(
+                    symbol=self.symbol,
+                    side=side,
+                    type=type,
+                    quantity=quantity,
+                    journal=self.journal,
+                    strategy=self.__class__.__name__,
+                    **params,
                 )
-
-                if not file_exists:
-                    print(f"Creating file @ {self.order_log_location}/{file_name}....")
-                    writer.writeheader()
-
-                print(f"{dt.datetime.now()} Writing to File: {file_name}")
-                writer.writerow(row)
-        except Exception as e:
-            print(e)
+            order_result = await self.async_client.futures_create_order(
+                symbol=self.symbol, side=side, type=type, quantity=quantity, **params
+            )
+        except BinanceAPIException as e:
+            if e.code != self.DuplicateOrder:
+                raise
+            order_result = await self.async_client.futures_get_order(
+                symbol=self.symbol, origClientOrderId=params["newClientOrderId"]
+            )
+        self.journal.append_order(
+            order_result,
+            int(self.clock.time() * 1000),
+            strategy=self.__class__.__name__,
+        )
+        return order_result
+
+    async def _retry(self, name: str, call, *args, **kwargs):
+        for attempt in range(self.MaxRetries + 1):
+            try:
+                return await call(*args, **kwargs)
+            except self.Retryable as e:
+                if attempt == self.MaxRetries or (
+                    isinstance(e, BinanceAPIException)
+                    and e.status_code < 500
+                    and e.status_code not in (418, 429)
+                ):
+                    raise
+                delay = (
+                    min(self.RetryDelay * 2**attempt, 30)
+                    + random.random() * self.RetryDelay
+                )
+                print(
+                    f"{dt.datetime.now()} {self.symbol} {name} retry in {delay:.1f}s: {e}"
+                )
+            await self.clock.sleep(delay)
 
 
 async def BaseStrategyRun(
@@ -181,11 +288,14 @@ async def BaseStrategyRun(
     await asyncio.sleep(5)
     await base_strat_obj.create_new_order(Side.Buy, FutureOrder.Market, 0.05)
 
-    await base_strat_obj.async_client.close_connection()
+    ClientPool.release(base_strat_obj.async_client)
 
 
 async def run_parallel(jobs):
-    await asyncio.gather(*jobs)
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await ClientPool.close_all()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import asyncio
 import datetime as dt
-import time
-import pandas as pd
+from collections import deque
+
+import numpy as np
 from binance import AsyncClient
 from binance.enums import *
 from binance.exceptions import BinanceAPIException
@@ -12,9 +13,22 @@ from binance_trader.strategy.modules.models.models import (
     ContractType,
     Side,
 )
+from binance_trader.data.modules.bar_close import BarCloseTrigger
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.clock import Clock
 from binance_trader.data.modules.data_stream_async import DataStreamAsync
+from binance_trader.data.modules.exchange_info import ExchangeInfoCache
+from binance_trader.data.modules.indicators import IndicatorEngine
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.data.modules.latency import Latency
+from binance_trader.data.modules.multiplex_stream import MultiplexStream
+from binance_trader.data.modules.order_book import OrderBookStream
+from binance_trader.data.modules.resampler import ResampleEngine
 from keys import Keys
-from binance_trader.user.modules.process_account_details import ProcessAccountDetails
+from binance_trader.user.modules.client_pool import ClientPool
+from binance_trader.user.modules.order_gateway import OrderGateway
+from binance_trader.user.modules.position_book import PositionBook
+from binance_trader.user.modules.account_snapshot import AccountSnapshot
 
 
 class SMACrossover(BaseStrategy):
@@ -37,6 +51,17 @@ class SMACrossover(BaseStrategy):
         sma_long: int,
         sma_short: int,
         quantity: float,
+        use_position_book: bool = True,
+        async_client: AsyncClient = None,
+        clock: Clock = None,
+        multiplex: MultiplexStream = None,
+        close_timeout: float = 2.0,
+        bar_offset: float = 0.0,
+        use_order_gateway: bool = False,
+        source_interval: str = None,
+        order_books: OrderBookStream = None,
+        exchange_info: ExchangeInfoCache = None,
+        scope: str = None,
     ):
         self = SMACrossover()
         self._interval = interval
@@ -44,9 +69,11 @@ class SMACrossover(BaseStrategy):
         self._api_key = api_key
         self._api_secret = (api_secret,)
         self._testnet = testnet
-        self.async_client = await AsyncClient().create(
+        self._clock = clock or Clock()
+        self.async_client = async_client or await ClientPool.get(
             api_key=api_key, api_secret=api_secret, testnet=testnet
         )
+        self._exchange_info = exchange_info or ExchangeInfoCache.instance(testnet)
         self._symbol_info, self._filters = await self.symbol_info()
         self._order_log_location = order_log_loc
         self._price_log_loc = price_log_loc
@@ -62,12 +89,99 @@ class SMACrossover(BaseStrategy):
         self._start_data_stream = start_data_stream
         self._end_data_stream = end_data_stream
         self._contract_type = contract_type
+
+        self._window = CandleWindow.instance(
+            symbol=symbol,
+            contract_type=contract_type,
+            interval=interval,
+            capacity=max(sma_long, sma_short),
+            scope=scope,
+        )
+        self._indicators = IndicatorEngine.instance(
+            symbol=symbol,
+            contract_type=contract_type,
+            interval=interval,
+            window=self._window,
+            scope=scope,
+        )
+        self._indicators.add("sma", sma_long)
+        self._indicators.add("sma", sma_short)
+
+        self._source_interval = None
+        self._source_window = None
+        if multiplex is not None and source_interval not in (None, interval):
+            self._source_interval = source_interval
+            self._source_window = CandleWindow.instance(
+                symbol=symbol,
+                contract_type=contract_type,
+                interval=source_interval,
+                capacity=2,
+                scope=scope,
+            )
+            ResampleEngine.instance(
+                symbol, contract_type, self._source_window, source_interval, scope
+            ).add(interval, self._window.capacity)
+
+        self._multiplex = multiplex
+        self._close_timeout = close_timeout
+        self._bar_offset = bar_offset
+        self._trigger = None
+        self._reactions = deque(maxlen=1000)
+
+        self._position_book = None
+        if use_position_book:
+            self._position_book = await PositionBook.for_account(
+                self.async_client, api_key, journal=self.journal
+            )
+
+        self._order_gateway = None
+        if use_order_gateway:
+            self._order_gateway = OrderGateway.for_account(
+                self.async_client, api_key, clock=self.clock
+            )
+
+        self._order_book = None
+        self._slippage = deque(maxlen=1000)
+        if order_books is not None:
+            self._order_book = await order_books.add(symbol)
         return self
 
     @property
     def price_log_loc(self):
         return self._price_log_loc
 
+    @property
+    def window(self):
+        return self._window
+
+    @property
+    def indicators(self):
+        return self._indicators
+
+    @property
+    def last_price(self):
+        return self.window.last_close
+
+    @property
+    def trigger(self):
+        return self._trigger
+
+    @property
+    def source_interval(self):
+        return self._source_interval or self.interval
+
+    @property
+    def reaction(self) -> dict:
+        if not self._reactions:
+            return {"n": 0, "p50": None, "p99": None, "last": None}
+        values = np.fromiter(self._reactions, dtype=np.float64)
+        return {
+            "n": len(values),
+            "p50": float(np.percentile(values, 50)),
+            "p99": float(np.percentile(values, 99)),
+            "last": float(values[-1]),
+        }
+
     @property
     def sma_short_length(self):
         return self._sma_short
@@ -81,15 +195,14 @@ class SMACrossover(BaseStrategy):
         return self._quantity
 
     async def get_curent_asset_position(self):
-        account_details = await self.async_client.futures_account()
-        account_details = ProcessAccountDetails(account_details).account_details
-        positions = account_details["positions"].loc[self.symbol.upper()]
+        if self._position_book is not None and self._position_book.is_live:
+            return self._position_book.side(self.symbol)
 
-        if float(positions["notional"]) > 0:
-            return "LONG"
-        if float(positions["notional"]) < 0:
-            return "SHORT"
-        return "NO_POSITION"
+        account = AccountSnapshot.instance(self._api_key)
+        account.apply_account(
+            await self._retry("account", self.async_client.futures_account)
+        )
+        return account.side(self.symbol)
 
     async def get_qty_to_trade(self):
         curr_pos = await self.get_curent_asset_position()
@@ -119,46 +232,100 @@ class SMACrossover(BaseStrategy):
             limit=self.limit,
             start=self.start_data_stream,
             end=self.end_data_stream,
+            window=self.window,
+            async_client=self.async_client,
+            clock=self.clock,
         )
 
         return data_stream
 
     def generate_signal(self):
-        curr_date = dt.datetime.strftime(dt.datetime.now(), "%Y_%M_%d_%H_%M")
-        file_name = f"{self.symbol}_{self.contract_type}_{self.interval}.csv"
-        file = f"{self.price_log_loc}/{curr_date}_{file_name}"
-        last_candle_data = pd.read_csv(file)
-        sma_long, sma_short = (
-            last_candle_data.tail(self.sma_long_length)["close"].mean(),
-            last_candle_data.tail(self.sma_short_length)["close"].mean(),
-        )
+        sma_long = self.indicators.value("sma", self.sma_long_length)
+        sma_short = self.indicators.value("sma", self.sma_short_length)
+        if sma_long is None or sma_short is None:
+            return None
 
         if sma_short > sma_long:
             return Side.Buy
         return Side.Sell
 
-    @staticmethod
-    def _time_to_sleep():
-        current_time = time.time()
-        time_to_sleep = 60 - (current_time % 60)
+    def _time_to_sleep(self):
+        current_time = self.clock.time()
+        close = Interval.bar_close(int(current_time * 1000), self.interval) / 1000
+        time_to_sleep = close - current_time
         return time_to_sleep + 1
 
+    async def bar_close_trigger(self):
+        if self._multiplex is None:
+            return None
+        if self._trigger is None:
+            self._trigger = await BarCloseTrigger.instance(
+                self._multiplex,
+                self.async_client,
+                self.symbol,
+                self.contract_type,
+                self.source_interval,
+                window=self._source_window or self.window,
+                timeout=self._close_timeout,
+                clock=self.clock,
+            )
+        return self._trigger
+
+    async def next_bar(self, data_stream):
+        if self._trigger is None:
+            await self.clock.sleep(self._time_to_sleep() + self._bar_offset)
+            await self._retry("klines", data_stream.stream_contract, 0)
+        else:
+            last = await self._trigger.wait()
+            if self._source_interval is not None:
+                await self._next_resampled_bar(data_stream, last)
+            if self._bar_offset:
+                await self.clock.sleep(self._bar_offset)
+
+    async def _next_resampled_bar(self, data_stream, last):
+        step = Interval.to_ms(self._source_interval)
+        while (
+            last is not None
+            and Interval.bar_open(last + step, self.interval) != last + step
+        ):
+            last = await self._trigger.wait()
+        if last is None:
+            return
+        target = Interval.bar_open(last, self.interval)
+        if self.window.last_open_time is None or self.window.last_open_time < target:
+            await self._retry("klines", data_stream.stream_contract, 0)
+
     async def run_strategy(self):
         data_stream = await self.stream_candles()
-        while self.start_time <= self.end_time:
-            await data_stream.stream_contract(self._time_to_sleep())
+        if await self.bar_close_trigger() is not None:
+            await self._retry("klines", data_stream.stream_contract, 0)
+
+        while not self.clock.simulated or self.clock.now() <= self.end_time:
+            try:
+                await self.next_bar(data_stream)
+                await self._on_bar()
+            except self.Retryable as e:
+                print(
+                    f"{dt.datetime.now()} {self.symbol} skipping bar after {self.MaxRetries} retries: {e}"
+                )
+
+    async def _on_bar(self):
+        with Latency.span(self.symbol, "signal"):
             signal = self.generate_signal()
+        now = int(self.clock.time() * 1000)
+        self._reactions.append(now - Interval.bar_open(now, self.interval))
+        with Latency.span(self.symbol, "position"):
             curr_pos = await self.get_curent_asset_position()
 
-            if curr_pos == "NO_POSITION":
-                if signal == Side.Buy:
-                    await self.buy()
-                elif signal == Side.Sell:
-                    await self.sell()
-            elif (curr_pos == "SHORT") and (signal == Side.Buy):
+        if curr_pos == "NO_POSITION":
+            if signal == Side.Buy:
                 await self.buy()
-            elif (curr_pos == "LONG") and (signal == Side.Sell):
+            elif signal == Side.Sell:
                 await self.sell()
+        elif (curr_pos == "SHORT") and (signal == Side.Buy):
+            await self.buy()
+        elif (curr_pos == "LONG") and (signal == Side.Sell):
+            await self.sell()
 
 
 async def SMAStrategyRun(
@@ -178,6 +345,12 @@ async def SMAStrategyRun(
     sma_long: int,
     sma_short: int,
     quantity: float,
+    use_position_book: bool = True,
+    clock: Clock = None,
+    multiplex: MultiplexStream = None,
+    use_order_gateway: bool = False,
+    source_interval: str = None,
+    order_books: OrderBookStream = None,
 ):
     sma = await SMACrossover.create(
         api_key=api_key,
@@ -196,10 +369,16 @@ async def SMAStrategyRun(
         sma_long=sma_long,
         sma_short=sma_short,
         quantity=quantity,
+        use_position_book=use_position_book,
+        clock=clock,
+        multiplex=multiplex,
+        use_order_gateway=use_order_gateway,
+        source_interval=source_interval,
+        order_books=order_books,
     )
 
     await sma.run_strategy()
-    await sma.async_client.close_connection()
+    ClientPool.release(sma.async_client)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+import heapq
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from binance_trader.strategy.modules.backtest import Backtest
+
+
+class SharedPrices:
+    def __init__(self, prices: dict) -> None:
+        self._layout = {}
+        offset = 0
+        for symbol, close in prices.items():
+            self._layout[symbol] = (offset, len(close))
+            offset += len(close)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+        buffer = np.ndarray((offset,), dtype=np.float64, buffer=self._shm.buf)
+        for symbol, close in prices.items():
+            lo, n = self._layout[symbol]
+            buffer[lo : lo + n] = close
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._shm.name} | {len(self._layout)} symbols | {self.nbytes / 1e6:.1f} MB ]"
+
+    @property
+    def spec(self) -> tuple:
+        return (self._shm.name, self._layout)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(n for _, n in self._layout.values()) * 8
+
+    @property
+    def symbols(self) -> list:
+        return list(self._layout)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+_worker = {}
+
+
+def _attach(spec: tuple, fee_rate: float, slippage_bps: float) -> None:
+    name, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+
+    total = sum(n for _, n in layout.values())
+    buffer = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+    _worker["shm"] = shm
+    _worker["backtests"] = {
+        symbol: Backtest(
+            buffer[lo : lo + n], fee_rate=fee_rate, slippage_bps=slippage_bps
+        )
+        for symbol, (lo, n) in layout.items()
+    }
+
+
+def _evaluate(batch: list) -> list:
+    results = []
+    for symbol, sma_long, sma_short, quantity in batch:
+        result = _worker["backtests"][symbol].sma_crossover(
+            sma_long, sma_short, quantity
+        )
+        results.append(
+            {
+                "symbol": symbol,
+                "sma_long": sma_long,
+                "sma_short": sma_short,
+                "quantity": quantity,
+                **result.summary(),
+            }
+        )
+    return results
+
+
+class ParameterSweep:
+    def __init__(
+        self,
+        prices: dict,
+        fee_rate: float = 0.0004,
+        slippage_bps: float = 1.0,
+        max_workers: int = None,
+        max_memory_mb: float = None,
+        batch_size: int = 32,
+        metric: str = "pnl",
+        top: int = 50,
+    ) -> None:
+        self._prices = prices
+        self._fee_rate = fee_rate
+        self._slippage_bps = slippage_bps
+        self._batch_size = batch_size
+        self._metric = metric
+        self._top = top
+        self._max_workers = self._workers(max_workers, max_memory_mb)
+        self._ranked = []
+        self._evaluated = 0
+        self._seq = itertools.count()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._max_workers} workers | {self._evaluated} evaluated | by {self._metric} ]"
+
+    @property
+    def evaluated(self) -> int:
+        return self._evaluated
+
+    @staticmethod
+    def grid(symbols: list, longs, shorts, quantities) -> list:
+        return [
+            (symbol, sma_long, sma_short, quantity)
+            for symbol in symbols
+            for sma_long in longs
+            for sma_short in shorts
+            for quantity in quantities
+            if sma_short < sma_long
+        ]
+
+    @staticmethod
+    def random(
+        symbols: list,
+        n: int,
+        long_range: tuple,
+        short_range: tuple,
+        quantities: list,
+        seed: int = None,
+    ) -> list:
+        rng = np.random.default_rng(seed)
+        params = set()
+        attempts = 0
+        while len(params) < n and attempts < n * 20:
+            attempts += 1
+            sma_long = int(rng.integers(*long_range, endpoint=True))
+            sma_short = int(rng.integers(*short_range, endpoint=True))
+            if sma_short >= sma_long:
+                continue
+            params.add(
+                (
+                    symbols[int(rng.integers(len(symbols)))],
+                    sma_long,
+                    sma_short,
+                    quantities[int(rng.integers(len(quantities)))],
+                )
+            )
+        return sorted(params)
+
+    def run(self, params: list, on_result=None) -> pd.DataFrame:
+        shared = SharedPrices(self._prices)
+        batches = iter(
+            [
+                params[i : i + self._batch_size]
+                for i in range(0, len(params), self._batch_size)
+            ]
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                initializer=_attach,
+                initargs=(shared.spec, self._fee_rate, self._slippage_bps),
+            ) as pool:
+                pending = {
+                    pool.submit(_evaluate, batch)
+                    for batch in itertools.islice(batches, self._max_workers * 2)
+                }
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for result in future.result():
+                            self._rank(result)
+                            if on_result is not None:
+                                on_result(result)
+                        batch = next(batches, None)
+                        if batch is not None:
+                            pending.add(pool.submit(_evaluate, batch))
+        finally:
+            shared.close()
+        return self.table()
+
+    def table(self) -> pd.DataFrame:
+        rows = [row for _, _, row in sorted(self._ranked, reverse=True)]
+        return pd.DataFrame(rows)
+
+    def _rank(self, result: dict) -> None:
+        self._evaluated += 1
+        entry = (result[self._metric], next(self._seq), result)
+        if len(self._ranked) < self._top:
+            heapq.heappush(self._ranked, entry)
+        elif entry[0] > self._ranked[0][0]:
+            heapq.heapreplace(self._ranked, entry)
+
+    def _workers(self, max_workers: int, max_memory_mb: float) -> int:
+        workers = max_workers or os.cpu_count() or 1
+        if max_memory_mb is not None:
+            bars = sum(len(close) for close in self._prices.values())
+            per_worker_mb = 64 + bars * 8 * 8 / 1e6
+            workers = min(workers, max(1, int(max_memory_mb // per_worker_mb)))
+        return workers
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(7)
+    prices = {
+        symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, 525_600)))
+        for symbol in ("BTCUSDT", "ETHUSDT")
+    }
+    sweep = ParameterSweep(prices, max_memory_mb=4096)
+    params = ParameterSweep.grid(
+        list(prices), range(20, 101, 8), range(5, 41, 5), [0.01]
+    )
+
+    start = time.perf_counter()
+    table = sweep.run(params)
+    took = time.perf_counter() - start
+    print(sweep, f"{len(params)} runs in {took:.2f}s")
+    print(table.head(10))
@@ -0,0 +1,563 @@
+import asyncio
+import datetime as dt
+import glob
+import itertools
+import tempfile
+
+import numpy as np
+import pandas as pd
+from binance.enums import *
+from binance_trader.data.modules.candle_archive import CandleArchive
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.clock import Clock, SimulatedClock
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.exchange_info import ExchangeInfoCache
+from binance_trader.data.modules.indicators import IndicatorEngine
+from binance_trader.data.modules.resampler import ResampleEngine
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.strategy.modules.custom_strategy.sma_crossover import SMACrossover
+from binance_trader.strategy.modules.models.models import ContractType
+from binance_trader.user.modules.account_snapshot import AccountSnapshot
+
+
+class ReplayFeed:
+    def __init__(
+        self,
+        open_time: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray = None,
+        interval: str = "1m",
+    ) -> None:
+        self._open_time = np.asarray(open_time, dtype=np.int64)
+        self._close_time = self._open_time + Interval.to_ms(interval) - 1
+        self._open = np.asarray(open, dtype=np.float64)
+        self._high = np.asarray(high, dtype=np.float64)
+        self._low = np.asarray(low, dtype=np.float64)
+        self._close = np.asarray(close, dtype=np.float64)
+        self._volume = (
+            np.zeros(len(self._open_time))
+            if volume is None
+            else np.asarray(volume, dtype=np.float64)
+        )
+        self._interval = interval
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._interval} | {len(self)} bars ]"
+
+    def __len__(self) -> int:
+        return len(self._open_time)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: ColumnarStore,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        start: int = None,
+        end: int = None,
+    ) -> "ReplayFeed":
+        rows = store.series(symbol, contract_type, interval).range(start, end)
+        return cls(
+            rows["open_time"],
+            rows["open"],
+            rows["high"],
+            rows["low"],
+            rows["close"],
+            rows["volume"],
+            interval=interval,
+        )
+
+    @classmethod
+    def from_archive(
+        cls,
+        archive: CandleArchive,
+        symbol: str,
+        contract_type: str,
+        interval: str,
+        start: int = None,
+        end: int = None,
+    ) -> "ReplayFeed":
+        rows = archive.range(symbol, contract_type, interval, start, end)
+        return cls(
+            rows["open_time"],
+            rows["open"],
+            rows["high"],
+            rows["low"],
+            rows["close"],
+            rows["volume"],
+            interval=interval,
+        )
+
+    @classmethod
+    def from_candle_csv(
+        cls, price_log_loc: str, symbol: str, contract_type: str, interval: str
+    ) -> "ReplayFeed":
+        files = sorted(
+            glob.glob(f"{price_log_loc}/*{symbol}_{contract_type}_{interval}.csv")
+        )
+        data = pd.concat([pd.read_csv(file) for file in files])
+        data["open_time"] = [
+            int(dt.datetime.strptime(t, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+            for t in data["open_time"]
+        ]
+        data = data.drop_duplicates("open_time", keep="last").sort_values("open_time")
+        return cls(
+            data["open_time"],
+            data["open"],
+            data["high"],
+            data["low"],
+            data["close"],
+            interval=interval,
+        )
+
+    @classmethod
+    def from_stream_csv(
+        cls, price_log_loc: str, symbol: str, contract_type: str, interval: str
+    ) -> "ReplayFeed":
+        file = (
+            f"{price_log_loc}/{symbol.lower()}_{contract_type.lower()}_{interval}.csv"
+        )
+        data = pd.read_csv(file)
+        data = data[data["is_closed"].astype(str) == "True"]
+        data = data.drop_duplicates("k_start_time", keep="last").sort_values(
+            "k_start_time"
+        )
+        return cls(
+            data["k_start_time"],
+            data["open"],
+            data["high"],
+            data["low"],
+            data["close"],
+            data["base_asset_vol"],
+            interval=interval,
+        )
+
+    @property
+    def interval(self) -> str:
+        return self._interval
+
+    @property
+    def start(self) -> int:
+        return int(self._open_time[0])
+
+    @property
+    def end(self) -> int:
+        return int(self._close_time[-1])
+
+    def closed(self, now: int) -> int:
+        return int(np.searchsorted(self._close_time, now, side="left"))
+
+    def price(self, now: int) -> float:
+        i = self.closed(now)
+        if i < len(self) and self._open_time[i] <= now:
+            return float(self._open[i])
+        if i == 0:
+            raise ValueError(f"no price before {now}")
+        return float(self._close[i - 1])
+
+    def kline(self, i: int, price: float = None) -> list:
+        if price is None:
+            o, h, l, c, v = (
+                str(self._open[i]),
+                str(self._high[i]),
+                str(self._low[i]),
+                str(self._close[i]),
+                str(self._volume[i]),
+            )
+        else:
+            o = h = l = c = str(price)
+            v = "0"
+        return [
+            int(self._open_time[i]),
+            o,
+            h,
+            l,
+            c,
+            v,
+            int(self._close_time[i]),
+            "0",
+            0,
+            "0",
+            "0",
+            "0",
+        ]
+
+    def klines(self, now: int, limit: int = 500, start: int = None) -> list:
+        hi = self.closed(now)
+        lo = max(hi - limit, 0)
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(self._open_time, start)))
+        rows = [self.kline(i) for i in range(lo, hi)]
+        if hi < len(self) and self._open_time[hi] <= now:
+            rows.append(self.kline(hi, price=self._open[hi]))
+        return rows[-limit:]
+
+
+class SimulatedExchange:
+    def __init__(
+        self,
+        feeds: dict,
+        clock: Clock,
+        balance: float = 10_000.0,
+        fee_rate: float = 0.0004,
+        slippage_bps: float = 1.0,
+        tick_size: float = 0.1,
+        step_size: float = 0.001,
+        min_notional: float = 5.0,
+    ) -> None:
+        self._feeds = {symbol.upper(): feed for symbol, feed in feeds.items()}
+        self._clock = clock
+        self._balance = balance
+        self._fee_rate = fee_rate
+        self._slippage = slippage_bps / 10_000
+        self._tick_size = tick_size
+        self._step_size = step_size
+        self._min_notional = min_notional
+        self._positions = {
+            symbol: {"amount": 0.0, "entry_price": 0.0, "update_time": 0}
+            for symbol in self._feeds
+        }
+        self._order_ids = itertools.count(1)
+        self._fills = []
+        self._fees = 0.0
+        self._realized = 0.0
+        self._requests = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {len(self._feeds)} symbols | {len(self._fills)} fills | balance {self._balance:.2f} ]"
+
+    @property
+    def now(self) -> int:
+        return int(self._clock.time() * 1000)
+
+    @property
+    def fills(self) -> pd.DataFrame:
+        return pd.DataFrame(self._fills)
+
+    @property
+    def stats(self) -> dict:
+        unrealized = sum(self._unrealized(symbol) for symbol in self._feeds)
+        return {
+            "balance": self._balance,
+            "realized_pnl": self._realized,
+            "unrealized_pnl": unrealized,
+            "fees": self._fees,
+            "fills": len(self._fills),
+            "requests": self._requests,
+        }
+
+    @property
+    def symbols(self) -> list:
+        return list(self._feeds)
+
+    def feed(self, symbol: str) -> ReplayFeed:
+        return self._feeds[symbol.upper()]
+
+    def position(self, symbol: str) -> dict:
+        return dict(self._positions[symbol.upper()])
+
+    async def ping(self):
+        return {}
+
+    async def close_connection(self):
+        return None
+
+    async def futures_continous_klines(
+        self, pair: str, limit: int = 500, startTime=None, **kwargs
+    ) -> list:
+        self._requests += 1
+        start = startTime if isinstance(startTime, int) else None
+        return self._feeds[pair.upper()].klines(self.now, limit, start)
+
+    async def futures_exchange_info(self, **kwargs) -> dict:
+        self._requests += 1
+        return {"symbols": [self._symbol_info(symbol) for symbol in self._feeds]}
+
+    async def get_symbol_info(self, symbol: str) -> dict:
+        self._requests += 1
+        return self._symbol_info(symbol.upper())
+
+    async def get_avg_price(self, symbol: str, **kwargs) -> dict:
+        self._requests += 1
+        return {"mins": 5, "price": str(self._feeds[symbol.upper()].price(self.now))}
+
+    async def futures_account(self, **kwargs) -> dict:
+        self._requests += 1
+        unrealized = sum(self._unrealized(symbol) for symbol in self._feeds)
+        return {
+            "canTrade": True,
+            "totalWalletBalance": str(self._balance),
+            "totalUnrealizedProfit": str(unrealized),
+            "totalMarginBalance": str(self._balance + unrealized),
+            "assets": [
+                {
+                    "asset": "USDT",
+                    "walletBalance": str(self._balance),
+                    "unrealizedProfit": str(unrealized),
+                    "marginBalance": str(self._balance + unrealized),
+                }
+            ],
+            "positions": [
+                {
+                    "symbol": symbol,
+                    "positionAmt": str(pos["amount"]),
+                    "entryPrice": str(pos["entry_price"]),
+                    "unrealizedProfit": str(self._unrealized(symbol)),
+                    "notional": str(
+                        pos["amount"] * self._feeds[symbol].price(self.now)
+                    ),
+                    "positionSide": "BOTH",
+                    "updateTime": pos["update_time"],
+                }
+                for symbol, pos in self._positions.items()
+            ],
+        }
+
+    async def futures_create_order(
+        self, symbol: str, side: str, type: str, quantity: float, **kwargs
+    ) -> dict:
+        self._requests += 1
+        if type != FUTURE_ORDER_TYPE_MARKET:
+            raise NotImplementedError(f"{type} orders are not simulated")
+
+        symbol = symbol.upper()
+        quantity = float(quantity)
+        sign = 1.0 if side == SIDE_BUY else -1.0
+        price = self._feeds[symbol].price(self.now) * (1 + sign * self._slippage)
+        fee = price * quantity * self._fee_rate
+        realized = self._fill(symbol, sign * quantity, price)
+        self._balance += realized - fee
+        self._realized += realized
+        self._fees += fee
+
+        order_id = next(self._order_ids)
+        self._fills.append(
+            {
+                "time": self.now,
+                "symbol": symbol,
+                "side": side,
+                "quantity": quantity,
+                "price": price,
+                "fee": fee,
+                "realized_pnl": realized,
+                "position": self._positions[symbol]["amount"],
+            }
+        )
+        return {
+            "orderId": order_id,
+            "symbol": symbol,
+            "status": ORDER_STATUS_FILLED,
+            "clientOrderId": f"replay-{order_id}",
+            "price": "0",
+            "avgPrice": str(price),
+            "origQty": str(quantity),
+            "executedQty": str(quantity),
+            "cumQty": str(quantity),
+            "cumQuote": str(price * quantity),
+            "timeInForce": TIME_IN_FORCE_GTC,
+            "type": type,
+            "reduceOnly": False,
+            "closePosition": False,
+            "side": side,
+            "positionSide": "BOTH",
+            "stopPrice": "0",
+            "workingType": "CONTRACT_PRICE",
+            "priceProtect": False,
+            "origType": type,
+            "updateTime": self.now,
+        }
+
+    async def futures_place_batch_order(self, batchOrders: list, **kwargs) -> list:
+        results = []
+        for order in batchOrders:
+            try:
+                results.append(await self.futures_create_order(**order))
+            except Exception as e:
+                results.append({"code": -1000, "msg": str(e)})
+            self._requests -= 1
+        self._requests += 1
+        return results
+
+    def _fill(self, symbol: str, signed_qty: float, price: float) -> float:
+        pos = self._positions[symbol]
+        amount, entry = pos["amount"], pos["entry_price"]
+        realized = 0.0
+
+        if amount == 0 or (amount > 0) == (signed_qty > 0):
+            total = amount + signed_qty
+            entry = (entry * abs(amount) + price * abs(signed_qty)) / abs(total)
+        else:
+            closing = min(abs(signed_qty), abs(amount))
+            realized = closing * (price - entry) * (1.0 if amount > 0 else -1.0)
+            total = amount + signed_qty
+            if abs(signed_qty) > abs(amount):
+                entry = price
+            elif abs(total) < 1e-12:
+                total, entry = 0.0, 0.0
+
+        pos["amount"] = round(total, 12)
+        pos["entry_price"] = entry
+        pos["update_time"] = self.now
+        return realized
+
+    def _unrealized(self, symbol: str) -> float:
+        pos = self._positions[symbol]
+        if not pos["amount"]:
+            return 0.0
+        return pos["amount"] * (
+            self._feeds[symbol].price(self.now) - pos["entry_price"]
+        )
+
+    def _symbol_info(self, symbol: str) -> dict:
+        return {
+            "symbol": symbol,
+            "pair": symbol,
+            "contractType": ContractType.Perpetual,
+            "status": "TRADING",
+            "filters": [
+                {"filterType": "PRICE_FILTER", "tickSize": str(self._tick_size)},
+                {
+                    "filterType": "LOT_SIZE",
+                    "stepSize": str(self._step_size),
+                    "minQty": str(self._step_size),
+                    "maxQty": "1000",
+                },
+                {
+                    "filterType": "MARKET_LOT_SIZE",
+                    "stepSize": str(self._step_size),
+                    "minQty": str(self._step_size),
+                    "maxQty": "1000",
+                },
+                {"filterType": "MIN_NOTIONAL", "notional": str(self._min_notional)},
+            ],
+        }
+
+
+class Replay:
+    def __init__(
+        self,
+        feeds: dict,
+        contract_type: str = ContractType.Perpetual,
+        balance: float = 10_000.0,
+        fee_rate: float = 0.0004,
+        slippage_bps: float = 1.0,
+        order_log_loc: str = None,
+        price_log_loc: str = None,
+    ) -> None:
+        self._feeds = feeds
+        self._contract_type = contract_type
+        self._order_log_loc = order_log_loc or tempfile.mkdtemp(prefix="replay_orders_")
+        self._price_log_loc = price_log_loc or tempfile.mkdtemp(prefix="replay_prices_")
+        self._clock = SimulatedClock(min(feed.start for feed in feeds.values()) / 1000)
+        self._exchange = SimulatedExchange(
+            feeds,
+            self._clock,
+            balance=balance,
+            fee_rate=fee_rate,
+            slippage_bps=slippage_bps,
+        )
+        self._exchange_info = ExchangeInfoCache()
+        self._scope = f"replay-{id(self)}"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._clock} | {self._exchange} ]"
+
+    @property
+    def clock(self) -> SimulatedClock:
+        return self._clock
+
+    @property
+    def exchange(self) -> SimulatedExchange:
+        return self._exchange
+
+    @property
+    def end_time(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(
+            max(feed.end for feed in self._feeds.values()) / 1000
+        )
+
+    async def sma_crossover(
+        self, symbol: str, sma_long: int, sma_short: int, quantity: float
+    ) -> SMACrossover:
+        strategy = await SMACrossover.create(
+            api_key="replay",
+            api_secret="replay",
+            testnet=True,
+            interval=self._feeds[symbol].interval,
+            symbol=symbol,
+            order_log_loc=self._order_log_loc,
+            price_log_loc=self._price_log_loc,
+            start_time=self._clock.now(),
+            end_time=self.end_time,
+            limit=sma_long + 1,
+            start_data_stream="",
+            end_data_stream="",
+            contract_type=self._contract_type,
+            sma_long=sma_long,
+            sma_short=sma_short,
+            quantity=quantity,
+            use_position_book=False,
+            async_client=self._exchange,
+            clock=self._clock,
+            exchange_info=self._exchange_info,
+            scope=self._scope,
+        )
+        strategy.window.clear()
+        return strategy
+
+    async def run(self, strategies: list) -> dict:
+        await self._exchange_info.load(self._exchange, force=True)
+        AccountSnapshot.clear("replay")
+        bots = [await self.sma_crossover(**params) for params in strategies]
+        driver = asyncio.ensure_future(self._clock.run())
+        try:
+            await asyncio.gather(*[bot.run_strategy() for bot in bots])
+        finally:
+            driver.cancel()
+            CandleWindow.drop(self._scope)
+            IndicatorEngine.drop(self._scope)
+            ResampleEngine.drop(self._scope)
+        return self._exchange.stats
+
+
+if __name__ == "__main__":
+    import time
+
+    bars = 1440
+    rng = np.random.default_rng(7)
+    start = int(dt.datetime(2022, 9, 5).timestamp() * 1000)
+    open_time = start + np.arange(bars) * 60_000
+    feeds = {}
+    for symbol, base in (("BTCUSDT", 20_000), ("ETHUSDT", 1_500)):
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.0008, bars)))
+        open = np.concatenate(([base], close[:-1]))
+        feeds[symbol] = ReplayFeed(
+            open_time,
+            open,
+            np.maximum(open, close),
+            np.minimum(open, close),
+            close,
+        )
+
+    replay = Replay(feeds)
+    took = time.perf_counter()
+    stats = asyncio.run(
+        replay.run(
+            [
+                {
+                    "symbol": "BTCUSDT",
+                    "sma_long": 12,
+                    "sma_short": 10,
+                    "quantity": 0.01,
+                },
+                {"symbol": "ETHUSDT", "sma_long": 26, "sma_short": 9, "quantity": 0.1},
+            ]
+        )
+    )
+    took = time.perf_counter() - took
+    print(replay, f"{bars} bars replayed in {took:.2f}s")
+    print(stats)
@@ -0,0 +1,369 @@
+class PositionRecord:
+    __slots__ = (
+        "symbol",
+        "amount",
+        "entry_price",
+        "unrealized_pnl",
+        "notional",
+        "leverage",
+        "update_time",
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        amount: float = 0.0,
+        entry_price: float = 0.0,
+        unrealized_pnl: float = 0.0,
+        notional: float = 0.0,
+        leverage: int = 0,
+        update_time: int = 0,
+    ) -> None:
+        self.symbol = symbol
+        self.amount = amount
+        self.entry_price = entry_price
+        self.unrealized_pnl = unrealized_pnl
+        self.notional = notional
+        self.leverage = leverage
+        self.update_time = update_time
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.symbol} | {self.amount} @ {self.entry_price} | {self.side} ]"
+
+    @property
+    def side(self) -> str:
+        if self.amount > 0:
+            return "LONG"
+        if self.amount < 0:
+            return "SHORT"
+        return "NO_POSITION"
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AssetRecord:
+    __slots__ = (
+        "asset",
+        "wallet_balance",
+        "unrealized_pnl",
+        "margin_balance",
+        "available_balance",
+        "update_time",
+    )
+
+    def __init__(
+        self,
+        asset: str,
+        wallet_balance: float = 0.0,
+        unrealized_pnl: float = 0.0,
+        margin_balance: float = 0.0,
+        available_balance: float = 0.0,
+        update_time: int = 0,
+    ) -> None:
+        self.asset = asset
+        self.wallet_balance = wallet_balance
+        self.unrealized_pnl = unrealized_pnl
+        self.margin_balance = margin_balance
+        self.available_balance = available_balance
+        self.update_time = update_time
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self.asset} | {self.wallet_balance} ]"
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AccountSnapshot:
+    _snapshots: dict = {}
+
+    def __init__(self) -> None:
+        self._positions = {}
+        self._assets = {}
+        self._can_trade = None
+        self._balance = 0.0
+        self._changed = set()
+        self._snapshots_applied = 0
+        self._events_applied = 0
+        self._parsed = 0
+        self._skipped = 0
+
+    def __repr__(self) -> str:
+        open_positions = sum(1 for p in self._positions.values() if p.amount)
+        return f"{self.__class__.__name__} [ {len(self._positions)} symbols | {open_positions} open | balance {self._balance} ]"
+
+    @classmethod
+    def instance(cls, api_key: str) -> "AccountSnapshot":
+        snapshot = cls._snapshots.get(api_key)
+        if snapshot is None:
+            snapshot = cls._snapshots[api_key] = cls()
+        return snapshot
+
+    @classmethod
+    def clear(cls, api_key: str = None) -> None:
+        if api_key is None:
+            cls._snapshots.clear()
+        else:
+            cls._snapshots.pop(api_key, None)
+
+    @classmethod
+    def from_response(cls, resp: dict) -> "AccountSnapshot":
+        snapshot = cls()
+        snapshot.apply_account(resp)
+        return snapshot
+
+    @property
+    def can_trade(self) -> bool:
+        return self._can_trade
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+    @property
+    def changed(self) -> set:
+        return self._changed
+
+    @property
+    def positions(self) -> dict:
+        return self._positions
+
+    @property
+    def assets(self) -> dict:
+        return self._assets
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._positions),
+            "snapshots": self._snapshots_applied,
+            "events": self._events_applied,
+            "parsed": self._parsed,
+            "skipped": self._skipped,
+        }
+
+    def position(self, symbol: str) -> PositionRecord:
+        record = self._positions.get(symbol.upper())
+        return record if record is not None else PositionRecord(symbol.upper())
+
+    def side(self, symbol: str) -> str:
+        return self.position(symbol).side
+
+    def asset(self, asset: str) -> AssetRecord:
+        record = self._assets.get(asset.upper())
+        return record if record is not None else AssetRecord(asset.upper())
+
+    def apply_account(self, resp: dict) -> set:
+        self._snapshots_applied += 1
+        self._can_trade = resp.get("canTrade", self._can_trade)
+        if "totalWalletBalance" in resp:
+            self._balance = float(resp["totalWalletBalance"])
+
+        for asset in resp.get("assets", ()):
+            self._set_asset(
+                asset["asset"],
+                float(asset["walletBalance"]),
+                float(asset.get("unrealizedProfit", 0.0)),
+                float(asset.get("marginBalance", 0.0)),
+                float(asset.get("availableBalance", 0.0)),
+                int(asset.get("updateTime", 0)),
+            )
+
+        changed = set()
+        positions = self._positions
+        for pos in resp.get("positions", ()):
+            if pos.get("positionSide", "BOTH") != "BOTH":
+                continue
+            symbol = pos["symbol"]
+            update_time = int(pos.get("updateTime", 0))
+            record = positions.get(symbol)
+            if record is not None and record.update_time == update_time:
+                self._skipped += 1
+                if record.amount:
+                    record.unrealized_pnl = float(pos["unrealizedProfit"])
+                    record.notional = float(pos.get("notional", 0.0))
+                continue
+            if self._set_position(
+                symbol,
+                float(pos["positionAmt"]),
+                float(pos["entryPrice"]),
+                float(pos["unrealizedProfit"]),
+                float(pos.get("notional", 0.0)),
+                int(pos.get("leverage", 0)),
+                update_time,
+            ):
+                changed.add(symbol)
+        self._changed = changed
+        return changed
+
+    def apply_update(self, msg: dict) -> set:
+        self._events_applied += 1
+        event_time = int(msg.get("T", msg.get("E", 0)))
+        update = msg["a"]
+        for balance in update.get("B", ()):
+            record = self.asset(balance["a"])
+            self._set_asset(
+                balance["a"],
+                float(balance["wb"]),
+                record.unrealized_pnl,
+                record.margin_balance,
+                float(balance.get("cw", record.available_balance)),
+                event_time,
+            )
+
+        changed = set()
+        for pos in update.get("P", ()):
+            if pos.get("ps", "BOTH") != "BOTH":
+                continue
+            amount = float(pos["pa"])
+            entry_price = float(pos["ep"])
+            if self._set_position(
+                pos["s"],
+                amount,
+                entry_price,
+                float(pos["up"]),
+                amount * entry_price,
+                self.position(pos["s"]).leverage,
+                event_time,
+            ):
+                changed.add(pos["s"])
+        self._changed = changed
+        return changed
+
+    def to_frame(self) -> dict:
+        import pandas as pd
+
+        return {
+            "assets": pd.DataFrame(
+                [record.as_dict() for record in self._assets.values()],
+                columns=AssetRecord.__slots__,
+            ).set_index("asset"),
+            "positions": pd.DataFrame(
+                [record.as_dict() for record in self._positions.values()],
+                columns=PositionRecord.__slots__,
+            ).set_index("symbol"),
+        }
+
+    def _set_asset(
+        self,
+        asset: str,
+        wallet_balance: float,
+        unrealized_pnl: float,
+        margin_balance: float,
+        available_balance: float,
+        update_time: int,
+    ) -> None:
+        record = self._assets.get(asset)
+        if record is None:
+            self._assets[asset] = AssetRecord(
+                asset,
+                wallet_balance,
+                unrealized_pnl,
+                margin_balance,
+                available_balance,
+                update_time,
+            )
+            return
+        if update_time < record.update_time:
+            return
+        record.wallet_balance = wallet_balance
+        record.unrealized_pnl = unrealized_pnl
+        record.margin_balance = margin_balance
+        record.available_balance = available_balance
+        record.update_time = update_time
+
+    def _set_position(
+        self,
+        symbol: str,
+        amount: float,
+        entry_price: float,
+        unrealized_pnl: float,
+        notional: float,
+        leverage: int,
+        update_time: int,
+    ) -> bool:
+        self._parsed += 1
+        record = self._positions.get(symbol)
+        if record is None:
+            self._positions[symbol] = PositionRecord(
+                symbol,
+                amount,
+                entry_price,
+                unrealized_pnl,
+                notional,
+                leverage,
+                update_time,
+            )
+            return True
+        if update_time < record.update_time:
+            return False
+        moved = record.amount != amount or record.entry_price != entry_price
+        record.amount = amount
+        record.entry_price = entry_price
+        record.unrealized_pnl = unrealized_pnl
+        record.notional = notional
+        record.leverage = leverage
+        record.update_time = update_time
+        return moved
+
+
+if __name__ == "__main__":
+    import time
+
+    from binance_trader.user.modules.process_account_details import (
+        ProcessAccountDetails,
+    )
+
+    symbols = 300
+    resp = {
+        "canTrade": True,
+        "totalWalletBalance": "10000.0",
+        "assets": [
+            {
+                "asset": asset,
+                "walletBalance": "1000.0",
+                "unrealizedProfit": "0.0",
+                "marginBalance": "1000.0",
+                "availableBalance": "1000.0",
+                "updateTime": 0,
+            }
+            for asset in ("USDT", "BUSD", "BNB")
+        ],
+        "positions": [
+            {
+                "symbol": f"S{i:03d}USDT",
+                "positionAmt": "0.0",
+                "entryPrice": "0.0",
+                "unrealizedProfit": "0.0",
+                "notional": "0",
+                "leverage": "20",
+                "positionSide": "BOTH",
+                "updateTime": 0,
+            }
+            for i in range(symbols)
+        ],
+    }
+    n = 2_000
+
+    start = time.perf_counter()
+    for _ in range(n):
+        ProcessAccountDetails(resp).account_details["positions"].loc["S007USDT"][
+            "notional"
+        ]
+    pandas_took = (time.perf_counter() - start) / n
+
+    snapshot = AccountSnapshot()
+    start = time.perf_counter()
+    for i in range(n):
+        resp["positions"][7]["positionAmt"] = str(0.01 * (i % 3 - 1))
+        resp["positions"][7]["updateTime"] = i + 1
+        snapshot.apply_account(resp)
+        snapshot.side("S007USDT")
+    snapshot_took = (time.perf_counter() - start) / n
+
+    print(
+        f"{symbols} symbols: pandas {pandas_took * 1e6:.0f} us, snapshot {snapshot_took * 1e6:.0f} us per refresh"
+    )
+    print(snapshot, snapshot.stats, snapshot.changed)
+    print(snapshot.to_frame()["positions"].head(3))
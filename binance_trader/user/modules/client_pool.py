@@ -0,0 +1,184 @@
+import asyncio
+import inspect
+import time
+
+import aiohttp
+from binance import AsyncClient
+
+
+class ThrottledClient:
+    def __init__(self, client: AsyncClient, semaphore: asyncio.Semaphore) -> None:
+        self._client = client
+        self._semaphore = semaphore
+        self._calls = 0
+        self._in_flight = 0
+        self._waited = 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._in_flight} in flight | {self._calls} calls | waited {self._waited:.2f}s ]"
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def throttled(*args, **kwargs):
+            queued = time.perf_counter()
+            async with self._semaphore:
+                self._waited += time.perf_counter() - queued
+                self._calls += 1
+                self._in_flight += 1
+                try:
+                    return await attr(*args, **kwargs)
+                finally:
+                    self._in_flight -= 1
+
+        return throttled
+
+    @property
+    def client(self) -> AsyncClient:
+        return self._client
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "calls": self._calls,
+            "in_flight": self._in_flight,
+            "waited": self._waited,
+        }
+
+    async def close_connection(self):
+        return await self._client.close_connection()
+
+
+class PooledClient(AsyncClient):
+    def __init__(self, *args, **kwargs) -> None:
+        self.usage = {"in_use": 0, "opened": 0, "reused": 0}
+        super().__init__(*args, **kwargs)
+        for name, url in ClientPool._endpoints.items():
+            setattr(self, name, url)
+
+    def _init_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            headers=self._get_headers(),
+            connector=aiohttp.TCPConnector(
+                limit=ClientPool._limit,
+                keepalive_timeout=ClientPool._keepalive_timeout,
+            ),
+            trace_configs=[ClientPool._trace(self.usage)],
+        )
+
+
+class ClientPool:
+    _clients: dict = {}
+    _refs: dict = {}
+    _usage: dict = {}
+    _locks: dict = {}
+    _limit = 20
+    _keepalive_timeout = 60.0
+    _endpoints: dict = {}
+    _semaphore = None
+
+    @classmethod
+    def configure(
+        cls,
+        limit: int = 20,
+        keepalive_timeout: float = 60.0,
+        endpoints: dict = None,
+        max_concurrent_requests: int = None,
+    ) -> None:
+        cls._limit = limit
+        cls._keepalive_timeout = keepalive_timeout
+        cls._endpoints = dict(endpoints or {})
+        cls._semaphore = (
+            asyncio.Semaphore(max_concurrent_requests)
+            if max_concurrent_requests
+            else None
+        )
+
+    @classmethod
+    async def get(
+        cls, api_key: str = None, api_secret: str = None, testnet: bool = True
+    ) -> AsyncClient:
+        key = (api_key, testnet)
+        lock = cls._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            client = cls._clients.get(key)
+            if client is None or client.session.closed:
+                client = cls._clients[key] = await cls._connect(
+                    api_key, api_secret, testnet
+                )
+                cls._refs[key] = 0
+            cls._refs[key] += 1
+        return client
+
+    @classmethod
+    def release(cls, client: AsyncClient) -> None:
+        for key, pooled in cls._clients.items():
+            if pooled is client:
+                cls._refs[key] = max(cls._refs[key] - 1, 0)
+                return
+
+    @classmethod
+    async def close_all(cls) -> None:
+        clients = list(cls._clients.values())
+        cls._clients.clear()
+        cls._refs.clear()
+        cls._locks.clear()
+        cls._usage.clear()
+        for client in clients:
+            await client.close_connection()
+
+    @classmethod
+    def stats(cls) -> dict:
+        stats = {}
+        for (api_key, testnet), client in cls._clients.items():
+            usage = cls._usage.get((api_key, testnet), {})
+            in_use = usage.get("in_use", 0)
+            name = f"{api_key[:6] if api_key else 'public'}|{'testnet' if testnet else 'live'}"
+            stats[name] = {
+                "refs": cls._refs.get((api_key, testnet), 0),
+                "limit": cls._limit,
+                "in_use": in_use,
+                "opened": usage.get("opened", 0),
+                "reused": usage.get("reused", 0),
+                "utilization": in_use / cls._limit if cls._limit else 0.0,
+                "timestamp_offset": client.timestamp_offset,
+            }
+            if isinstance(client, ThrottledClient):
+                stats[name].update(client.stats)
+        return stats
+
+    @classmethod
+    def _trace(cls, usage: dict) -> aiohttp.TraceConfig:
+        async def on_start(session, context, params):
+            usage["in_use"] += 1
+
+        async def on_end(session, context, params):
+            usage["in_use"] -= 1
+
+        async def on_create(session, context, params):
+            usage["opened"] += 1
+
+        async def on_reuse(session, context, params):
+            usage["reused"] += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        trace.on_request_exception.append(on_end)
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+    @classmethod
+    async def _connect(
+        cls, api_key: str, api_secret: str, testnet: bool
+    ) -> AsyncClient:
+        client = await PooledClient.create(
+            api_key=api_key, api_secret=api_secret, testnet=testnet
+        )
+        cls._usage[(api_key, testnet)] = client.usage
+        if cls._semaphore is not None:
+            return ThrottledClient(client, cls._semaphore)
+        return client
@@ -0,0 +1,243 @@
+import asyncio
+import datetime as dt
+import json
+import time
+from collections import Counter, deque
+
+import numpy as np
+from binance import AsyncClient
+from binance.exceptions import BinanceAPIException
+from binance_trader.data.modules.clock import Clock
+from binance_trader.user.modules.order_journal import OrderJournal
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"n": 0, "p50": None, "p99": None, "max": None}
+    values = np.fromiter(samples, dtype=np.float64) * 1000
+    return {
+        "n": len(values),
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+class OrderGateway:
+    _gateways: dict = {}
+    MaxBatch = 5
+    Modes = ("batch", "concurrent")
+
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        window: float = 0.005,
+        mode: str = "batch",
+        max_in_flight: int = 10,
+        clock: Clock = None,
+    ) -> None:
+        if mode not in self.Modes:
+            raise ValueError(
+                f"Unknown gateway mode {mode}, expected one of {self.Modes}"
+            )
+        self._client = async_client
+        self._window = window
+        self._mode = mode
+        self._clock = clock or Clock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._pending = []
+        self._flusher = None
+        self._sends = set()
+        self._queue_times = deque(maxlen=10_000)
+        self._ack_times = deque(maxlen=10_000)
+        self._counts = Counter()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._mode} | {len(self._pending)} pending | {self._counts['orders']} orders | {self._counts['requests']} requests ]"
+
+    @classmethod
+    def for_account(
+        cls, async_client: AsyncClient, api_key: str, **kwargs
+    ) -> "OrderGateway":
+        gateway = cls._gateways.get(api_key)
+        if gateway is None:
+            gateway = cls._gateways[api_key] = cls(async_client, **kwargs)
+        return gateway
+
+    @classmethod
+    async def stop_all(cls) -> None:
+        gateways = list(cls._gateways.values())
+        cls._gateways.clear()
+        for gateway in gateways:
+            await gateway.stop()
+
+    @classmethod
+    def stats_all(cls) -> dict:
+        return {
+            api_key[:6] if api_key else "public": gateway.stats
+            for api_key, gateway in cls._gateways.items()
+        }
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "mode": self._mode,
+            "orders": self._counts["orders"],
+            "requests": self._counts["requests"],
+            "batches": self._counts["batches"],
+            "rejected": self._counts["rejected"],
+            "failed": self._counts["failed"],
+            "pending": len(self._pending),
+            "queue_ms": _percentiles(self._queue_times),
+            "ack_ms": _percentiles(self._ack_times),
+        }
+
+    async def submit(
+        self,
+        symbol: str,
+        side: str,
+        type: str,
+        quantity,
+        journal: OrderJournal = None,
+        strategy: str = "",
+        **params,
+    ) -> dict:
+        order = {
+            "symbol": symbol,
+            "side": side,
+            "type": type,
+            "quantity": quantity,
+            **params,
+        }
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((order, future, time.perf_counter(), (journal, strategy)))
+        self._counts["orders"] += 1
+
+        if self._mode == "batch" and len(self._pending) >= self.MaxBatch:
+            self.flush()
+        elif self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_after())
+        return await future
+
+    def flush(self) -> None:
+        if self._flusher is not None and self._flusher is not asyncio.current_task():
+            self._flusher.cancel()
+        self._flusher = None
+
+        pending, self._pending = self._pending, []
+        if self._mode == "batch":
+            chunks = [
+                pending[i : i + self.MaxBatch]
+                for i in range(0, len(pending), self.MaxBatch)
+            ]
+        else:
+            chunks = [[entry] for entry in pending]
+
+        for chunk in chunks:
+            task = asyncio.ensure_future(self._send(chunk))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def stop(self) -> None:
+        if self._pending:
+            self.flush()
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    async def _flush_after(self) -> None:
+        await self._clock.sleep(self._window)
+        self.flush()
+
+    async def _send(self, chunk: list) -> None:
+        async with self._in_flight:
+            sent = time.perf_counter()
+            for _, _, queued, _ in chunk:
+                self._queue_times.append(sent - queued)
+            self._counts["requests"] += 1
+            try:
+                if len(chunk) == 1:
+                    results = [await self._client.futures_create_order(**chunk[0][0])]
+                else:
+                    self._counts["batches"] += 1
+                    results = await self._client.futures_place_batch_order(
+                        batchOrders=[
+                            {k: str(v) for k, v in order.items()}
+                            for order, _, _, _ in chunk
+                        ]
+                    )
+            except Exception as e:
+                self._counts["failed"] += len(chunk)
+                for _, future, _, _ in chunk:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self._ack_times.append(time.perf_counter() - sent)
+
+        now = int(self._clock.time() * 1000)
+        for (order, future, _, (journal, strategy)), result in zip(chunk, results):
+            if "code" in result and "orderId" not in result:
+                self._counts["rejected"] += 1
+                print(
+                    f"{dt.datetime.now()} {self} {order['symbol']} rejected: {result.get('msg')}"
+                )
+                error = BinanceAPIException(None, 400, json.dumps(result))
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            if journal is not None:
+                journal.append_order(result, now, strategy=strategy)
+            if not future.done():
+                future.set_result(result)
+
+
+if __name__ == "__main__":
+    import random
+
+    class _Exchange:
+        def __init__(self, latency: float) -> None:
+            self._latency = latency
+            self._ids = 0
+            self.requests = 0
+
+        def _ack(self, order: dict) -> dict:
+            self._ids += 1
+            return {"orderId": self._ids, "status": "NEW", **order}
+
+        async def futures_create_order(self, **order) -> dict:
+            self.requests += 1
+            await asyncio.sleep(self._latency)
+            return self._ack(order)
+
+        async def futures_place_batch_order(self, batchOrders: list) -> list:
+            self.requests += 1
+            await asyncio.sleep(self._latency)
+            return [self._ack(order) for order in batchOrders]
+
+    async def bar_close(mode: str, bots: int = 200, latency: float = 0.02) -> None:
+        exchange = _Exchange(latency)
+        gateway = OrderGateway(exchange, mode=mode, max_in_flight=10)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                gateway.submit(
+                    f"S{i:03d}USDT", random.choice(["BUY", "SELL"]), "MARKET", 0.01
+                )
+                for i in range(bots)
+            ]
+        )
+        took = time.perf_counter() - start
+        await gateway.stop()
+        print(gateway, f"{exchange.requests} requests in {took * 1000:.0f}ms")
+        print(gateway.stats)
+
+    asyncio.run(bar_close("concurrent"))
+    asyncio.run(bar_close("batch"))
@@ -0,0 +1,461 @@
+import asyncio
+import atexit
+import bisect
+import fcntl
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+class OrderSchema:
+    Fields = (
+        "time",
+        "kind",
+        "symbol",
+        "client_order_id",
+        "order_id",
+        "side",
+        "type",
+        "status",
+        "orig_qty",
+        "executed_qty",
+        "avg_price",
+        "cum_quote",
+        "realized_pnl",
+        "commission",
+        "reduce_only",
+        "position_side",
+        "strategy",
+    )
+    Types = (
+        int,
+        str,
+        str,
+        str,
+        int,
+        str,
+        str,
+        str,
+        float,
+        float,
+        float,
+        float,
+        float,
+        float,
+        str,
+        str,
+        str,
+    )
+
+    @classmethod
+    def order(cls, resp: dict, time_ms: int, strategy: str = "") -> tuple:
+        return (
+            int(resp.get("updateTime") or time_ms),
+            "order",
+            resp["symbol"],
+            resp.get("clientOrderId", ""),
+            resp.get("orderId", 0),
+            resp.get("side", ""),
+            resp.get("type", ""),
+            resp.get("status", ""),
+            resp.get("origQty", 0),
+            resp.get("executedQty", 0),
+            resp.get("avgPrice", 0),
+            resp.get("cumQuote", 0),
+            0,
+            0,
+            resp.get("reduceOnly", False),
+            resp.get("positionSide", ""),
+            strategy,
+        )
+
+    @classmethod
+    def fill(cls, order: dict, strategy: str = "") -> tuple:
+        return (
+            int(order["T"]),
+            "fill",
+            order["s"],
+            order["c"],
+            order["i"],
+            order["S"],
+            order["o"],
+            order["X"],
+            order["q"],
+            order["l"],
+            order["L"],
+            float(order["L"]) * float(order["l"]),
+            order.get("rp", 0),
+            order.get("n", 0),
+            order.get("R", False),
+            order.get("ps", ""),
+            strategy,
+        )
+
+    @classmethod
+    def encode(cls, row: tuple) -> bytes:
+        return (",".join(str(v).replace(",", ";") for v in row) + "\n").encode()
+
+    @classmethod
+    def decode(cls, line: bytes) -> dict:
+        values = line.decode().rstrip("\n").split(",")
+        return {
+            name: kind(value)
+            for name, kind, value in zip(cls.Fields, cls.Types, values)
+        }
+
+
+class OrderJournal:
+    _journals: dict = {}
+    _name = "order_journal"
+    IndexDtype = np.dtype(
+        [
+            ("time", "<i8"),
+            ("offset", "<i8"),
+            ("symbol", "S16"),
+            ("client_order_id", "S40"),
+        ]
+    )
+    IndexStruct = struct.Struct("<qq16s40s")
+
+    def __init__(
+        self,
+        db: str,
+        name: str = None,
+        group_size: int = 64,
+        commit_interval: float = 0.05,
+    ) -> None:
+        name = name or self._name
+        self._db = db
+        self._path = f"{db}/{name}.csv"
+        self._index_path = f"{db}/{name}.idx"
+        self._group_size = group_size
+        self._commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._closed = False
+
+        self._by_id = {}
+        self._ids = np.empty(0, dtype="S40")
+        self._id_offsets = np.empty(0, dtype=np.int64)
+        self._times = {}
+        self._offsets = {}
+        self._pending = 0
+        self._commit_task = None
+        self._appends = 0
+        self._commits = 0
+        self._commit_time = 0.0
+        self._max_commit = 0.0
+
+        os.makedirs(db, exist_ok=True)
+        self._owner = open(f"{db}/{name}.lock", "a")
+        try:
+            fcntl.flock(self._owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._owner.close()
+            raise RuntimeError(
+                f"{self._path} is already open elsewhere, configure a journal name per process"
+            )
+        if not os.path.isfile(self._path) or os.path.getsize(self._path) == 0:
+            with open(self._path, "wb") as file:
+                file.write((",".join(OrderSchema.Fields) + "\n").encode())
+            if os.path.isfile(self._index_path):
+                os.remove(self._index_path)
+        self._load()
+
+        self._file = open(self._path, "ab")
+        self._index = open(self._index_path, "ab")
+        self._reader = open(self._path, "rb")
+        self._size = os.path.getsize(self._path)
+        self._flushed = self._size
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} [ {self._path} | {len(self)} records | {self._pending} pending ]"
+
+    def __len__(self) -> int:
+        return sum(len(times) for times in self._times.values())
+
+    @classmethod
+    def instance(cls, db: str, **kwargs) -> "OrderJournal":
+        key = (db, kwargs.get("name") or cls._name)
+        journal = cls._journals.get(key)
+        if journal is None:
+            journal = cls._journals[key] = cls(db, **kwargs)
+        return journal
+
+    @classmethod
+    def configure(cls, name: str = "order_journal") -> None:
+        cls._name = name
+
+    @classmethod
+    def close_all(cls) -> None:
+        for journal in list(cls._journals.values()):
+            journal.close()
+        cls._journals.clear()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def symbols(self) -> list:
+        return sorted(self._times)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "records": len(self),
+            "appends": self._appends,
+            "pending": self._pending,
+            "commits": self._commits,
+            "avg_commit_ms": self._commit_time / self._commits * 1000
+            if self._commits
+            else 0.0,
+            "max_commit_ms": self._max_commit * 1000,
+            "bytes": self._size,
+        }
+
+    def append_order(self, resp: dict, time_ms: int = None, strategy: str = "") -> int:
+        time_ms = time_ms if time_ms is not None else int(time.time() * 1000)
+        return self.append(OrderSchema.order(resp, time_ms, strategy))
+
+    def append_fill(self, order: dict, strategy: str = "") -> int:
+        return self.append(OrderSchema.fill(order, strategy))
+
+    def append(self, row: tuple) -> int:
+        data = OrderSchema.encode(row)
+        time_ms, symbol, client_order_id = row[0], row[2], row[3]
+        with self._lock:
+            offset = self._size
+            self._file.write(data)
+            self._index.write(
+                self.IndexStruct.pack(
+                    time_ms, offset, symbol.encode(), client_order_id.encode()
+                )
+            )
+            self._size += len(data)
+            self._pending += 1
+        self._appends += 1
+        self._add(time_ms, offset, symbol, client_order_id)
+        self._schedule_commit()
+        return offset
+
+    def commit(self) -> None:
+        start = time.perf_counter()
+        with self._commit_lock:
+            if self._closed:
+                return
+            with self._lock:
+                if not self._pending:
+                    return
+                self._file.flush()
+                self._index.flush()
+                self._flushed = self._size
+                self._pending = 0
+            os.fsync(self._file.fileno())
+            os.fsync(self._index.fileno())
+        took = time.perf_counter() - start
+        self._commits += 1
+        self._commit_time += took
+        self._max_commit = max(self._max_commit, took)
+
+    def close(self) -> None:
+        if self._commit_task is not None:
+            self._commit_task.cancel()
+        self.commit()
+        with self._commit_lock:
+            self._closed = True
+            for file in (self._file, self._index, self._reader, self._owner):
+                file.close()
+
+    def get(self, client_order_id: str) -> dict:
+        offsets = self._id_offsets_for(client_order_id)
+        return self._read(offsets[-1]) if offsets else None
+
+    def history(self, client_order_id: str) -> list:
+        return [self._read(offset) for offset in self._id_offsets_for(client_order_id)]
+
+    def _id_offsets_for(self, client_order_id: str) -> list:
+        key = client_order_id.encode()
+        lo = np.searchsorted(self._ids, key, side="left")
+        hi = np.searchsorted(self._ids, key, side="right")
+        return self._id_offsets[lo:hi].tolist() + self._by_id.get(client_order_id, [])
+
+    def range(
+        self, symbol: str, start: int = None, end: int = None, kind: str = None
+    ) -> list:
+        times = self._times.get(symbol.upper(), [])
+        offsets = self._offsets.get(symbol.upper(), [])
+        lo = 0 if start is None else bisect.bisect_left(times, start)
+        hi = len(times) if end is None else bisect.bisect_right(times, end)
+        records = [self._read(offset) for offset in offsets[lo:hi]]
+        if kind is not None:
+            records = [record for record in records if record["kind"] == kind]
+        return records
+
+    def last(self, symbol: str) -> dict:
+        offsets = self._offsets.get(symbol.upper())
+        return self._read(offsets[-1]) if offsets else None
+
+    def _read(self, offset: int) -> dict:
+        if offset >= self._flushed:
+            with self._lock:
+                self._file.flush()
+                self._flushed = self._size
+        self._reader.seek(offset)
+        return OrderSchema.decode(self._reader.readline())
+
+    def _add(
+        self, time_ms: int, offset: int, symbol: str, client_order_id: str
+    ) -> None:
+        symbol = symbol.upper()
+        times = self._times.setdefault(symbol, [])
+        offsets = self._offsets.setdefault(symbol, [])
+        if not times or time_ms >= times[-1]:
+            times.append(time_ms)
+            offsets.append(offset)
+        else:
+            i = bisect.bisect_right(times, time_ms)
+            times.insert(i, time_ms)
+            offsets.insert(i, offset)
+        if client_order_id:
+            self._by_id.setdefault(client_order_id, []).append(offset)
+
+    def _load(self) -> None:
+        entries = np.empty(0, dtype=self.IndexDtype)
+        if os.path.isfile(self._index_path):
+            size = os.path.getsize(self._index_path)
+            count = size // self.IndexDtype.itemsize
+            entries = np.fromfile(self._index_path, dtype=self.IndexDtype, count=count)
+            if size != count * self.IndexDtype.itemsize:
+                with open(self._index_path, "r+b") as file:
+                    file.truncate(count * self.IndexDtype.itemsize)
+
+        entries = entries[entries["offset"] < os.path.getsize(self._path)]
+        entries = entries[np.argsort(entries["time"], kind="stable")]
+        for symbol in np.unique(entries["symbol"]):
+            rows = entries[entries["symbol"] == symbol]
+            name = symbol.decode().upper()
+            self._times[name] = rows["time"].tolist()
+            self._offsets[name] = rows["offset"].tolist()
+        order = np.lexsort((entries["offset"], entries["client_order_id"]))
+        self._ids = entries["client_order_id"][order]
+        self._id_offsets = entries["offset"][order]
+
+        self._recover(int(entries["offset"].max()) if len(entries) else None)
+
+    def _recover(self, last_offset: int) -> None:
+        with open(self._path, "rb") as file:
+            if last_offset is None:
+                file.readline()
+            else:
+                file.seek(last_offset)
+                file.readline()
+            offset = file.tell()
+            missing = []
+            for line in iter(file.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                record = OrderSchema.decode(line)
+                missing.append(
+                    (
+                        record["time"],
+                        offset,
+                        record["symbol"],
+                        record["client_order_id"],
+                    )
+                )
+                offset += len(line)
+        if offset < os.path.getsize(self._path):
+            with open(self._path, "r+b") as file:
+                file.truncate(offset)
+        if not missing:
+            return
+
+        with open(self._index_path, "ab") as index:
+            for time_ms, offset, symbol, client_order_id in missing:
+                index.write(
+                    self.IndexStruct.pack(
+                        time_ms, offset, symbol.encode(), client_order_id.encode()
+                    )
+                )
+        for time_ms, offset, symbol, client_order_id in missing:
+            self._add(time_ms, offset, symbol, client_order_id)
+
+    def _schedule_commit(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._pending >= self._group_size:
+                self.commit()
+            return
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = loop.create_task(self._commit_later())
+
+    async def _commit_later(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._commit_interval
+        while self._pending < self._group_size and loop.time() < deadline:
+            await asyncio.sleep(min(0.005, self._commit_interval))
+        await loop.run_in_executor(None, self.commit)
+
+
+atexit.register(OrderJournal.close_all)
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    n = 1_000_000
+    db = tempfile.mkdtemp(prefix="order_journal_")
+    symbols = [f"S{i:03d}USDT" for i in range(50)]
+    journal = OrderJournal(db)
+
+    start = time.perf_counter()
+    for i in range(n):
+        journal.append_order(
+            {
+                "symbol": symbols[i % len(symbols)],
+                "clientOrderId": f"bot-{i:09d}",
+                "orderId": i,
+                "side": "BUY" if i % 2 else "SELL",
+                "type": "MARKET",
+                "status": "FILLED",
+                "origQty": "0.01",
+                "executedQty": "0.01",
+                "avgPrice": "20000.0",
+                "cumQuote": "200.0",
+                "updateTime": 1_662_000_000_000 + i * 100,
+            },
+            strategy="SMACrossover",
+        )
+    journal.commit()
+    took = time.perf_counter() - start
+    print(journal, f"append: {took / n * 1e6:.2f} us/order", journal.stats)
+    journal.close()
+
+    start = time.perf_counter()
+    journal = OrderJournal(db)
+    print(
+        f"reopen: {(time.perf_counter() - start) * 1000:.0f} ms for {len(journal):,} records"
+    )
+
+    queries = 10_000
+    start = time.perf_counter()
+    for i in range(queries):
+        journal.get(f"bot-{(i * 7919) % n:09d}")
+    print(f"get:   {(time.perf_counter() - start) / queries * 1e6:.1f} us")
+
+    start = time.perf_counter()
+    for i in range(queries):
+        t = 1_662_000_000_000 + ((i * 7919) % n) * 100
+        journal.range(symbols[i % len(symbols)], t, t + 60_000)
+    print(
+        f"range: {(time.perf_counter() - start) / queries * 1e6:.1f} us (1 minute window)"
+    )
+
+    journal.close()
+    shutil.rmtree(db)
@@ -0,0 +1,166 @@
+import asyncio
+import datetime as dt
+import time
+
+from binance import AsyncClient, BinanceSocketManager
+from binance_trader.user.modules.account_snapshot import AccountSnapshot, PositionRecord
+from binance_trader.user.modules.order_journal import OrderJournal
+
+
+class PositionBook:
+    _books: dict = {}
+
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        reconcile_interval: float = 300,
+        journal: OrderJournal = None,
+        account: AccountSnapshot = None,
+    ) -> None:
+        self._client = async_client
+        self._reconcile_interval = reconcile_interval
+        self._journal = journal
+        self._account = account or AccountSnapshot()
+        self._orders = {}
+        self._stream_task = None
+        self._reconcile_task = None
+        self._connected = False
+        self._reconciled_at = 0.0
+        self._events = 0
+        self._reconciles = 0
+
+    def __repr__(self) -> str:
+        state = "live" if self.is_live else "offline"
+        return f"{self.__class__.__name__} [ {state} | {len(self._account.positions)} positions | {self._events} events ]"
+
+    @classmethod
+    async def for_account(
+        cls,
+        async_client: AsyncClient,
+        api_key: str,
+        reconcile_interval: float = 300,
+        journal: OrderJournal = None,
+    ) -> "PositionBook":
+        book = cls._books.get(api_key)
+        if book is None:
+            book = cls._books[api_key] = cls(
+                async_client,
+                reconcile_interval,
+                journal,
+                AccountSnapshot.instance(api_key),
+            )
+            await book.start()
+        return book
+
+    @classmethod
+    async def stop_all(cls) -> None:
+        books = list(cls._books.values())
+        cls._books.clear()
+        for book in books:
+            await book.stop()
+
+    @property
+    def is_live(self) -> bool:
+        return self._connected and self._reconciled_at > 0
+
+    @property
+    def account(self) -> AccountSnapshot:
+        return self._account
+
+    @property
+    def balances(self) -> dict:
+        return {
+            asset: record.wallet_balance
+            for asset, record in self._account.assets.items()
+        }
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "live": self.is_live,
+            "positions": len(self._account.positions),
+            "events": self._events,
+            "reconciles": self._reconciles,
+            "reconciled_ago": time.time() - self._reconciled_at,
+        }
+
+    def position(self, symbol: str) -> PositionRecord:
+        return self._account.position(symbol)
+
+    def side(self, symbol: str) -> str:
+        return self._account.side(symbol)
+
+    async def start(self) -> None:
+        await self.reconcile()
+        self._stream_task = asyncio.ensure_future(self._stream())
+        self._reconcile_task = asyncio.ensure_future(self._reconcile_loop())
+
+    async def stop(self) -> None:
+        for task in (self._stream_task, self._reconcile_task):
+            if task is not None:
+                task.cancel()
+        self._connected = False
+
+    async def reconcile(self) -> None:
+        resp = await self._client.futures_account()
+        self.apply_account(resp)
+        self._reconciled_at = time.time()
+        self._reconciles += 1
+
+    def apply_account(self, resp: dict) -> set:
+        return self._account.apply_account(resp)
+
+    def apply(self, msg: dict) -> None:
+        event = msg.get("e")
+        if event == "ACCOUNT_UPDATE":
+            self.apply_account_update(msg)
+        elif event == "ORDER_TRADE_UPDATE":
+            self.apply_order_update(msg)
+        elif event == "listenKeyExpired":
+            self._connected = False
+
+    def apply_account_update(self, msg: dict) -> set:
+        self._events += 1
+        return self._account.apply_update(msg)
+
+    def apply_order_update(self, msg: dict) -> None:
+        self._events += 1
+        order = msg["o"]
+        if self._journal is not None and order.get("x") == "TRADE":
+            self._journal.append_fill(order)
+        if order["X"] in ("FILLED", "CANCELED", "EXPIRED", "REJECTED"):
+            self._orders.pop(order["c"], None)
+        else:
+            self._orders[order["c"]] = order
+
+    async def _stream(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                bm = BinanceSocketManager(self._client)
+                async with bm.futures_user_socket() as stream:
+                    self._connected = True
+                    await self.reconcile()
+                    backoff = 1
+                    while True:
+                        msg = await stream.recv()
+                        if msg.get("e") == "error":
+                            raise ConnectionError(msg.get("m"))
+                        self.apply(msg)
+                        if not self._connected:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{dt.datetime.now()} {self} user stream failed: {e}")
+            self._connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _reconcile_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"{dt.datetime.now()} {self} reconcile failed: {e}")
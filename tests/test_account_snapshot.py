@@ -0,0 +1,86 @@
+import copy
+
+from binance_trader.user.modules.account_snapshot import AccountSnapshot
+
+
+def position(symbol: str, amount: str, update_time: int, pnl: str = "0.0") -> dict:
+    return {
+        "symbol": symbol,
+        "positionAmt": amount,
+        "entryPrice": "20000.0" if float(amount) else "0.0",
+        "unrealizedProfit": pnl,
+        "notional": str(float(amount) * 20000),
+        "leverage": "20",
+        "positionSide": "BOTH",
+        "updateTime": update_time,
+    }
+
+
+def account(positions: list, balance: str = "10000.0") -> dict:
+    return {
+        "canTrade": True,
+        "totalWalletBalance": balance,
+        "assets": [{"asset": "USDT", "walletBalance": balance, "updateTime": 1}],
+        "positions": positions,
+    }
+
+
+def test_second_payload_only_parses_updated_positions():
+    first = account(
+        [
+            position("BTCUSDT", "0.01", 1, pnl="1.5"),
+            position("ETHUSDT", "0.0", 1),
+            position("BNBUSDT", "-0.5", 1),
+        ]
+    )
+    snapshot = AccountSnapshot.from_response(first)
+    assert snapshot.changed == {"BTCUSDT", "ETHUSDT", "BNBUSDT"}
+    assert snapshot.stats["parsed"] == 3
+
+    second = copy.deepcopy(first)
+    second["totalWalletBalance"] = "10010.0"
+    second["positions"][0]["unrealizedProfit"] = "2.5"
+    second["positions"][1] = position("ETHUSDT", "1.0", 2)
+    second["positions"][2] = position("BNBUSDT", "0.0", 2)
+
+    assert snapshot.apply_account(second) == {"ETHUSDT", "BNBUSDT"}
+    assert snapshot.stats == {
+        "symbols": 3,
+        "snapshots": 2,
+        "events": 0,
+        "parsed": 5,
+        "skipped": 1,
+    }
+    assert snapshot.balance == 10010.0
+    assert snapshot.side("BTCUSDT") == "LONG"
+    assert snapshot.position("BTCUSDT").unrealized_pnl == 2.5
+    assert snapshot.side("ETHUSDT") == "LONG"
+    assert snapshot.side("BNBUSDT") == "NO_POSITION"
+    assert snapshot.side("XRPUSDT") == "NO_POSITION"
+
+
+def test_unchanged_payload_reports_no_changes():
+    payload = account([position("BTCUSDT", "0.01", 1)])
+    snapshot = AccountSnapshot.from_response(payload)
+    assert snapshot.apply_account(copy.deepcopy(payload)) == set()
+    assert snapshot.stats["skipped"] == 1
+    assert snapshot.changed == set()
+
+
+def test_stale_update_time_is_ignored():
+    snapshot = AccountSnapshot.from_response(account([position("BTCUSDT", "0.01", 5)]))
+    snapshot.apply_update(
+        {
+            "E": 4,
+            "T": 4,
+            "a": {
+                "B": [],
+                "P": [{"s": "BTCUSDT", "pa": "0", "ep": "0", "up": "0", "ps": "BOTH"}],
+            },
+        }
+    )
+    assert snapshot.side("BTCUSDT") == "LONG"
+    assert snapshot.apply_account(account([position("BTCUSDT", "0.0", 6)])) == {
+        "BTCUSDT"
+    }
+    assert snapshot.side("BTCUSDT") == "NO_POSITION"
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from binance_trader.data.modules.backfill import BackfillEngine, BackfillJob
+from binance_trader.data.modules.columnar_store import ColumnarStore
+
+Step = 60_000
+Start = 1662336000000
+
+
+def t(i: int) -> int:
+    return Start + i * Step
+
+
+def kline(open_time: int, open: bool = False) -> list:
+    close_time = open_time + Step - 1 if not open else 2**62
+    return [open_time, "1", "2", "0.5", "1", "10", close_time, "0", 1, "0", "0", "0"]
+
+
+class Exchange:
+    def __init__(self, bars: int, open_bar: int = None, fail_at: int = None) -> None:
+        self.bars = [t(i) for i in range(bars)]
+        self.open_bar = None if open_bar is None else t(open_bar)
+        self.fail_at = None if fail_at is None else t(fail_at)
+        self.calls = []
+
+    async def futures_continous_klines(
+        self, pair, contractType, interval, startTime, endTime, limit
+    ):
+        self.calls.append((startTime, endTime))
+        # later windows answer first, so completion order differs from window order
+        await asyncio.sleep(0.001 * max(5 - len(self.calls), 0))
+        if self.fail_at is not None and startTime <= self.fail_at <= endTime:
+            raise BinanceAPIException(None, 400, '{"code": -1100, "msg": "Bad"}')
+        rows = [
+            kline(open_time, open_time == self.open_bar)
+            for open_time in self.bars
+            if startTime <= open_time <= endTime
+        ]
+        return rows[:limit]
+
+
+def run(tmp_path, exchange: Exchange, end: int, **kwargs):
+    store = ColumnarStore(str(tmp_path))
+    engine = BackfillEngine(exchange, store, limit=10, max_concurrency=4, **kwargs)
+    job = BackfillJob("BTCUSDT", "PERPETUAL", "1m", t(0), end)
+    try:
+        asyncio.run(engine.backfill(job))
+    finally:
+        series = store.series("BTCUSDT", "PERPETUAL", "1m")
+        with open(engine.manifest.path) as file:
+            manifest = json.load(file)[job.key]
+    return job, series, manifest
+
+
+def test_windows_cover_inclusive_end():
+    job = BackfillJob("BTCUSDT", "PERPETUAL", "1m", t(0), t(25))
+    assert job.windows(t(0), 10) == [
+        (t(0), t(10) - 1),
+        (t(10), t(20) - 1),
+        (t(20), t(25)),
+    ]
+    assert job.windows(t(25), 10) == [(t(25), t(25))]
+    assert job.windows(t(26), 10) == []
+
+
+def test_windows_are_written_in_order(tmp_path):
+    exchange = Exchange(35)
+    job, series, manifest = run(tmp_path, exchange, t(34))
+
+    assert exchange.calls == job.windows(t(0), 10)
+    assert series.column("open_time").tolist() == [t(i) for i in range(35)]
+    assert job.done_until == manifest["done_until"] == t(34) + 1
+
+
+def test_stops_at_open_window(tmp_path):
+    exchange = Exchange(35, open_bar=15)
+    job, series, manifest = run(tmp_path, exchange, t(34))
+
+    assert series.column("open_time").tolist() == [t(i) for i in range(15)]
+    assert job.done_until == manifest["done_until"] == t(15)
+
+
+def test_stops_at_failed_window(tmp_path):
+    exchange = Exchange(35, fail_at=12)
+    with pytest.raises(BinanceAPIException):
+        run(tmp_path, exchange, t(34))
+    series = ColumnarStore(str(tmp_path)).series("BTCUSDT", "PERPETUAL", "1m")
+    assert series.column("open_time").tolist() == [t(i) for i in range(10)]
+
+    resumed = Exchange(35)
+    job, series, manifest = run(tmp_path, resumed, t(34))
+    assert resumed.calls[0] == (t(10), t(20) - 1)
+    assert series.column("open_time").tolist() == [t(i) for i in range(35)]
+    assert manifest["done_until"] == t(34) + 1
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from binance_trader.data.modules.candle_archive import CandleArchive
+from binance_trader.data.modules.candle_writer import CandleWriter
+
+Start = 1662336000000
+
+
+def kline(i: int) -> list:
+    open_time = Start + i * 3_600_000
+    return [
+        open_time,
+        "1.0",
+        "2.0",
+        "0.5",
+        str(1.0 + i),
+        "10",
+        open_time + 3_599_999,
+        "100",
+        i,
+        "4",
+        "40",
+        "0",
+    ]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    db = str(tmp_path)
+    archive = CandleArchive(db, grace=0)
+    yield archive
+    CandleWriter._writers.pop(db).close()
+
+
+def write(archive: CandleArchive, hours: range) -> None:
+    for i in hours:
+        archive.append("BTCUSDT", "PERPETUAL", "1h", CandleArchive.row(kline(i)))
+    CandleWriter.instance(archive.db).flush()
+
+
+def test_range_reads_across_days(archive):
+    write(archive, range(72))
+
+    rows = archive.range("BTCUSDT", "PERPETUAL", "1h")
+    assert rows["open_time"].tolist() == [Start + i * 3_600_000 for i in range(72)]
+    assert rows["close"].tolist() == [1.0 + i for i in range(72)]
+    assert rows["num_trades"].dtype == np.int64
+
+    rows = archive.range(
+        "BTCUSDT", "PERPETUAL", "1h", Start + 20 * 3_600_000, Start + 30 * 3_600_000
+    )
+    assert rows["num_trades"].tolist() == list(range(20, 31))
+    assert len(archive.range("ETHUSDT", "PERPETUAL", "1h")["open_time"]) == 0
+
+
+def test_compaction_keeps_the_same_rows(archive):
+    write(archive, range(72))
+    before = archive.range("BTCUSDT", "PERPETUAL", "1h")
+
+    now = Start + 2 * CandleArchive.DayMs + 1
+    due = archive.compact(now)
+    assert due == [
+        "btcusdt/perpetual/1h/2022-09-05.csv",
+        "btcusdt/perpetual/1h/2022-09-06.csv",
+    ]
+
+    archive.seal(due)
+    archive.compact(now)
+    path = f"{archive.db}/btcusdt/perpetual/1h"
+    assert sorted(os.listdir(path)) == [
+        "2022-09-05.npz",
+        "2022-09-06.npz",
+        "2022-09-07.csv",
+    ]
+    formats = {entry["day"]: entry["format"] for entry in archive.partitions("BTCUSDT")}
+    assert formats == {"2022-09-05": "npz", "2022-09-06": "npz", "2022-09-07": "csv"}
+    assert archive.catalog["btcusdt/perpetual/1h/2022-09-05"]["rows"] == 24
+
+    after = archive.range("BTCUSDT", "PERPETUAL", "1h")
+    for name, column in before.items():
+        assert np.array_equal(after[name], column)
+
+    rows = archive.range(
+        "BTCUSDT", "PERPETUAL", "1h", Start + 23 * 3_600_000, Start + 25 * 3_600_000
+    )
+    assert rows["num_trades"].tolist() == [23, 24, 25]
+
+
+def test_late_rows_merge_into_compacted_day(archive):
+    write(archive, range(24))
+    now = Start + CandleArchive.DayMs + 1
+    archive.seal(archive.compact(now))
+    archive.compact(now)
+
+    write(archive, range(10, 12))
+    archive.seal(archive.compact(now))
+    archive.compact(now)
+
+    rows = archive.range("BTCUSDT", "PERPETUAL", "1h")
+    assert rows["num_trades"].tolist() == list(range(24))
+    assert os.listdir(f"{archive.db}/btcusdt/perpetual/1h") == ["2022-09-05.npz"]
@@ -0,0 +1,83 @@
+import asyncio
+import csv
+import glob
+
+from binance_trader.data.modules.candle_writer import CandleWriter
+
+
+def rows(*paths: str) -> list:
+    out = []
+    for path in paths:
+        with open(path, newline="") as file:
+            reader = csv.reader(file)
+            assert next(reader) == ["i", "close"]
+            out += [int(row[0]) for row in reader]
+    return out
+
+
+def test_flush_writes_each_row_once(tmp_path):
+    writer = CandleWriter(str(tmp_path), max_rows=7, max_delay=60)
+    for i in range(100):
+        writer.write("BTCUSDT/1m.csv", {"i": i, "close": 1.0})
+        if i % 13 == 0:
+            writer.flush()
+    assert writer.pending < 7
+    writer.flush()
+    writer.flush()
+    writer.close()
+
+    assert writer.pending == 0
+    assert writer.stats["rows_written"] == 100
+    assert rows(f"{tmp_path}/BTCUSDT/1m.csv") == list(range(100))
+
+
+def test_flush_if_due_only_after_max_delay(tmp_path):
+    writer = CandleWriter(str(tmp_path), max_rows=1_000, max_delay=60)
+    writer.write("a.csv", (0, 1.0), ("i", "close"))
+    writer.flush_if_due()
+    assert writer.pending == 1
+
+    writer._last_flush -= 60
+    writer.flush_if_due()
+    writer.flush_if_due()
+    assert writer.pending == 0
+    writer.write("a.csv", (1, 1.0))
+    writer.close()
+    assert rows(f"{tmp_path}/a.csv") == [0, 1]
+
+
+def test_seal_flushes_and_reopens_with_header(tmp_path):
+    writer = CandleWriter(str(tmp_path), max_rows=1_000, max_delay=60)
+    for i in range(10):
+        writer.write("a.csv", (i, 1.0), ("i", "close"))
+    sealed = writer.seal("a.csv")
+    assert sealed.endswith(".sealed")
+    assert writer.seal("a.csv") is None
+
+    for i in range(10, 20):
+        writer.write("a.csv", (i, 1.0), ("i", "close"))
+    writer.close()
+    assert rows(sealed, f"{tmp_path}/a.csv") == list(range(20))
+
+
+def test_evicted_handles_append_without_header(tmp_path):
+    writer = CandleWriter(str(tmp_path), max_rows=3, max_delay=60, max_open_files=2)
+    for i in range(30):
+        writer.write(f"{i % 5}.csv", (i, 1.0), ("i", "close"))
+    writer.close()
+    assert sorted(rows(*glob.glob(f"{tmp_path}/*.csv"))) == list(range(30))
+
+
+def test_background_flusher_drains_on_cancel(tmp_path):
+    async def main():
+        writer = CandleWriter(str(tmp_path), max_rows=1_000, max_delay=0.01)
+        for i in range(5):
+            writer.write("a.csv", (i, 1.0), ("i", "close"))
+        await asyncio.sleep(0.05)
+        assert writer.pending == 0
+        writer.write("a.csv", (5, 1.0))
+        writer.close()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert rows(f"{tmp_path}/a.csv") == list(range(6))
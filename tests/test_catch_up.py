@@ -0,0 +1,172 @@
+import asyncio
+import time
+
+from binance.exceptions import BinanceAPIException
+
+from binance_trader.data.modules.backfill import BackfillEngine
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.catch_up import CatchUp, LiveHandoff, StreamWatermark
+from binance_trader.data.modules.columnar_store import ColumnarStore
+from binance_trader.data.modules.intervals import Interval
+
+Step = 60_000
+Start = Interval.bar_open(int(time.time() * 1000), "1m") - 200 * Step
+
+
+def t(i: int) -> int:
+    return Start + i * Step
+
+
+def kline(open_time: int, open: bool = False) -> list:
+    close_time = open_time + Step - 1 if not open else int(time.time() * 1000) + Step
+    i = (open_time - Start) // Step
+    return [
+        open_time,
+        "1.0",
+        "2.0",
+        "0.5",
+        str(1.0 + i),
+        "10",
+        close_time,
+        "100",
+        i,
+        "4",
+        "40",
+        "0",
+    ]
+
+
+def stream(i: int) -> dict:
+    row = kline(t(i))
+    keys = ("t", "o", "h", "l", "c", "v", "T", "q", "n", "V", "Q")
+    return {"k": {**dict(zip(keys, row)), "x": True}}
+
+
+class Exchange:
+    def __init__(self, bars: list, open_bar: int = None) -> None:
+        self.bars = sorted(t(i) for i in bars)
+        self.open_bar = None if open_bar is None else t(open_bar)
+        self.calls = []
+        self.gate = None
+
+    async def futures_continous_klines(
+        self, pair, contractType, interval, startTime, endTime, limit
+    ):
+        self.calls.append((startTime, endTime))
+        if self.gate is not None:
+            await self.gate.wait()
+        rows = [
+            kline(open_time, open_time == self.open_bar)
+            for open_time in self.bars
+            if startTime <= open_time <= endTime
+        ]
+        return rows[:limit]
+
+
+def catch_up(tmp_path, exchange: Exchange, stored: list, limit: int = 1500) -> CatchUp:
+    store = ColumnarStore(str(tmp_path))
+    series = store.series("BTCUSDT", "PERPETUAL", "1m")
+    series.merge_klines([kline(t(i)) for i in stored])
+    engine = BackfillEngine(exchange, store, limit=limit)
+    return CatchUp(engine, store, "BTCUSDT", "PERPETUAL", "1m")
+
+
+def test_gaps_from_scan_and_observe(tmp_path):
+    series = ColumnarStore(str(tmp_path)).series("BTCUSDT", "PERPETUAL", "1m")
+    series.merge_klines([kline(t(i)) for i in (0, 1, 2, 3, 5, 6, 9)])
+
+    watermark = StreamWatermark(series, "1m")
+    assert watermark.gaps == [(t(4), t(4)), (t(7), t(8))]
+    assert watermark.last == t(9)
+    assert watermark.observe(t(9)) is None
+    assert watermark.observe(t(10)) is None
+    assert watermark.observe(t(13)) == (t(11), t(12))
+    assert watermark.missing(t(20)) == [
+        (t(4), t(4)),
+        (t(7), t(8)),
+        (t(11), t(12)),
+        (t(14), t(20)),
+    ]
+
+
+def test_one_bar_gap_is_fetched(tmp_path):
+    exchange = Exchange(range(10))
+    fill = catch_up(tmp_path, exchange, [0, 1, 2, 3, 5, 6])
+
+    assert fill.watermark.gaps == [(t(4), t(4))]
+    assert asyncio.run(fill.fill(fill.watermark.gaps)) == 1
+    assert exchange.calls == [(t(4), t(4))]
+    assert fill.series.column("open_time").tolist() == [t(i) for i in range(7)]
+    assert fill.watermark.gaps == []
+    assert fill.watermark.empty == []
+
+
+def test_empty_ranges_are_remembered(tmp_path):
+    exchange = Exchange([0, 1, 2, 6, 7])
+    fill = catch_up(tmp_path, exchange, [0, 1, 2, 6, 7])
+
+    assert asyncio.run(fill.fill(fill.watermark.gaps)) == 0
+    assert exchange.calls == [(t(3), t(5))]
+    assert fill.watermark.empty == [(t(3), t(5))]
+
+    restarted = catch_up(tmp_path, exchange, [])
+    assert restarted.watermark.gaps == []
+    assert restarted.watermark.empty == [(t(3), t(5))]
+    assert asyncio.run(restarted.fill(restarted.watermark.gaps)) == 0
+    assert len(exchange.calls) == 1
+
+
+def test_ranges_not_covered_are_not_marked_empty(tmp_path):
+    exchange = Exchange([0, 1, 2, 3, 9], open_bar=3)
+    fill = catch_up(tmp_path, exchange, [0, 9], limit=2)
+
+    asyncio.run(fill.fill(fill.watermark.gaps))
+    assert fill.series.column("open_time").tolist() == [t(0), t(1), t(2), t(9)]
+    assert fill.watermark.gaps == [(t(3), t(8))]
+    assert fill.watermark.empty == []
+
+
+def test_failed_fill_is_not_marked_empty(tmp_path):
+    class Failing(Exchange):
+        async def futures_continous_klines(self, **kwargs):
+            raise BinanceAPIException(
+                None, 400, '{"code": -1121, "msg": "Invalid symbol."}'
+            )
+
+    fill = catch_up(tmp_path, Failing([]), [0, 5])
+    try:
+        asyncio.run(fill.fill(fill.watermark.gaps))
+    except BinanceAPIException:
+        pass
+    assert fill.watermark.gaps == [(t(1), t(4))]
+    assert fill.watermark.empty == []
+
+
+def test_live_handoff_fills_before_replaying(tmp_path):
+    exchange = Exchange(range(5))
+    window = CandleWindow(20)
+    handoff = LiveHandoff(catch_up(tmp_path, exchange, range(5)), window)
+
+    async def run() -> None:
+        await handoff.start()
+        assert window.last_open_time == t(4)
+
+        await handoff(stream(5))
+        assert window.last_open_time == t(5)
+
+        exchange.bars = [t(i) for i in range(10)]
+        exchange.gate = asyncio.Event()
+        await handoff(stream(8))
+        await handoff(stream(9))
+        await handoff(stream(9))
+        assert handoff.stats["filling"] == 1
+        assert window.last_open_time == t(5)
+
+        exchange.gate.set()
+        while handoff.stats["filling"]:
+            await asyncio.sleep(0.001)
+
+    asyncio.run(run())
+    assert [bar[0] for bar in window.bars()] == [t(i) for i in range(10)]
+    assert handoff.stats["gaps"] == 1
+    assert handoff.stats["duplicates"] == 1
@@ -0,0 +1,70 @@
+import numpy as np
+
+from binance_trader.data.modules.columnar_store import ColumnarStore
+
+Start = 1662321540000
+Step = 60_000
+
+
+def kline(i: int, close: float = None) -> list:
+    t = Start + i * Step
+    close = float(i) if close is None else close
+    return [t, close, close + 1, close - 1, close, 10.0, t + Step - 1, 0, i, 0, 0, 0]
+
+
+def klines(lo: int, hi: int, close: float = None) -> dict:
+    i = np.arange(lo, hi)
+    return {
+        "open_time": Start + i * Step,
+        "close_time": Start + i * Step + Step - 1,
+        "close": i.astype(np.float64) if close is None else np.full(len(i), close),
+        "num_trades": i,
+    }
+
+
+def test_append_merge_range_round_trip(tmp_path):
+    store = ColumnarStore(str(tmp_path), capacity=8)
+    series = store.series("BTCUSDT", "PERPETUAL", "1m")
+    for i in range(20):
+        assert series.append_kline(kline(i))
+    assert series.merge(klines(20, 50)) == 30
+    assert series.append_kline(kline(5)) and len(series) == 50
+    assert series.append_kline(kline(50))
+    store.flush()
+
+    reopened = ColumnarStore(str(tmp_path)).series("btcusdt", "perpetual", "1m")
+    assert len(reopened) == 51
+    assert reopened.last_open_time == Start + 50 * Step
+    rows = reopened.range(Start + 10 * Step, Start + 30 * Step)
+    assert rows["open_time"].tolist() == (Start + np.arange(10, 31) * Step).tolist()
+    assert rows["close"].tolist() == list(map(float, range(10, 31)))
+    assert rows["num_trades"].tolist() == list(range(10, 31))
+    assert len(reopened.range()["open_time"]) == 51
+    assert len(reopened.range(Start + 51 * Step)["open_time"]) == 0
+
+
+def test_overlapping_merge_replaces_and_keeps_order(tmp_path):
+    series = ColumnarStore(str(tmp_path), capacity=4).series(
+        "BTCUSDT", "PERPETUAL", "1m"
+    )
+    series.merge(klines(0, 10))
+    series.merge(klines(20, 30))
+    assert series.merge(klines(5, 25, close=-1.0)) == 10
+
+    open_time = series.column("open_time")
+    assert len(series) == 30
+    assert np.all(np.diff(open_time) == Step)
+    close = series.column("close")
+    assert close[:5].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert np.all(close[5:25] == -1.0)
+    assert close[25:].tolist() == list(map(float, range(25, 30)))
+
+
+def test_append_replaces_and_inserts(tmp_path):
+    series = ColumnarStore(str(tmp_path)).series("BTCUSDT", "PERPETUAL", "1m")
+    for i in (0, 1, 3):
+        series.append_kline(kline(i))
+    assert series.append_kline(kline(3, close=9.0))
+    assert series.append_kline(kline(2), insert=True)
+    assert series.column("close").tolist() == [0.0, 1.0, 2.0, 9.0]
+    assert series.index_of(Start + 2 * Step) == 2
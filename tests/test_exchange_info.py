@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from binance_trader.data.modules.exchange_info import ExchangeInfoCache, SymbolFilters
+from binance_trader.strategy.modules.base_strategy import BaseStrategy
+
+
+def symbol(step: str = "0.001", market_step: str = "0.01", min_qty: str = "0.01"):
+    return {
+        "symbol": "BTCUSDT",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+            {
+                "filterType": "LOT_SIZE",
+                "stepSize": step,
+                "minQty": "0.001",
+                "maxQty": "1000",
+            },
+            {
+                "filterType": "MARKET_LOT_SIZE",
+                "stepSize": market_step,
+                "minQty": min_qty,
+                "maxQty": "120",
+            },
+            {"filterType": "MIN_NOTIONAL", "notional": "5"},
+        ],
+    }
+
+
+class Exchange:
+    def __init__(self) -> None:
+        self.info = [symbol()]
+        self.loads = 0
+
+    async def futures_exchange_info(self):
+        self.loads += 1
+        return {"symbols": self.info}
+
+    async def get_avg_price(self, symbol):
+        return {"price": "20000"}
+
+
+def test_market_lot_size_rounds_market_orders():
+    filters = SymbolFilters.from_info(symbol())
+    assert filters.step_size == 0.001
+    assert filters.market_step_size == 0.01
+    assert filters.round_qty(0.0199) == 0.01
+    assert filters.round_qty(0.03) == 0.03
+    assert filters.round_price(20000.17) == 20000.1
+
+
+def test_lot_size_used_without_market_lot_size():
+    info = symbol()
+    info["filters"] = [
+        f for f in info["filters"] if f["filterType"] != "MARKET_LOT_SIZE"
+    ]
+    filters = SymbolFilters.from_info(info)
+    assert filters.round_qty(0.0199) == 0.019
+    assert filters.market_min_qty == 0.001
+    assert filters.market_max_qty == 1000
+
+
+def test_validate_qty_min_qty_and_min_notional():
+    filters = SymbolFilters.from_info(symbol())
+    assert filters.validate_qty(0.019, 20000) == 0.01
+    with pytest.raises(ValueError):
+        filters.validate_qty(0.009, 20000)
+    assert filters.min_qty_at(100) == 0.05
+    with pytest.raises(ValueError):
+        filters.validate_qty(0.04, 100)
+    assert filters.validate_qty(0.05, 100) == 0.05
+    with pytest.raises(ValueError):
+        filters.validate_qty(121, 20000)
+
+
+def test_filters_are_reread_per_order():
+    async def main():
+        exchange = Exchange()
+        cache = ExchangeInfoCache(ttl=0.05)
+        strategy = await BaseStrategy.create(
+            api_key="k",
+            api_secret="s",
+            testnet=True,
+            interval="1m",
+            symbol="BTCUSDT",
+            contract_type="PERPETUAL",
+            order_log_loc="",
+            start_time=None,
+            end_time=None,
+            limit=1,
+            start_data_stream="",
+            end_data_stream="",
+            async_client=exchange,
+            exchange_info=cache,
+        )
+        assert await strategy._process_qty(0.0199) == 0.01
+        exchange.info = [symbol(market_step="0.001", min_qty="0.001")]
+        assert await strategy._process_qty(0.0199) == 0.01
+
+        await asyncio.sleep(0.06)
+        assert await strategy._process_qty(0.0199) == 0.019
+        assert strategy.filters.market_step_size == 0.001
+        return exchange.loads
+
+    assert asyncio.run(main()) == 2
@@ -0,0 +1,44 @@
+import datetime as dt
+
+import pytest
+
+from binance_trader.data.modules.intervals import Interval
+
+
+def ms(*args) -> int:
+    return int(dt.datetime(*args, tzinfo=dt.timezone.utc).timestamp() * 1000)
+
+
+def test_bar_open_and_close_minutes():
+    now = ms(2022, 9, 4, 19, 59, 3) + 61
+    assert Interval.bar_open(now, "1m") == ms(2022, 9, 4, 19, 59)
+    assert Interval.bar_close(now, "1m") == ms(2022, 9, 4, 20, 0)
+    assert Interval.bar_open(now, "15m") == ms(2022, 9, 4, 19, 45)
+    assert Interval.bar_close(now, "4h") == ms(2022, 9, 4, 20)
+    assert Interval.bar_close(now, "1d") == ms(2022, 9, 5)
+
+
+def test_bar_open_on_the_boundary():
+    start = ms(2022, 9, 4, 20)
+    assert Interval.bar_open(start, "1h") == start
+    assert Interval.bar_open(start - 1, "1h") == ms(2022, 9, 4, 19)
+    assert Interval.bar_close(start - 1, "1h") == start
+
+
+def test_weeks_start_on_monday():
+    wednesday = ms(2022, 9, 7, 12)
+    assert Interval.bar_open(wednesday, "1w") == ms(2022, 9, 5)
+    assert Interval.bar_close(wednesday, "1w") == ms(2022, 9, 12)
+    assert Interval.bar_open(ms(2022, 9, 5), "1w") == ms(2022, 9, 5)
+
+
+def test_months_follow_the_calendar():
+    assert Interval.bar_open(ms(2022, 2, 15, 8), "1M") == ms(2022, 2, 1)
+    assert Interval.bar_close(ms(2022, 2, 15, 8), "1M") == ms(2022, 3, 1)
+    assert Interval.bar_open(ms(2022, 12, 31, 23, 59), "1M") == ms(2022, 12, 1)
+    assert Interval.bar_close(ms(2022, 12, 31, 23, 59), "1M") == ms(2023, 1, 1)
+
+
+def test_unknown_interval():
+    with pytest.raises(ValueError):
+        Interval.bar_open(0, "7m")
@@ -0,0 +1,56 @@
+import numpy as np
+
+from binance_trader.data.modules.latency import Histogram
+
+
+def test_empty_histogram():
+    histogram = Histogram()
+    assert histogram.count == 0
+    assert histogram.percentile(50) is None
+    assert histogram.summary() == {"n": 0}
+
+
+def test_small_values_are_exact():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.min == 1
+    assert histogram.mean == 50.5
+
+
+def test_percentiles_within_bucket_resolution():
+    values = np.random.default_rng(7).lognormal(8, 1.5, 50_000).astype(int)
+    histogram = Histogram()
+    for value in values.tolist():
+        histogram.record(value)
+
+    for q in (50, 90, 99, 99.9):
+        expected = np.percentile(values, q, method="inverted_cdf")
+        assert abs(histogram.percentile(q) - expected) <= expected / Histogram.HalfCount
+    assert histogram.max == values.max()
+    assert (
+        histogram.max - histogram.percentile(100) <= histogram.max / Histogram.HalfCount
+    )
+    assert histogram.count == len(values)
+
+
+def test_negative_values_clamp_to_zero():
+    histogram = Histogram()
+    histogram.record(-5)
+    assert histogram.min == 0
+    assert histogram.percentile(50) == 0
+
+
+def test_merge_matches_single_histogram():
+    values = np.random.default_rng(11).integers(0, 10_000_000, 10_000).tolist()
+    whole, left, right = Histogram(), Histogram(), Histogram()
+    for i, value in enumerate(values):
+        whole.record(value)
+        (left if i % 2 else right).record(value)
+
+    left.merge(right)
+    assert left.summary() == whole.summary()
+    assert left.min == whole.min
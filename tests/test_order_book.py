@@ -0,0 +1,87 @@
+from binance_trader.data.modules.order_book import OrderBook
+
+
+def depth(U: int, u: int, pu: int, bids: list = (), asks: list = ()) -> dict:
+    return {
+        "e": "depthUpdate",
+        "E": 1662336000000,
+        "U": U,
+        "u": u,
+        "pu": pu,
+        "b": list(bids),
+        "a": list(asks),
+    }
+
+
+def snapshot(last_update_id: int) -> dict:
+    return {
+        "lastUpdateId": last_update_id,
+        "bids": [["99.0", "5"], ["97.0", "1"]],
+        "asks": [["101.0", "3"], ["103.0", "1"]],
+    }
+
+
+def test_buffers_until_snapshot_and_drops_stale_events():
+    book = OrderBook("btcusdt")
+    assert book.on_depth(depth(90, 100, 89, bids=[["99.0", "1"]])) is False
+    assert (
+        book.on_depth(depth(101, 110, 100, bids=[["98.0", "2"]], asks=[["102.0", "1"]]))
+        is False
+    )
+    assert not book.synced
+
+    assert book.apply_snapshot(snapshot(105))
+    assert book.last_update_id == 110
+    assert book.bids.prices.tolist() == [99.0, 98.0, 97.0]
+    assert book.bids.qtys.tolist() == [5.0, 2.0, 1.0]
+    assert book.asks.prices.tolist() == [101.0, 102.0, 103.0]
+    assert book.mid == 100.0
+    assert book.stats["stale"] == 1
+    assert book.stats["applied"] == 1
+
+
+def test_applies_in_sequence_and_removes_empty_levels():
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(snapshot(100))
+    assert book.on_depth(
+        depth(95, 105, 94, bids=[["99.0", "0"]], asks=[["100.5", "2"]])
+    )
+    assert book.on_depth(depth(106, 110, 105, asks=[["101.0", "0"]]))
+    assert book.best_bid == 97.0
+    assert book.best_ask == 100.5
+    assert book.asks.prices.tolist() == [100.5, 103.0]
+    assert book.last_update_id == 110
+
+
+def test_gap_resyncs_from_next_snapshot():
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(snapshot(100))
+    assert book.on_depth(depth(95, 105, 94))
+
+    assert book.on_depth(depth(130, 140, 125, bids=[["98.0", "4"]])) is False
+    assert not book.synced
+    assert book.stats["gaps"] == 1
+    assert book.on_depth(depth(141, 150, 140, asks=[["102.0", "1"]])) is False
+
+    assert book.apply_snapshot(snapshot(135))
+    assert book.last_update_id == 150
+    assert book.bids.prices.tolist() == [99.0, 98.0, 97.0]
+    assert book.asks.prices.tolist() == [101.0, 102.0, 103.0]
+    assert book.stats["resyncs"] == 1
+
+
+def test_snapshot_older_than_buffer_stays_unsynced():
+    book = OrderBook("BTCUSDT")
+    book.on_depth(depth(160, 170, 159))
+    assert book.apply_snapshot(snapshot(150)) is False
+    assert not book.synced
+    assert book.stats["gaps"] == 1
+
+
+def test_vwap_walks_the_book():
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(snapshot(100))
+    assert book.vwap("BUY", 3) == 101.0
+    assert book.vwap("BUY", 4) == (3 * 101.0 + 103.0) / 4
+    assert book.vwap("SELL", 6) == (5 * 99.0 + 97.0) / 6
+    assert book.vwap("BUY", 10) is None
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from binance_trader.user.modules.order_gateway import OrderGateway
+from binance_trader.user.modules.order_journal import OrderJournal
+
+
+class Exchange:
+    def __init__(self, reject: str = None, fail: bool = False) -> None:
+        self.reject = reject
+        self.fail = fail
+        self.batches = []
+        self.ids = 0
+
+    def _ack(self, order: dict) -> dict:
+        if order["symbol"] == self.reject:
+            return {"code": -2019, "msg": "Margin is insufficient."}
+        self.ids += 1
+        return {
+            "orderId": self.ids,
+            "clientOrderId": order["newClientOrderId"],
+            "status": "NEW",
+            "updateTime": 1662336000000,
+            **order,
+        }
+
+    async def futures_place_batch_order(self, batchOrders: list) -> list:
+        self.batches.append([order["symbol"] for order in batchOrders])
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise BinanceAPIException(None, 503, '{"code": -1001, "msg": "Down"}')
+        return [self._ack(order) for order in batchOrders]
+
+    async def futures_create_order(self, **order) -> dict:
+        return (await self.futures_place_batch_order([order]))[0]
+
+
+def submit_all(gateway: OrderGateway, symbols: list, journal=None) -> list:
+    async def main():
+        results = await asyncio.gather(
+            *[
+                gateway.submit(
+                    symbol,
+                    "BUY",
+                    "MARKET",
+                    0.01,
+                    journal=journal,
+                    newClientOrderId=f"bot-{symbol}",
+                )
+                for symbol in symbols
+            ],
+            return_exceptions=True,
+        )
+        await gateway.stop()
+        return results
+
+    return asyncio.run(main())
+
+
+def test_rejected_order_does_not_fail_the_batch(tmp_path):
+    exchange = Exchange(reject="S2USDT")
+    journal = OrderJournal(str(tmp_path))
+    gateway = OrderGateway(exchange, mode="batch")
+    symbols = [f"S{i}USDT" for i in range(7)]
+    results = submit_all(gateway, symbols, journal)
+
+    assert exchange.batches == [symbols[:5], symbols[5:]]
+    assert isinstance(results[2], BinanceAPIException)
+    assert results[2].code == -2019
+    for symbol, result in zip(symbols, results):
+        if symbol != "S2USDT":
+            assert result["symbol"] == symbol and result["status"] == "NEW"
+            assert journal.get(f"bot-{symbol}")["symbol"] == symbol
+    assert journal.get("bot-S2USDT") is None
+    assert gateway.stats["rejected"] == 1
+    assert gateway.stats["orders"] == 7
+    journal.close()
+
+
+def test_failed_request_fails_every_caller():
+    gateway = OrderGateway(Exchange(fail=True), mode="batch")
+    results = submit_all(gateway, ["S0USDT", "S1USDT"])
+    assert all(isinstance(result, BinanceAPIException) for result in results)
+    assert gateway.stats["failed"] == 2
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        OrderGateway(Exchange(), mode="fifo")
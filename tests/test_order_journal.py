@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from binance_trader.user.modules.order_journal import OrderJournal
+
+
+def order(
+    i: int, symbol: str = "BTCUSDT", status: str = "FILLED", time_ms: int = None
+) -> dict:
+    return {
+        "symbol": symbol,
+        "clientOrderId": f"bot-{i:04d}",
+        "orderId": i,
+        "side": "BUY" if i % 2 else "SELL",
+        "type": "MARKET",
+        "status": status,
+        "origQty": "0.01",
+        "executedQty": "0.01",
+        "avgPrice": "20000.0",
+        "cumQuote": "200.0",
+        "updateTime": time_ms if time_ms is not None else 1662336000000 + i * 1000,
+    }
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = OrderJournal(str(tmp_path))
+    yield journal
+    journal.close()
+
+
+def test_lookup_by_client_order_id(journal):
+    journal.append_order(order(1, status="NEW"), strategy="SMACrossover")
+    journal.append_order(order(2))
+    journal.append_order(order(1, status="FILLED"), strategy="SMACrossover")
+
+    assert journal.get("bot-0001")["status"] == "FILLED"
+    assert [r["status"] for r in journal.history("bot-0001")] == ["NEW", "FILLED"]
+    assert journal.get("bot-0001")["strategy"] == "SMACrossover"
+    assert journal.get("bot-9999") is None
+
+
+def test_range_is_ordered_by_time(journal):
+    for i in (5, 1, 3, 2, 4):
+        journal.append_order(order(i))
+    journal.append_order(order(6, symbol="ETHUSDT"))
+
+    times = [r["time"] for r in journal.range("btcusdt")]
+    assert times == sorted(times) and len(times) == 5
+    assert [
+        r["order_id"] for r in journal.range("BTCUSDT", 1662336002000, 1662336004000)
+    ] == [2, 3, 4]
+    assert journal.last("BTCUSDT")["order_id"] == 5
+    assert journal.symbols == ["BTCUSDT", "ETHUSDT"]
+    assert journal.range("BTCUSDT", kind="fill") == []
+
+
+def test_reopen_loads_index(tmp_path):
+    journal = OrderJournal(str(tmp_path))
+    for i in range(100):
+        journal.append_order(order(i, symbol=f"S{i % 3}USDT"))
+    journal.close()
+
+    journal = OrderJournal(str(tmp_path))
+    try:
+        assert len(journal) == 100
+        assert journal.get("bot-0042")["order_id"] == 42
+        assert len(journal.range("S1USDT")) == 33
+    finally:
+        journal.close()
+
+
+def test_recovers_lost_index_entries_and_torn_rows(tmp_path):
+    db = str(tmp_path)
+    journal = OrderJournal(db)
+    for i in range(10):
+        journal.append_order(order(i))
+    journal.close()
+
+    with open(f"{db}/order_journal.idx", "r+b") as file:
+        file.truncate(4 * OrderJournal.IndexStruct.size + 7)
+    size = os.path.getsize(f"{db}/order_journal.csv")
+    with open(f"{db}/order_journal.csv", "ab") as file:
+        file.write(b"1662336099000,order,BTCUSDT,bot-torn")
+
+    journal = OrderJournal(db)
+    try:
+        assert len(journal) == 10
+        assert journal.get("bot-0009")["order_id"] == 9
+        assert journal.get("bot-torn") is None
+        assert os.path.getsize(f"{db}/order_journal.csv") == size
+        assert (
+            os.path.getsize(f"{db}/order_journal.idx")
+            == 10 * OrderJournal.IndexStruct.size
+        )
+
+        journal.append_order(order(10))
+        assert journal.get("bot-0010")["order_id"] == 10
+    finally:
+        journal.close()
+
+
+def test_second_writer_is_refused(journal, tmp_path):
+    with pytest.raises(RuntimeError):
+        OrderJournal(str(tmp_path))
+    other = OrderJournal(str(tmp_path), name="order_journal_1")
+    other.close()
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from binance_trader.data.modules.candle_window import CandleWindow
+from binance_trader.data.modules.intervals import Interval
+from binance_trader.data.modules.resampler import ResampleEngine, Resampler
+
+Columns = ("open_time", "open", "high", "low", "close", "volume")
+
+
+def minute_bars(bars: int = 3_000, gap_at: int = 1_000) -> dict:
+    rng = np.random.default_rng(7)
+    close = 20_000 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    rows = {
+        "open_time": 1662336000000
+        + 7 * 60_000
+        + np.arange(bars, dtype=np.int64) * 60_000,
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.random(bars),
+    }
+    rows["open_time"][gap_at:] += 3 * 60_000
+    return rows
+
+
+@pytest.mark.parametrize("interval", ["3m", "5m", "15m", "1h", "4h"])
+def test_incremental_matches_batch(interval):
+    rows = minute_bars()
+    resampler = Resampler(interval)
+    bars = []
+    for bar in zip(*(rows[name].tolist() for name in Columns)):
+        emitted = resampler.update(*bar)
+        if emitted is not None:
+            bars.append(emitted)
+
+    batch = Resampler.resample(rows, interval)
+    assert len(bars) == len(batch["open_time"]) > 0
+    incremental = np.array(bars)
+    for i, name in enumerate(Columns):
+        assert np.allclose(incremental[:, i], batch[name])
+    assert batch["close_time"].tolist() == [
+        Interval.bar_close(t, interval) - 1 for t in batch["open_time"].tolist()
+    ]
+
+
+def test_incomplete_buckets_are_dropped():
+    rows = minute_bars(bars=60, gap_at=22)
+    resampler = Resampler("5m")
+    emitted = [
+        resampler.update(*bar)
+        for bar in zip(*(rows[name].tolist() for name in Columns))
+    ]
+    opens = [bar[0] for bar in emitted if bar is not None]
+
+    batch = Resampler.resample(rows, "5m")
+    partial = Resampler.resample(rows, "5m", partial=True)
+    assert opens == batch["open_time"].tolist()
+    assert len(partial["open_time"]) > len(batch["open_time"])
+    assert resampler.stats["partial"] > 0
+
+
+def test_bar_values():
+    resampler = Resampler("3m")
+    start = 1662336000000
+    assert resampler.update(start, 10, 12, 9, 11, 1) is None
+    assert resampler.update(start + 60_000, 11, 15, 10, 14, 2) is None
+    assert resampler.update(start + 60_000, 11, 99, 1, 14, 2) is None
+    bar = resampler.update(start + 120_000, 14, 14, 8, 13, 3)
+    assert bar == (start, 10.0, 15.0, 8.0, 13.0, 6.0)
+    assert resampler.last == bar
+    assert resampler.current is None
+
+
+def test_rejects_unaligned_intervals():
+    with pytest.raises(ValueError):
+        Resampler("5m", source="3m")
+    with pytest.raises(ValueError):
+        Resampler("1m", source="1m")
+
+
+def test_scoped_engines_are_isolated():
+    live = ResampleEngine.instance("BTCUSDT", "PERPETUAL", source="1m")
+    replay = ResampleEngine.instance("BTCUSDT", "PERPETUAL", source="1m", scope="t")
+    assert live is not replay
+    assert live.add("5m", 10) is not replay.add("5m", 10)
+    assert replay.add("5m", 10) is CandleWindow.instance(
+        "BTCUSDT", "PERPETUAL", "5m", 10, scope="t"
+    )
+
+    ResampleEngine.drop("t")
+    CandleWindow.drop("t")
+    assert ResampleEngine.instance("BTCUSDT", "PERPETUAL", scope="t") is not replay
+    assert ResampleEngine.instance("BTCUSDT", "PERPETUAL") is live
+    ResampleEngine.drop("t")
+    ResampleEngine._engines.pop(("BTCUSDT", "PERPETUAL", "1m", None))
+    CandleWindow._windows.pop(("BTCUSDT", "PERPETUAL", "5m", None))
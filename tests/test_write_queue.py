@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import glob
+import threading
+
+import pytest
+
+from binance_trader.data.modules.candle_writer import CandleWriter
+from binance_trader.data.modules.write_queue import WriteQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    yield str(tmp_path)
+    CandleWriter._writers.pop(str(tmp_path), None)
+
+
+def rows(path: str) -> list:
+    with open(path, newline="") as file:
+        return [int(row["i"]) for row in csv.DictReader(file)]
+
+
+def run(queue: WriteQueue) -> None:
+    queue._thread = threading.Thread(target=queue._run, daemon=True)
+    queue._thread.start()
+    queue.shutdown()
+
+
+def test_spill_keeps_write_order(db, tmp_path):
+    queue = WriteQueue(
+        maxsize=10, policy="spill", spill_path=str(tmp_path / "queue.spill")
+    )
+    for i in range(1_000):
+        queue.put(("write", db, "rows.csv", (i,), ("i",)))
+    assert queue.stats["spilled"] == 990
+    assert queue.depth == 1_000
+
+    run(queue)
+    assert rows(f"{db}/rows.csv") == list(range(1_000))
+    assert queue.stats["written"] == 1_000
+    assert not (tmp_path / "queue.spill").exists()
+
+
+def test_seal_stays_in_order_while_spilling(db, tmp_path):
+    queue = WriteQueue(
+        maxsize=10, policy="spill", spill_path=str(tmp_path / "queue.spill")
+    )
+    for i in range(500):
+        queue.put(("write", db, "rows.csv", (i,), ("i",)))
+    queue.put(("seal", db, "rows.csv", None, None), force=True)
+    for i in range(500, 600):
+        queue.put(("write", db, "rows.csv", (i,), ("i",)))
+
+    run(queue)
+    (sealed,) = glob.glob(f"{db}/rows.csv.*.sealed")
+    assert rows(sealed) == list(range(500))
+    assert rows(f"{db}/rows.csv") == list(range(500, 600))
+
+
+def test_block_policy_spills_on_the_event_loop(db, tmp_path):
+    queue = WriteQueue(
+        maxsize=5, policy="block", spill_path=str(tmp_path / "queue.spill")
+    )
+
+    async def put() -> None:
+        for i in range(20):
+            queue.put(("write", db, "rows.csv", (i,), ("i",)))
+
+    asyncio.run(put())
+    assert queue.stats["blocked"] == 0
+    assert queue.stats["spilled"] == 15
+
+    run(queue)
+    assert rows(f"{db}/rows.csv") == list(range(20))
+
+
+def test_drop_oldest_keeps_newest(db, tmp_path):
+    queue = WriteQueue(
+        maxsize=10, policy="drop_oldest", spill_path=str(tmp_path / "queue.spill")
+    )
+    for i in range(25):
+        queue.put(("write", db, "rows.csv", (i,), ("i",)))
+
+    run(queue)
+    assert rows(f"{db}/rows.csv") == list(range(15, 25))
+    assert queue.stats["dropped"] == 15
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        WriteQueue(policy="wait")